@@ -0,0 +1,222 @@
+"""
+Printable exam documents: hall tickets and room seating sheets as PDF, and the
+room seating grid as SVG.
+
+This module has no dependencies beyond the standard library and never touches the
+database, so process-pool workers can import it without loading the web app. It
+writes a minimal PDF 1.4 file (base-14 Helvetica, compressed content streams) directly.
+The layouts are plain text and rules, so a full PDF library is not needed.
+
+Every function takes and returns plain, picklable data.
+"""
+import zlib
+from typing import Dict, List, Optional
+
+# Bump whenever the output changes so cached documents are re-rendered
+RENDERER_VERSION = "1"
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+SHEET_ROWS_PER_PAGE = 36
+
+
+def _escape(text) -> str:
+    text = "" if text is None else str(text)
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+class _Page:
+    def __init__(self):
+        self.ops: List[str] = []
+
+    def text(self, x: float, y: float, text, size: float = 11, bold: bool = False) -> None:
+        font = "F2" if bold else "F1"
+        self.ops.append(f"BT /{font} {size} Tf {x} {y} Td ({_escape(text)}) Tj ET")
+
+    def line(self, x1: float, y1: float, x2: float, y2: float) -> None:
+        self.ops.append(f"{x1} {y1} m {x2} {y2} l S")
+
+    def rect(self, x: float, y: float, w: float, h: float) -> None:
+        self.ops.append(f"{x} {y} {w} {h} re S")
+
+    def content(self) -> bytes:
+        return zlib.compress("\n".join(self.ops).encode("latin-1", "replace"), 6)
+
+
+def _pdf(pages: List[_Page], title: str) -> bytes:
+    """Serialize pages into a PDF file with a valid cross-reference table."""
+    objects: List[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",  # page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+        f"<< /Title ({_escape(title)}) /Producer (Pariksha Sarthi) >>".encode("latin-1", "replace"),
+    ]
+    kids = []
+    for page in pages:
+        stream = page.content()
+        objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_ref = len(objects)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {content_ref} 0 R >>".encode()
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R /Info 5 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def _exam_lines(exam: Dict) -> List[str]:
+    subjects = ", ".join(exam.get("subjects") or [])
+    lines = [f"Date: {exam.get('date', '')}    Time: {exam.get('startTime', '')} - {exam.get('endTime', '')}"]
+    if subjects:
+        lines.append(f"Subjects: {subjects}")
+    return lines
+
+
+def _seat_label(seat: Dict) -> str:
+    return f"{seat['bench']}{seat['position'] or ''}"
+
+
+def _hall_ticket(page: _Page, top: float, room: Dict, seat: Dict) -> None:
+    exam = room["exam"]
+    page.rect(40, top - 360, PAGE_WIDTH - 80, 360)
+    page.text(60, top - 35, room.get("college") or "", 16, bold=True)
+    page.text(60, top - 58, f"HALL TICKET - {exam.get('title', '')}", 13, bold=True)
+    page.line(40, top - 70, PAGE_WIDTH - 40, top - 70)
+    rows = [
+        ("Name", seat.get("name")),
+        ("Roll Number", seat.get("roll")),
+        ("Branch / Year", f"{seat.get('branch') or ''} / {seat.get('year') or ''}"),
+        ("Block", room.get("block")),
+        ("Room", room.get("roomNumber")),
+        ("Bench / Seat", _seat_label(seat)),
+    ]
+    y = top - 100
+    for label, value in rows:
+        page.text(60, y, label, 11, bold=True)
+        page.text(200, y, value, 11)
+        y -= 24
+    for line in _exam_lines(exam):
+        page.text(60, y, line, 10)
+        y -= 18
+    page.text(60, top - 340, "Candidate signature", 9)
+    page.text(PAGE_WIDTH - 200, top - 340, "Controller of examinations", 9)
+
+
+def render_hall_tickets(room: Dict) -> bytes:
+    """Two hall tickets per A4 page for every seated student of one room."""
+    pages = []
+    for index, seat in enumerate(room["seats"]):
+        if index % 2 == 0:
+            pages.append(_Page())
+        _hall_ticket(pages[-1], PAGE_HEIGHT - 30 - (index % 2) * 400, room, seat)
+    return _pdf(pages or [_Page()], f"Hall tickets - room {room.get('roomNumber')}")
+
+
+def render_room_sheet(room: Dict, invigilator: Optional[str] = None) -> bytes:
+    """Seating sheet for a room: bench, seat, roll number, name and a signature column."""
+    exam = room["exam"]
+    columns = [(40, "Bench"), (95, "Roll Number"), (205, "Name"), (390, "Branch"), (450, "Signature")]
+    pages = []
+    seats = room["seats"] or [None]
+    for start in range(0, len(seats), SHEET_ROWS_PER_PAGE):
+        page = _Page()
+        pages.append(page)
+        page.text(40, PAGE_HEIGHT - 50, f"{exam.get('title', '')} - Room {room.get('roomNumber', '')} ({room.get('block') or ''})", 14, bold=True)
+        header = _exam_lines(exam)[0]
+        if invigilator or room.get("invigilator"):
+            header += f"    Invigilator: {invigilator or room.get('invigilator')}"
+        page.text(40, PAGE_HEIGHT - 70, header, 10)
+        y = PAGE_HEIGHT - 100
+        for x, label in columns:
+            page.text(x, y, label, 10, bold=True)
+        page.line(40, y - 6, PAGE_WIDTH - 40, y - 6)
+        for seat in seats[start:start + SHEET_ROWS_PER_PAGE]:
+            if seat is None:
+                break
+            y -= 20
+            page.text(40, y, _seat_label(seat), 10)
+            page.text(95, y, seat.get("roll"), 10)
+            page.text(205, y, (seat.get("name") or "")[:32], 10)
+            page.text(390, y, seat.get("branch"), 10)
+            page.line(450, y - 3, PAGE_WIDTH - 40, y - 3)
+        page.text(40, 30, f"Page {len(pages)} of {-(-len(seats) // SHEET_ROWS_PER_PAGE)}    Present: ____    Absent: ____", 9)
+    return _pdf(pages, f"Seating sheet - room {room.get('roomNumber')}")
+
+
+def render_room_documents(room: Dict) -> Dict[str, bytes]:
+    """Entry point for pool workers: both documents for one room."""
+    return {"tickets": render_hall_tickets(room), "sheet": render_room_sheet(room)}
+
+
+# ---- Room seating grid (SVG) ----
+
+SEAT_COLORS = {"present": "#c8e6c9", "absent": "#ffcdd2", "pending": "#ffffff", None: "#eeeeee"}
+BENCH_WIDTH, BENCH_HEIGHT, BENCH_GAP, MARGIN = 150, 44, 14, 20
+
+
+def _xml(text) -> str:
+    text = "" if text is None else str(text)
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
+
+def iter_room_svg(title: str, benches: int, columns: int, slots: Dict[int, List[Dict]]):
+    """Yield an SVG bench grid piece by piece.
+
+    `slots` maps a bench number to its seats in position order, each
+    {"position", "roll", "attendance"}; a seat without a roll number is free.
+    Benches are numbered row by row from the front, `columns` to a row.
+    """
+    rows = -(-benches // columns) if benches else 0
+    width = MARGIN * 2 + columns * BENCH_WIDTH + (columns - 1) * BENCH_GAP
+    height = MARGIN * 2 + 60 + rows * (BENCH_HEIGHT + BENCH_GAP) + 30
+    yield (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}" '
+        f'font-family="Helvetica, Arial, sans-serif" font-size="11">'
+        f'<text x="{MARGIN}" y="{MARGIN + 14}" font-size="15" font-weight="bold">{_xml(title)}</text>'
+        f'<rect x="{MARGIN}" y="{MARGIN + 26}" width="{width - 2 * MARGIN}" height="18" fill="#455a64"/>'
+        f'<text x="{width / 2}" y="{MARGIN + 39}" fill="#ffffff" text-anchor="middle">FRONT</text>'
+    )
+    top = MARGIN + 60
+    for row in range(rows):
+        parts = []
+        y = top + row * (BENCH_HEIGHT + BENCH_GAP)
+        for column in range(columns):
+            bench = row * columns + column + 1
+            if bench > benches:
+                break
+            x = MARGIN + column * (BENCH_WIDTH + BENCH_GAP)
+            seats = slots.get(bench) or [{"position": None, "roll": None, "attendance": None}]
+            seat_width = BENCH_WIDTH / len(seats)
+            parts.append(f'<g><rect x="{x}" y="{y}" width="{BENCH_WIDTH}" height="{BENCH_HEIGHT}" fill="none" stroke="#37474f"/>')
+            for i, seat in enumerate(seats):
+                sx = x + i * seat_width
+                state = seat["attendance"] if seat["roll"] else None
+                parts.append(
+                    f'<rect x="{sx:.1f}" y="{y}" width="{seat_width:.1f}" height="{BENCH_HEIGHT}" '
+                    f'fill="{SEAT_COLORS.get(state, SEAT_COLORS["pending"])}" stroke="#90a4ae"/>'
+                    f'<text x="{sx + seat_width / 2:.1f}" y="{y + 17}" text-anchor="middle" fill="#607d8b" font-size="9">'
+                    f'{bench}{seat["position"] or ""}</text>'
+                    f'<text x="{sx + seat_width / 2:.1f}" y="{y + 33}" text-anchor="middle">{_xml(seat["roll"] or "")}</text>'
+                )
+            parts.append("</g>")
+        yield "".join(parts)
+    legend_y = height - MARGIN
+    legend = []
+    for i, (label, state) in enumerate((("Present", "present"), ("Absent", "absent"), ("Pending", "pending"), ("Free", None))):
+        x = MARGIN + i * 90
+        legend.append(
+            f'<rect x="{x}" y="{legend_y - 10}" width="12" height="12" fill="{SEAT_COLORS[state]}" stroke="#90a4ae"/>'
+            f'<text x="{x + 16}" y="{legend_y}">{label}</text>'
+        )
+    yield "".join(legend) + "</svg>"
@@ -1,17 +1,27 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File
+import time
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File, Query, Header, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.middleware.base import BaseHTTPMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import InsertOne, ReplaceOne, UpdateOne, monitoring, read_preferences
+from pymongo.errors import DuplicateKeyError, OperationFailure
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 import os
 import logging
+import importlib
+import threading
+import weakref
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, model_validator
 from typing import List, Optional, Dict, Any
 import uuid
-from datetime import datetime, timezone, timedelta
+from datetime import date, datetime, time as time_of_day, timezone, timedelta
+from zoneinfo import ZoneInfo
 import bcrypt
 # JWT provider: prefer python-jose; fallback to PyJWT with compatible names
 try:
@@ -26,8 +36,27 @@ except Exception:  # pragma: no cover
         class ExpiredSignatureError(Exception):
             pass
 import random
+import re
 import csv
 import io
+import asyncio
+import bisect
+from collections import OrderedDict, deque
+import heapq
+import functools
+import itertools
+import math
+import gzip
+import hashlib
+import hmac
+import base64
+import json
+import multiprocessing
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from bson import json_util
+
+from backend import documents
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -36,8 +65,136 @@ load_dotenv(ROOT_DIR / '.env')
 raw_mongo_url = os.environ.get('MONGO_URL', '').strip('"').strip()
 db_name = os.environ.get('DB_NAME', 'pariksha_sarthi').strip('"').strip()
 
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    value = os.environ.get(name, "").strip()
+    return int(value) if value else default
+
+def _available_compressors(names: str) -> List[str]:
+    # zstd and snappy need optional packages (zstandard, python-snappy); zlib is built in
+    modules = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+    available = []
+    for name in (n.strip() for n in names.split(",") if n.strip()):
+        try:
+            importlib.import_module(modules[name])
+            available.append(name)
+        except (KeyError, ImportError):
+            pass
+    return available
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool usage and checkout wait times, reported on /metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiting = threading.local()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.open = self.in_use = self.peak_in_use = 0
+            self.checkouts = self.checkout_failures = self.waiting = 0
+            self.wait_ms_total = self.wait_ms_max = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "open": self.open,
+                "inUse": self.in_use,
+                "peakInUse": self.peak_in_use,
+                "waiting": self.waiting,
+                "checkouts": self.checkouts,
+                "checkoutFailures": self.checkout_failures,
+                "waitMsAvg": round(self.wait_ms_total / self.checkouts, 3) if self.checkouts else 0.0,
+                "waitMsMax": round(self.wait_ms_max, 3),
+            }
+
+    # Check-out started/finished fire on the same (Motor executor) thread
+    def connection_check_out_started(self, event):
+        self._waiting.started = time.perf_counter()
+        with self._lock:
+            self.waiting += 1
+
+    def connection_checked_out(self, event):
+        waited = (time.perf_counter() - getattr(self._waiting, "started", time.perf_counter())) * 1000
+        with self._lock:
+            self.waiting -= 1
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            self.wait_ms_total += waited
+            self.wait_ms_max = max(self.wait_ms_max, waited)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open -= 1
+
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_ready(self, event): pass
+
+pool_metrics = PoolMetrics()
+
+class LazyModule:
+    """Heavy optional dependency, imported on first attribute access (or by the startup warm-up)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._module = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self.name)
+        return self._module
+
+    def __getattr__(self, attr: str):
+        return getattr(self.load(), attr)
+
+# Only needed for Excel exports; importing pandas costs more than the rest of the app together
+pandas = LazyModule("pandas")
+openpyxl = LazyModule("openpyxl")
+OPTIONAL_MODULES = (pandas, openpyxl)
+
+def _client_options() -> Dict[str, Any]:
+    options = {
+        "serverSelectionTimeoutMS": _env_int("MONGO_SERVER_SELECTION_TIMEOUT_MS", 10000),
+        "connectTimeoutMS": _env_int("MONGO_CONNECT_TIMEOUT_MS", 10000),
+        "socketTimeoutMS": _env_int("MONGO_SOCKET_TIMEOUT_MS", None),
+        "maxPoolSize": _env_int("MONGO_MAX_POOL_SIZE", 100),
+        "minPoolSize": _env_int("MONGO_MIN_POOL_SIZE", 0),
+        "maxIdleTimeMS": _env_int("MONGO_MAX_IDLE_TIME_MS", 300000),
+        "waitQueueTimeoutMS": _env_int("MONGO_WAIT_QUEUE_TIMEOUT_MS", None),
+        "event_listeners": [pool_metrics],
+    }
+    compressors = _available_compressors(os.environ.get("MONGO_COMPRESSORS", "zstd,snappy,zlib"))
+    if compressors:
+        options["compressors"] = ",".join(compressors)
+    return {k: v for k, v in options.items() if v is not None}
+
 def _build_client(uri: str) -> AsyncIOMotorClient:
-    return AsyncIOMotorClient(uri, serverSelectionTimeoutMS=10000)
+    return AsyncIOMotorClient(uri, **_client_options())
+
+# Read-only endpoints whose data tolerates replication lag (student allocations, notifications,
+# calendar) read through `read_db`, keeping that traffic off the primary that admin writes use.
+READ_PREFERENCE = os.environ.get("MONGO_READ_PREFERENCE", "secondaryPreferred").strip()
 
 def _sanitize_uri_for_log(uri: str) -> str:
     try:
@@ -56,6 +213,9 @@ if not raw_mongo_url:
 
 client = _build_client(raw_mongo_url)
 db = client[db_name]
+read_db = client.get_database(
+    db_name, read_preference=read_preferences.make_read_preference(read_preferences.read_pref_mode_from_name(READ_PREFERENCE), None)
+)
 
 # JWT Configuration
 SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'your-secret-key-change-in-production')
@@ -65,6 +225,10 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
 # Create the main app without a prefix
 app = FastAPI()
 
+# Idempotency-Key replay (see IDEMPOTENCY). Added before CORS so that CORS, the outermost
+# middleware, also decorates replayed responses.
+app.add_middleware(BaseHTTPMiddleware, dispatch=lambda request, call_next: idempotency_middleware(request, call_next))
+
 # Attach CORS immediately after app creation
 app.add_middleware(
     CORSMiddleware,
@@ -148,6 +312,9 @@ class Room(BaseModel):
     roomNumber: str
     capacity: int
     benches: int = 20
+    # Optional bench layout for the seating grid: benches per row from the front, and/or number of rows
+    columns: Optional[int] = Field(None, ge=1)
+    rows: Optional[int] = Field(None, ge=1)
 
 class ExamSession(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -186,6 +353,13 @@ class DraftExam(BaseModel):
     createdAt: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
     updatedAt: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
 
+# Responses of the scheduling endpoints: the saved exam plus cohort clashes with other exams
+class ExamSessionWithClashes(ExamSession):
+    clashes: List[Dict[str, Any]] = []
+
+class DraftExamWithClashes(DraftExam):
+    clashes: List[Dict[str, Any]] = []
+
 class CalendarEvent(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -260,6 +434,7 @@ class Notification(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     userId: str
     message: str
+    examId: Optional[str] = None
     isRead: bool = False
     createdAt: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
 
@@ -279,11 +454,79 @@ class ExamAttendanceRestriction(BaseModel):
     examId: str
     studentId: str
     attendancePercentage: float
+    band: str = "blocked"  # "blocked", "conditional" or "eligible" under the exam's eligibility policy
     isAllowed: bool = False
     grantedBy: Optional[str] = None
     createdAt: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
     updatedAt: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
 
+# ============ INTERNAL RECORDS ============
+
+# The models above validate what clients send. Documents the server assembles itself from values
+# it already trusts (seat notifications, CSV-derived restrictions, invigilator assignments) are
+# built with a RecordFactory instead: a plain-dict template per model with defaults resolved once
+# per batch, so a 10k-seat allocation doesn't pay for 10k validations, uuid4() calls and clock reads.
+
+_UUID4_VERSION = bytes((b & 0x0F) | 0x40 for b in range(256))
+_UUID4_VARIANT = bytes((b & 0x3F) | 0x80 for b in range(256))
+
+def new_ids(count: int) -> List[str]:
+    """`count` random version-4 UUID strings (as str(uuid.uuid4())) from a single os.urandom call."""
+    raw = bytearray(os.urandom(16 * count))
+    raw[6::16] = raw[6::16].translate(_UUID4_VERSION)
+    raw[8::16] = raw[8::16].translate(_UUID4_VARIANT)
+    h = raw.hex()
+    return [f"{h[i:i + 8]}-{h[i + 8:i + 12]}-{h[i + 12:i + 16]}-{h[i + 16:i + 20]}-{h[i + 20:i + 32]}" for i in range(0, len(h), 32)]
+
+class RecordFactory:
+    """`Model(**values).model_dump()` for trusted values, without per-record validation.
+
+    Every record of a batch shares one timestamp; ids come from `new_ids`. Missing required fields
+    and unknown fields are still rejected, but value types are not checked.
+    """
+
+    def __init__(self, model):
+        fields = model.model_fields
+        self.model = model
+        self._required = {name for name, field in fields.items() if field.is_required()}
+        self._factories = {name: field.default_factory for name, field in fields.items() if field.default_factory}
+        self._template = {
+            name: None if field.is_required() or field.default_factory else field.default
+            for name, field in fields.items()
+        }
+        self._mutable = [name for name, value in self._template.items() if isinstance(value, (list, dict))]
+
+    def build(self, rows) -> List[dict]:
+        rows = rows if isinstance(rows, list) else list(rows)
+        template = dict(self._template)
+        for name, factory in self._factories.items():
+            if name != "id":
+                template[name] = factory()
+        ids = new_ids(len(rows)) if "id" in self._factories else None
+        width, required = len(template), self._required
+        records = []
+        for index, row in enumerate(rows):
+            if not row.keys() >= required:
+                raise ValueError(f"{self.model.__name__} record is missing {sorted(required - row.keys())}")
+            record = template.copy()
+            if ids:
+                record["id"] = ids[index]
+            for name in self._mutable:
+                record[name] = type(record[name])(record[name])
+            record.update(row)
+            if len(record) != width:
+                raise ValueError(f"{self.model.__name__} has no field(s) {sorted(record.keys() - template.keys())}")
+            records.append(record)
+        return records
+
+notification_records = RecordFactory(Notification)
+restriction_records = RecordFactory(ExamAttendanceRestriction)
+exam_room_records = RecordFactory(ExamRoom)
+exam_session_records = RecordFactory(ExamSession)
+calendar_event_records = RecordFactory(CalendarEvent)
+exam_invigilator_records = RecordFactory(ExamInvigilator)
+duty_records = RecordFactory(InvigilatorDuty)
+
 # ============ HELPER FUNCTIONS ============
 
 def hash_password(password: str) -> str:
@@ -305,6 +548,12 @@ def _normalize_date_str(date_str: str) -> str:
     if not isinstance(date_str, str) or not date_str.strip():
         raise ValueError("Date is required")
     date_str = date_str.strip()
+    if len(date_str) == 10 and date_str[4] == "-" and date_str[7] == "-" and date_str[:4].isdigit():
+        # Already canonical (every client we ship sends this); skip the format probing below
+        try:
+            return date.fromisoformat(date_str).isoformat()
+        except ValueError:
+            raise ValueError(f"Invalid date format: {date_str}")
     fmts = ["%Y-%m-%d", "%d-%m-%Y", "%Y/%m/%d", "%d/%m/%Y", "%Y.%m.%d", "%d.%m.%Y"]
     from datetime import datetime as _dt
     last_err = None
@@ -341,6 +590,197 @@ def _normalize_time_str(time_str: str) -> str:
         raise ValueError("Time out of range")
     return f"{h:02d}:{m:02d}"
 
+# Exams and calendar events keep their API-facing strings ("date", "startTime", "time") and also
+# carry BSON datetimes "start"/"end" (naive UTC, as pymongo returns them) for indexed range queries.
+EXAM_TIMEZONE = ZoneInfo(os.environ.get("EXAM_TIMEZONE", "Asia/Kolkata"))
+
+def to_utc(day: str, clock: str) -> datetime:
+    """A local exam date (YYYY-MM-DD) and time (HH:MM) as a naive UTC datetime."""
+    local = datetime.combine(date.fromisoformat(day), datetime.strptime(clock, "%H:%M").time(), EXAM_TIMEZONE)
+    return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+def parse_range_bound(value: str) -> datetime:
+    """A ?from=/?to= bound: a local date (midnight) or an ISO datetime (naive means UTC)."""
+    try:
+        if len(value) <= 10:
+            return to_utc(_normalize_date_str(value), "00:00")
+        moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid date: {value}")
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+def exam_times(doc: dict) -> Dict[str, Any]:
+    """`start`/`end` for a normalized exam or draft."""
+    return {"start": to_utc(doc["date"], doc["startTime"]), "end": to_utc(doc["date"], doc["endTime"])}
+
+def exam_window(exam: dict) -> tuple:
+    """(start, end) datetimes of a stored or proposed exam, computed from the strings when missing."""
+    if exam.get("start") and exam.get("end"):
+        return exam["start"], exam["end"]
+    times = exam_times({
+        "date": _normalize_date_str(exam["date"]),
+        "startTime": _normalize_time_str(exam["startTime"]),
+        "endTime": _normalize_time_str(exam["endTime"]),
+    })
+    return times["start"], times["end"]
+
+# Upper bound on an exam's length; lets "overlaps [a, b)" be a bounded range scan on `start`
+MAX_EXAM_DURATION = timedelta(days=1)
+
+def event_times(doc: dict) -> Dict[str, Any]:
+    """`start` for a calendar event; free-form dates/times of manual events are stored as None."""
+    try:
+        return {"start": to_utc(_normalize_date_str(doc["date"]), _normalize_time_str(doc.get("time") or "00:00"))}
+    except (KeyError, ValueError):
+        return {"start": None}
+
+def _event_doc(event: "CalendarEvent") -> dict:
+    doc = event.model_dump()
+    return {**doc, **event_times(doc)}
+
+async def migrate_temporal_fields(batch: int = 1000) -> int:
+    """Add `start`/`end` to exams and calendar events written before they existed."""
+    migrated = 0
+    for collection, times in ((db.examSessions, exam_times), (db.calendarEvents, event_times)):
+        docs = await collection.find(
+            {"start": {"$exists": False}}, {"_id": 0, "id": 1, "date": 1, "startTime": 1, "endTime": 1, "time": 1}
+        ).to_list(None)
+        operations = []
+        for doc in docs:
+            try:
+                fields = times(doc)
+            except (KeyError, ValueError):
+                fields = {"start": None, "end": None}
+            operations.append(UpdateOne({"id": doc["id"]}, {"$set": fields}))
+        for start in range(0, len(operations), batch):
+            await collection.bulk_write(operations[start:start + batch], ordered=False)
+        migrated += len(operations)
+    return migrated
+
+async def _find_by_ids(collection, ids, projection: Optional[Dict[str, int]] = None) -> Dict[str, dict]:
+    """Fetch documents whose ``id`` is in ``ids`` with one ``$in`` query, keyed by id."""
+    unique_ids = list({i for i in ids if i})
+    if not unique_ids:
+        return {}
+    docs = await collection.find({"id": {"$in": unique_ids}}, projection or {"_id": 0}).to_list(len(unique_ids))
+    return {doc["id"]: doc for doc in docs}
+
+async def _find_rooms_with_blocks(room_ids, room_fields: Optional[List[str]] = None, block_fields: Optional[List[str]] = None) -> tuple:
+    """Load rooms and their blocks in a single aggregate round-trip.
+
+    `room_fields`/`block_fields` narrow the documents (see FieldSelection); by default they are whole.
+    Returns ``(rooms_by_id, blocks_by_id)``.
+    """
+    unique_ids = list({i for i in room_ids if i})
+    if not unique_ids:
+        return {}, {}
+    project: Dict[str, int] = {"_id": 0}
+    if room_fields is not None or block_fields is not None:
+        project.update({"id": 1, "blockId": 1}, **{field: 1 for field in room_fields or []})
+        project.update({f"block.{field}": 1 for field in ["id", *(block_fields or [])]})
+    docs = await db.rooms.aggregate([
+        {"$match": {"id": {"$in": unique_ids}}},
+        {"$lookup": {"from": "blocks", "localField": "blockId", "foreignField": "id", "as": "block"}},
+        {"$project": project},
+    ]).to_list(len(unique_ids))
+    rooms, blocks = {}, {}
+    for room in docs:
+        joined = room.pop("block", None) or []
+        if joined:
+            block = {k: v for k, v in joined[0].items() if k != "_id"}
+            blocks[block["id"]] = block
+        rooms[room["id"]] = room
+    return rooms, blocks
+
+# ============ FIELD SELECTION ============
+
+# List endpoints accept `?fields=id,title,exam.title,room.roomNumber`. Each declares an allow-list:
+# dotted paths into its own documents under "", and for every object it joins in ("exam", "room",
+# ...) the paths allowed inside that object. A selection becomes the Mongo projection of the main
+# query and of each lookup, a join nobody asked for is skipped, and the response carries only the
+# requested keys plus "id". Without `fields` an endpoint answers exactly as before.
+
+def _without_nested(paths) -> List[str]:
+    """Drop paths already covered by a selected parent ("profile" covers "profile.name")."""
+    chosen = set(paths)
+    return sorted(p for p in chosen if not any(p.startswith(other + ".") for other in chosen))
+
+class FieldSelection:
+    def __init__(self, allowed: Dict[str, set], paths: Optional[Dict[str, List[str]]] = None):
+        self.allowed = allowed
+        self.paths = paths  # None selects everything; otherwise part ("" or a join) -> paths, [] = all of a join
+
+    @classmethod
+    def parse(cls, value: Optional[str], allowed: Dict[str, set]) -> "FieldSelection":
+        if not value:
+            return cls(allowed)
+        paths: Dict[str, List[str]] = {}
+        for path in filter(None, (raw.strip() for raw in value.split(","))):
+            head, _, rest = path.partition(".")
+            part, sub = (head, rest) if head and head in allowed else ("", path)
+            if (sub and sub not in allowed[part]) or (not sub and part == ""):
+                choices = sorted(allowed[""]) + [f"{join}.{field}" for join in allowed if join for field in sorted(allowed[join])]
+                raise HTTPException(status_code=400, detail=f"Unknown field '{path}'. Allowed: {', '.join(choices)}")
+            if sub:
+                if paths.get(part) != []:  # an earlier bare "exam" already selects all of it
+                    paths.setdefault(part, []).append(sub)
+            else:
+                paths[part] = []
+        return cls(allowed, paths)
+
+    @property
+    def selected(self) -> bool:
+        return self.paths is not None
+
+    def wants(self, part: str) -> bool:
+        return self.paths is None or part in self.paths
+
+    def fields(self, part: str = "") -> Optional[List[str]]:
+        """Paths to load for `part`: None for the whole document, [] when only its id is needed."""
+        if self.paths is None:
+            return None
+        if part not in self.paths:
+            return []
+        return _without_nested(self.paths[part] or (self.allowed[part] if part else []))
+
+    def projection(self, default: Dict[str, int], part: str = "", links: tuple = ()) -> Dict[str, int]:
+        """Mongo projection for `part`; `links` are fields needed to join or filter but not returned."""
+        fields = self.fields(part)
+        if fields is None:
+            return default
+        return {"_id": 0, "id": 1, **{field: 1 for field in _without_nested([*fields, *links])}}
+
+    def _keys(self, part: str) -> set:
+        keys = {"id", *(path.split(".")[0] for path in self.paths.get(part) or [])}
+        return keys | {join for join in self.paths if join} if part == "" else keys
+
+    def trim(self, doc: dict) -> dict:
+        """Only the selected keys of a result row (and of each selected joined object in it)."""
+        if self.paths is None:
+            return doc
+        row = {key: value for key, value in doc.items() if key in self._keys("")}
+        for join, paths in self.paths.items():
+            if join and paths and isinstance(row.get(join), dict):
+                keys = self._keys(join)
+                row[join] = {key: value for key, value in row[join].items() if key in keys}
+        return row
+
+def field_selection(allowed: Dict[str, set]):
+    """Dependency parsing `?fields=` against an endpoint's allow-list."""
+    def dependency(fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,title,room.roomNumber")) -> FieldSelection:
+        return FieldSelection.parse(fields, allowed)
+    return dependency
+
+# Allow-lists never include passwords or internal bookkeeping such as exam start/end datetimes
+USER_FIELDS = {"id", "collegeId", "email", "rollNumber", "role", "profile", *(f"profile.{field}" for field in UserProfile.model_fields)}
+EXAM_FIELDS = set(ExamSession.model_fields)
+ROOM_FIELDS = set(Room.model_fields)
+BLOCK_FIELDS = set(Block.model_fields)
+SEAT_FIELDS = set(Allocation.model_fields)
+STUDENT_FIELDS = {"id", "collegeId", "rollNumber", "name", "email", "year", "branch", "section", "attendancePercent", "dob"}
+
 def _ensure_future_or_today(date_str: str) -> None:
     """Raise HTTPException if date is in the past."""
     from datetime import date as _date
@@ -364,6 +804,1714 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except JWTError:
         raise HTTPException(status_code=401, detail="Could not validate credentials")
 
+async def get_token_claims(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+    """Verified JWT claims without the user lookup, for hot read paths scoped by the token itself."""
+    try:
+        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+    except ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token has expired")
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+    if payload.get("user_id") is None:
+        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+    return payload
+
+# ============ BACKGROUND JOBS ============
+#
+# Long-running admin operations (seat allocation, bulk import, attendance CSV
+# processing, exam deletion, exports) can run as jobs persisted in the `jobs`
+# collection instead of inside the HTTP request. Handlers are registered at the
+# bottom of this file with @job_runner.handler(...).
+
+JOB_CONCURRENCY_PER_COLLEGE = int(os.environ.get('JOB_CONCURRENCY_PER_COLLEGE', '2'))
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', '3'))
+JOB_HEARTBEAT_SECONDS = 15
+JOB_STALE_AFTER_SECONDS = 120
+JOB_TERMINAL_STATES = ("succeeded", "failed", "cancelled")
+# Files produced by jobs (exports) are written here; the job keeps only the path
+JOB_RESULTS_DIR = Path(os.environ.get("JOB_RESULTS_DIR", str(ROOT_DIR / "job_results")))
+JOB_PARAMS_LOST = "The worker holding this job's uploaded data stopped before running it; submit it again"
+
+class JobCancelled(Exception):
+    pass
+
+class JobOptions(BaseModel):
+    run_async: bool = False
+    idempotency_key: Optional[str] = None
+
+def get_job_options(
+    run_async: bool = Query(False, alias="async"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+) -> JobOptions:
+    return JobOptions(run_async=run_async, idempotency_key=idempotency_key)
+
+def _public_job(job: dict) -> dict:
+    """Job document as returned by the API (no payload, no result bytes)."""
+    hidden = {"_id", "params", "paramsFingerprint", "resultFile"}
+    return {k: v for k, v in job.items() if k not in hidden}
+
+def _params_fingerprint(params: dict) -> str:
+    """Digest of a job's params, so an Idempotency-Key reused for a different request is caught."""
+    encoded = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+class JobContext:
+    """Handed to job handlers for progress reporting and cooperative cancellation."""
+
+    def __init__(self, runner: "JobRunner", job: dict):
+        self._runner = runner
+        self.id = job["id"]
+        self.college_id = job["collegeId"]
+        self.params = job.get("params", {})
+        self.cancel_requested = bool(job.get("cancelRequested"))
+        self._last_flush = 0.0
+
+    def checkpoint(self) -> None:
+        if self.cancel_requested or self.id in self._runner._cancelled:
+            raise JobCancelled()
+
+    async def progress(self, done: int, total: Optional[int] = None, message: Optional[str] = None, force: bool = False) -> None:
+        # Persist at most once a second; the job document is polled, not streamed
+        now = asyncio.get_running_loop().time()
+        if not force and now - self._last_flush < 1.0:
+            return
+        self._last_flush = now
+        update = {"progress.done": done, "updatedAt": datetime.now(timezone.utc).isoformat()}
+        if total is not None:
+            update["progress.total"] = total
+        if message is not None:
+            update["progress.message"] = message
+        await db.jobs.update_one({"id": self.id}, {"$set": update})
+
+class JobRunner:
+    """In-process async job runner backed by the `jobs` collection.
+
+    Jobs survive restarts: queued jobs, and running jobs whose heartbeat went
+    stale, are picked up again by `resume()` at startup. Claiming is atomic, so
+    several workers can share the collection. The exception is a job with
+    transient params: those live only in the submitting worker's memory, so the
+    job fails if that worker stops (see `sweep_held`).
+    """
+
+    def __init__(self, per_college: int = JOB_CONCURRENCY_PER_COLLEGE):
+        self.per_college = per_college
+        self._handlers: Dict[str, tuple] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._cancelled: set = set()
+        self._held: Dict[str, dict] = {}  # job id -> its transient params, never written to the database
+        self._sweep: Optional[asyncio.Task] = None
+        self.worker_id = str(uuid.uuid4())
+        self.retry_base_delay = 1.0
+
+    def handler(self, job_type: str, transient_params: tuple = ()):
+        """Register a handler; `transient_params` (uploaded rows with passwords, CSV text) are held in
+        the submitting worker's memory only, so the job runs there and fails if that worker stops."""
+        def decorator(fn):
+            self._handlers[job_type] = (fn, transient_params)
+            return fn
+        return decorator
+
+    def _semaphore(self, college_id: str) -> asyncio.Semaphore:
+        if college_id not in self._semaphores:
+            self._semaphores[college_id] = asyncio.Semaphore(self.per_college)
+        return self._semaphores[college_id]
+
+    def _split_params(self, job_type: str, params: dict) -> tuple:
+        """(params to store, params to hold in memory)."""
+        held = {key: params[key] for key in self._handlers[job_type][1] if key in params}
+        return {key: value for key, value in params.items() if key not in held}, held
+
+    async def submit(self, job_type: str, user: dict, params: dict, idempotency_key: Optional[str] = None) -> dict:
+        if job_type not in self._handlers:
+            raise HTTPException(status_code=500, detail=f"Unknown job type: {job_type}")
+        stored, held = self._split_params(job_type, params)
+        fingerprint = _params_fingerprint(params) if idempotency_key else None
+        if idempotency_key:
+            existing = await db.jobs.find_one(
+                {"collegeId": user["collegeId"], "type": job_type, "idempotencyKey": idempotency_key}, {"_id": 0}
+            )
+            if existing:
+                return await self._resubmit(existing, params, fingerprint)
+        now = datetime.now(timezone.utc).isoformat()
+        job = {
+            "id": str(uuid.uuid4()),
+            "collegeId": user["collegeId"],
+            "type": job_type,
+            "status": "queued",
+            "params": stored,
+            "heldParams": sorted(held),
+            "idempotencyKey": idempotency_key,
+            "paramsFingerprint": fingerprint,
+            "progress": {"done": 0, "total": None, "message": None},
+            "result": None,
+            "error": None,
+            "attempts": 0,
+            "maxAttempts": JOB_MAX_ATTEMPTS,
+            "cancelRequested": False,
+            "createdBy": user["id"],
+            "createdAt": now,
+            "updatedAt": now,
+            "startedAt": None,
+            "finishedAt": None,
+            # A job holding params in memory belongs to this worker, which keeps its heartbeat fresh
+            "heartbeatAt": now if held else None,
+            "workerId": self.worker_id if held else None,
+        }
+        try:
+            await db.jobs.insert_one(dict(job))
+        except DuplicateKeyError:
+            # A concurrent submit with the same key inserted first; answer with its job
+            existing = await db.jobs.find_one(
+                {"collegeId": user["collegeId"], "type": job_type, "idempotencyKey": idempotency_key}, {"_id": 0}
+            )
+            return await self._resubmit(existing, params, fingerprint)
+        if held:
+            self._held[job["id"]] = held
+        self._spawn(job["id"], job["collegeId"])
+        return job
+
+    async def _resubmit(self, existing: dict, params: dict, fingerprint: str) -> dict:
+        # Jobs stored before fingerprints existed have none to compare against
+        if existing.get("paramsFingerprint", fingerprint) != fingerprint:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+        if existing["status"] == "failed":
+            # Retrying a failed job with the same key re-queues it in this worker with the retry's params:
+            # transient ones (uploaded rows, CSV text) were let go when it failed
+            stored, held = self._split_params(existing["type"], params)
+            now = datetime.now(timezone.utc).isoformat()
+            result = await db.jobs.update_one(
+                {"id": existing["id"], "status": "failed"},
+                {"$set": {
+                    "status": "queued", "attempts": 0, "error": None, "cancelRequested": False, "params": stored,
+                    "heldParams": sorted(held), "heartbeatAt": now if held else None, "workerId": self.worker_id if held else None,
+                }}
+            )
+            if result.modified_count:
+                existing.update(status="queued", params=stored)
+                if held:
+                    self._held[existing["id"]] = held
+                self._spawn(existing["id"], existing["collegeId"])
+        return existing
+
+    async def submit_response(self, job_type: str, user: dict, params: dict, options: JobOptions) -> JSONResponse:
+        job = await self.submit(job_type, user, params, options.idempotency_key)
+        return JSONResponse(
+            status_code=202,
+            content={"jobId": job["id"], "status": job["status"], "statusUrl": f"/api/jobs/{job['id']}"},
+            headers={"Location": f"/api/jobs/{job['id']}"}
+        )
+
+    def _spawn(self, job_id: str, college_id: str, delay: float = 0) -> None:
+        if job_id in self._tasks and not self._tasks[job_id].done():
+            return
+        task = asyncio.create_task(self._run(job_id, college_id, delay))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda done, _id=job_id: self._forget(_id, done))
+
+    def _forget(self, job_id: str, task: asyncio.Task) -> None:
+        if self._tasks.get(job_id) is task:
+            del self._tasks[job_id]
+
+    async def _heartbeat(self, ctx: JobContext) -> None:
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+            job = await db.jobs.find_one_and_update(
+                {"id": ctx.id},
+                {"$set": {"heartbeatAt": datetime.now(timezone.utc).isoformat()}},
+                {"_id": 0, "cancelRequested": 1}
+            )
+            if job and job.get("cancelRequested"):
+                ctx.cancel_requested = True
+
+    async def _finish(self, job_id: str, update: dict, transient: tuple) -> None:
+        self._held.pop(job_id, None)
+        now = datetime.now(timezone.utc).isoformat()
+        change = {"$set": {**update, "finishedAt": now, "updatedAt": now}}
+        if transient:
+            # Jobs submitted before transient params were kept out of the database
+            change["$unset"] = {f"params.{key}": "" for key in transient}
+        await db.jobs.update_one({"id": job_id}, change)
+
+    async def _run(self, job_id: str, college_id: str, delay: float = 0) -> None:
+        if delay:
+            await asyncio.sleep(delay)
+        async with self._semaphore(college_id):
+            now = datetime.now(timezone.utc).isoformat()
+            job = await db.jobs.find_one_and_update(
+                {"id": job_id, "status": "queued"},
+                {"$set": {"status": "running", "startedAt": now, "heartbeatAt": now, "updatedAt": now, "workerId": self.worker_id},
+                 "$inc": {"attempts": 1}},
+                {"_id": 0}
+            )
+            if not job:
+                return  # cancelled, or claimed by another worker
+            job["attempts"] = job.get("attempts", 0) + 1
+            fn, transient = self._handlers[job["type"]]
+            held = self._held.get(job_id, {})
+            if set(job.get("heldParams") or ()) - held.keys():
+                await self._finish(job_id, {"status": "failed", "error": JOB_PARAMS_LOST}, transient)
+                return
+            ctx = JobContext(self, {**job, "params": {**job.get("params", {}), **held}})
+            heartbeat = asyncio.create_task(self._heartbeat(ctx))
+            try:
+                ctx.checkpoint()
+                result = await fn(ctx)
+                file_result = None
+                if isinstance(result, dict) and isinstance(result.get("content"), bytes):
+                    file_result = result
+                    result = {"filename": result["filename"], "content_type": result["content_type"], "size": len(result["content"])}
+                update = {"status": "succeeded", "result": result, "progress.message": "Done"}
+                if file_result:
+                    path = Path(job["collegeId"]) / job_id
+                    await asyncio.to_thread((JOB_RESULTS_DIR / path.parent).mkdir, parents=True, exist_ok=True)
+                    await asyncio.to_thread(_write_file, JOB_RESULTS_DIR / path, file_result["content"])
+                    update["resultFile"] = {"path": str(path), "filename": file_result["filename"], "content_type": file_result["content_type"]}
+                await self._finish(job_id, update, transient)
+            except JobCancelled:
+                await self._finish(job_id, {"status": "cancelled"}, transient)
+            except HTTPException as e:
+                # Validation failures (404/400) will not succeed on retry
+                await self._finish(job_id, {"status": "failed", "error": e.detail}, transient)
+            except asyncio.CancelledError:
+                if job_id in self._held:
+                    # Its uploaded data goes away with this worker
+                    await self._finish(job_id, {"status": "failed", "error": JOB_PARAMS_LOST}, transient)
+                else:
+                    # Worker shutting down: hand the job back to the queue for the next start
+                    await db.jobs.update_one({"id": job_id, "status": "running"}, {"$set": {"status": "queued", "workerId": None}})
+                raise
+            except Exception as e:
+                logger.exception(f"Job {job_id} ({job['type']}) failed on attempt {job['attempts']}")
+                if job["attempts"] < job.get("maxAttempts", JOB_MAX_ATTEMPTS):
+                    await db.jobs.update_one(
+                        {"id": job_id, "status": "running"},
+                        {"$set": {"status": "queued", "error": str(e), "updatedAt": datetime.now(timezone.utc).isoformat()}}
+                    )
+                    self._spawn_after_release(job_id, college_id, self.retry_base_delay * 2 ** (job["attempts"] - 1))
+                else:
+                    await self._finish(job_id, {"status": "failed", "error": str(e)}, transient)
+            finally:
+                heartbeat.cancel()
+                self._cancelled.discard(job_id)
+
+    def _spawn_after_release(self, job_id: str, college_id: str, delay: float) -> None:
+        # The current task still owns _tasks[job_id]; schedule the retry once it exits
+        asyncio.get_running_loop().call_soon(lambda: self._spawn(job_id, college_id, delay))
+
+    async def cancel(self, job_id: str) -> Optional[dict]:
+        now = datetime.now(timezone.utc).isoformat()
+        # Queued jobs are cancelled immediately; running ones stop at their next checkpoint
+        await db.jobs.update_one(
+            {"id": job_id, "status": "queued"},
+            {"$set": {"status": "cancelled", "cancelRequested": True, "finishedAt": now, "updatedAt": now}}
+        )
+        job = await db.jobs.find_one_and_update(
+            {"id": job_id},
+            {"$set": {"cancelRequested": True, "updatedAt": now}},
+            {"_id": 0, "params": 0, "resultFile": 0},
+            return_document=True
+        )
+        if job and job["status"] == "running":
+            self._cancelled.add(job_id)
+        return job
+
+    async def resume(self) -> int:
+        """Re-queue jobs orphaned by a dead worker and start everything queued."""
+        self._semaphores = {}  # semaphores belong to the event loop that is starting up
+        await db.jobs.create_index("id", unique=True)
+        # Unique per key, so concurrent submits with one Idempotency-Key create a single job.
+        # Replaces the non-unique index of the same name created by earlier versions.
+        dedupe = "collegeId_1_type_1_idempotencyKey_1"
+        if dedupe in (indexes := await db.jobs.index_information()) and not indexes[dedupe].get("unique"):
+            await db.jobs.drop_index(dedupe)
+        await db.jobs.create_index(
+            [("collegeId", 1), ("type", 1), ("idempotencyKey", 1)],
+            name=dedupe, unique=True, partialFilterExpression={"idempotencyKey": {"$type": "string"}},
+        )
+        await db.jobs.create_index("status")
+        stale = (datetime.now(timezone.utc) - timedelta(seconds=JOB_STALE_AFTER_SECONDS)).isoformat()
+        # Jobs holding params in another worker's memory can't move here; sweep_held fails them once it's gone
+        portable = {"heldParams.0": {"$exists": False}}
+        await db.jobs.update_many(
+            {"status": "running", "heartbeatAt": {"$lt": stale}, **portable},
+            {"$set": {"status": "queued", "workerId": None}}
+        )
+        queued = await db.jobs.find({"status": "queued", **portable}, {"_id": 0, "id": 1, "collegeId": 1}).to_list(10000)
+        for job in queued:
+            self._spawn(job["id"], job["collegeId"])
+        await self.sweep_held()
+        if self._sweep is None or self._sweep.done():
+            self._sweep = asyncio.create_task(self._sweep_loop())
+        return len(queued)
+
+    async def sweep_held(self) -> int:
+        """Refresh the heartbeat of this worker's queued jobs that hold params in memory, and fail
+        such jobs of workers that stopped; returns how many were failed."""
+        now = datetime.now(timezone.utc)
+        if self._held:
+            await db.jobs.update_many(
+                {"id": {"$in": list(self._held)}, "status": "queued"}, {"$set": {"heartbeatAt": now.isoformat()}}
+            )
+        result = await db.jobs.update_many(
+            {
+                "status": {"$in": ["queued", "running"]}, "heldParams.0": {"$exists": True}, "id": {"$nin": list(self._held)},
+                "heartbeatAt": {"$lt": (now - timedelta(seconds=JOB_STALE_AFTER_SECONDS)).isoformat()},
+            },
+            {"$set": {"status": "failed", "error": JOB_PARAMS_LOST, "finishedAt": now.isoformat(), "updatedAt": now.isoformat()}},
+        )
+        return result.modified_count
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+            try:
+                await self.sweep_held()
+            except Exception as e:
+                logger.error(f"❌ Job sweep failed: {e}")
+
+    async def shutdown(self) -> None:
+        tasks = list(self._tasks.values()) + ([self._sweep] if self._sweep else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._sweep = None
+        if self._held:
+            # Queued jobs whose uploaded data only this worker had can't run anywhere else
+            now = datetime.now(timezone.utc).isoformat()
+            await db.jobs.update_many(
+                {"id": {"$in": list(self._held)}, "status": "queued"},
+                {"$set": {"status": "failed", "error": JOB_PARAMS_LOST, "finishedAt": now, "updatedAt": now}},
+            )
+            self._held = {}
+
+job_runner = JobRunner()
+
+# ============ IDEMPOTENCY ============
+
+# A mutating /api request that carries an Idempotency-Key header runs at most once per (user, key):
+#   {"key": sha256(user, key), "fingerprint": sha256(method, path, query, body), "status": "pending" | "done",
+#    "response": {"status", "headers", "body"}, "createdAt", "owner", "lockedUntil"}
+# lives in `idempotencyKeys` (TTL IDEMPOTENCY_TTL_HOURS) with recent responses cached in-process.
+# A duplicate that arrives while the first is still running waits for it: on a Future in the same
+# worker, by polling the record in another. The running request renews `lockedUntil` every few
+# seconds, so a pending claim is only taken over once its worker has stopped, never because the
+# request is slow. Reusing a key for a different request is a 422. Server
+# errors are not stored, so retrying after a 5xx runs the request again. `?async=true` requests
+# are skipped because the job runner already deduplicates them by the same header.
+
+IDEMPOTENCY_TTL_HOURS = _env_int("IDEMPOTENCY_TTL_HOURS", 24)
+IDEMPOTENCY_WAIT_SECONDS = _env_int("IDEMPOTENCY_WAIT_SECONDS", 120)
+IDEMPOTENCY_CACHE_SIZE = _env_int("IDEMPOTENCY_CACHE_SIZE", 1000)
+IDEMPOTENCY_LEASE_SECONDS = _env_int("IDEMPOTENCY_LEASE_SECONDS", 30)  # renewed every third of it
+IDEMPOTENCY_MAX_BYTES = 1 << 20  # larger responses are returned but not kept for replay
+IDEMPOTENT_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+class IdempotencyGuard:
+    def __init__(self, collection: str = "idempotencyKeys"):
+        self.collection = collection
+        self._cache: "OrderedDict[str, dict]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def setup(self) -> None:
+        await db[self.collection].create_index("key", unique=True)
+        await db[self.collection].create_index("createdAt", expireAfterSeconds=IDEMPOTENCY_TTL_HOURS * 3600)
+
+    def _remember(self, key: str, record: dict) -> None:
+        self._cache[key] = record
+        self._cache.move_to_end(key)
+        while len(self._cache) > IDEMPOTENCY_CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    def _response(stored: dict) -> Response:
+        response = Response(content=stored["body"], status_code=stored["status"])
+        response.raw_headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in stored["headers"]]
+        return response
+
+    def _replay(self, record: dict, fingerprint: str) -> Response:
+        if record["fingerprint"] != fingerprint:
+            return JSONResponse(status_code=422, content={"detail": "Idempotency-Key was already used for a different request"})
+        response = self._response(record["response"])
+        response.headers["Idempotent-Replayed"] = "true"
+        return response
+
+    async def _claim(self, key: str, fingerprint: str, owner: str) -> Optional[dict]:
+        """Insert our pending record; returns the existing record instead if another request owns the key."""
+        collection = db[self.collection]
+        for _ in range(2):
+            now = datetime.utcnow()
+            try:
+                await collection.insert_one({
+                    "key": key, "fingerprint": fingerprint, "status": "pending", "createdAt": now,
+                    "owner": owner, "lockedUntil": now + timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS),
+                })
+                return None
+            except DuplicateKeyError:
+                existing = await collection.find_one({"key": key}, {"_id": 0})
+            if existing and existing["status"] == "pending" and existing["lockedUntil"] < now:
+                # The worker that claimed it stopped renewing it, so it died mid-request; take the key over
+                await collection.delete_one({"key": key, "lockedUntil": existing["lockedUntil"]})
+                continue
+            if existing:
+                return existing
+        return await collection.find_one({"key": key}, {"_id": 0})
+
+    async def _keep_claimed(self, key: str, owner: str) -> None:
+        while True:
+            await asyncio.sleep(IDEMPOTENCY_LEASE_SECONDS / 3)
+            await db[self.collection].update_one(
+                {"key": key, "owner": owner, "status": "pending"},
+                {"$set": {"lockedUntil": datetime.utcnow() + timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS)}},
+            )
+
+    async def _wait_for_other_worker(self, key: str) -> Optional[dict]:
+        deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+        delay = 0.05
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            record = await db[self.collection].find_one({"key": key}, {"_id": 0})
+            if record is None or record["status"] == "done":
+                return record
+            delay = min(delay * 2, 1.0)
+        return None
+
+    async def run(self, key: str, fingerprint: str, execute) -> Response:
+        cached = self._cache.get(key)
+        if cached:
+            self._cache.move_to_end(key)
+            return self._replay(cached, fingerprint)
+        inflight = self._inflight.get(key)
+        if inflight:
+            return self._replay(await asyncio.shield(inflight), fingerprint)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            owner = str(uuid.uuid4())
+            existing = await self._claim(key, fingerprint, owner)
+            if existing and existing["status"] == "pending":
+                existing = await self._wait_for_other_worker(key)
+                if existing is None:
+                    raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+            if existing:
+                self._remember(key, existing)
+                future.set_result(existing)
+                return self._replay(existing, fingerprint)
+
+            renewal = asyncio.create_task(self._keep_claimed(key, owner))
+            try:
+                response = await execute()
+                body = b"".join([chunk async for chunk in response.body_iterator])
+            except BaseException:
+                await db[self.collection].delete_one({"key": key, "status": "pending"})
+                raise
+            finally:
+                renewal.cancel()
+            record = {
+                "fingerprint": fingerprint, "status": "done",
+                "response": {
+                    "status": response.status_code, "body": body,
+                    "headers": [(k.decode("latin-1"), v.decode("latin-1")) for k, v in response.raw_headers],
+                },
+            }
+            if response.status_code < 500 and len(body) <= IDEMPOTENCY_MAX_BYTES:
+                await db[self.collection].update_one({"key": key}, {"$set": record})
+                self._remember(key, record)
+            else:
+                await db[self.collection].delete_one({"key": key, "status": "pending"})
+            future.set_result(record)
+            return self._response(record["response"])
+        except BaseException as error:
+            if not future.done():
+                future.set_exception(error)
+                future.exception()  # waiters re-raise it; don't log it as never retrieved
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+idempotency = IdempotencyGuard()
+
+async def idempotency_middleware(request: Request, call_next):
+    key = request.headers.get("Idempotency-Key")
+    if (
+        not key or request.method not in IDEMPOTENT_METHODS or not request.url.path.startswith("/api/")
+        or request.query_params.get("async", "").lower() in ("1", "true")
+    ):
+        return await call_next(request)
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    try:
+        user_id = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("user_id") if scheme.lower() == "bearer" else None
+    except JWTError:
+        user_id = None
+    if not user_id:
+        return await call_next(request)  # the route rejects it; nothing to deduplicate
+
+    body = await request.body()
+    scope = hashlib.sha256(f"{user_id}\0{key}".encode()).hexdigest()
+    fingerprint = hashlib.sha256(b"\0".join([
+        request.method.encode(), request.url.path.encode(), request.url.query.encode(), body,
+    ])).hexdigest()
+    try:
+        return await idempotency.run(scope, fingerprint, lambda: call_next(request))
+    except HTTPException as error:
+        return JSONResponse(status_code=error.status_code, content={"detail": error.detail})
+
+# ============ CACHE INVALIDATION ============
+
+# In-process caches subscribe to a collection and are told which keys changed in it, by this
+# worker or any other. Where changes come from depends on CACHE_BUS:
+#   changestream  a change stream on the subscribed collections (needs a replica set, e.g. Atlas)
+#   poll          every publish bumps a per-collection version counter in `cacheVersions` and
+#                 appends its keys to a short log there; workers poll the counters
+#   local         only caches in this process (tests, or a single worker)
+#   auto          (default) changestream if the server supports it, else poll
+# Local subscribers always hear of this worker's own writes immediately. A change whose keys are
+# unknown (a delete seen by a change stream, or a gap in the poll log) clears the whole cache.
+
+CACHE_BUS = os.environ.get("CACHE_BUS", "auto").strip().lower()
+CACHE_BUS_POLL_SECONDS = float(os.environ.get("CACHE_BUS_POLL_SECONDS", "1"))
+CACHE_BUS_LOG = 200  # poll log entries kept per collection
+CACHE_BUS_MAX_KEYS = 1000  # a larger publish is broadcast as "clear everything"
+
+class InvalidationBus:
+    _local_hub: "weakref.WeakSet[InvalidationBus]" = weakref.WeakSet()  # every bus in this process
+
+    def __init__(self, mode: str = CACHE_BUS):
+        self.mode = mode
+        self.worker_id = str(uuid.uuid4())
+        self._subscribers: Dict[str, List[tuple]] = {}
+        self._versions: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._pending: set = set()
+        self.events = self.keys_invalidated = 0
+        self.lag_ms_total = self.lag_ms_max = 0.0
+        InvalidationBus._local_hub.add(self)
+
+    def subscribe(self, collection: str, key_field: str, callback) -> None:
+        """`callback(keys)` gets the changed `key_field` values, or None when everything may have changed."""
+        self._subscribers.setdefault(collection, []).append((key_field, callback))
+
+    def deliver(self, collection: str, keys: Optional[List[str]], sent_at: Optional[float] = None) -> None:
+        for _, callback in self._subscribers.get(collection, []):
+            callback(keys)
+        self._count(len(keys) if keys is not None else 0, sent_at)
+
+    def _count(self, keys: int, sent_at: Optional[float]) -> None:
+        self.events += 1
+        self.keys_invalidated += keys
+        if sent_at is not None:
+            lag = max(0.0, (time.time() - sent_at) * 1000)
+            self.lag_ms_total += lag
+            self.lag_ms_max = max(self.lag_ms_max, lag)
+
+    def publish(self, collection: str, keys=None) -> None:
+        """Invalidate `keys` (None: everything) of `collection` here and, depending on the mode, elsewhere."""
+        keys = None if keys is None else list(keys)
+        for _, callback in self._subscribers.get(collection, []):
+            callback(keys)
+        if keys is not None and len(keys) > CACHE_BUS_MAX_KEYS:
+            keys = None
+        if self.mode == "local":
+            for bus in InvalidationBus._local_hub:
+                if bus is not self:
+                    bus.deliver(collection, keys, time.time())
+        elif self.mode == "poll":
+            task = asyncio.get_running_loop().create_task(self._record(collection, keys))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    async def _record(self, collection: str, keys: Optional[List[str]]) -> None:
+        try:
+            await db.cacheVersions.update_one(
+                {"_id": collection},
+                {
+                    "$inc": {"version": 1},
+                    "$push": {"recent": {"$each": [{"keys": keys, "at": time.time(), "worker": self.worker_id}], "$slice": -CACHE_BUS_LOG}},
+                },
+                upsert=True,
+            )
+        except Exception as e:
+            logger.error(f"❌ Could not publish a cache invalidation for {collection}: {e}")
+
+    async def poll_once(self) -> None:
+        # Versions alone are tiny; the log is only read for collections that moved, and only its new tail
+        versions = {
+            doc["_id"]: doc.get("version", 0)
+            for doc in await db.cacheVersions.find({"_id": {"$in": list(self._subscribers)}}, {"version": 1}).to_list(None)
+        }
+        for collection in self._subscribers:
+            version = versions.get(collection, 0)
+            seen = self._versions.get(collection)
+            self._versions[collection] = version
+            if seen is None or version <= seen:
+                continue  # first sight is the baseline: nothing is cached from before it
+            if version - seen > CACHE_BUS_LOG:
+                self.deliver(collection, None)  # the log moved past us; we can't tell what changed
+                continue
+            doc = await db.cacheVersions.find_one({"_id": collection}, {"version": 1, "recent": {"$slice": -(version - seen)}})
+            # Writes landing between the two reads push older entries out of the slice
+            version = self._versions[collection] = doc.get("version", version)
+            recent = doc.get("recent", [])
+            if version - seen > len(recent):
+                self.deliver(collection, None)
+                continue
+            for entry in recent[len(recent) - (version - seen):]:
+                if entry.get("worker") != self.worker_id:
+                    self.deliver(collection, entry.get("keys"), entry.get("at"))
+
+    async def _poll(self) -> None:
+        while True:
+            try:
+                await self.poll_once()
+            except Exception as e:
+                logger.error(f"❌ Cache invalidation poll failed: {e}")
+            await asyncio.sleep(CACHE_BUS_POLL_SECONDS)
+
+    def _change_pipeline(self) -> List[dict]:
+        fields = {f"fullDocument.{field}": 1 for subs in self._subscribers.values() for field, _ in subs}
+        return [
+            {"$match": {"ns.coll": {"$in": list(self._subscribers)}, "operationType": {"$in": ["insert", "update", "replace", "delete"]}}},
+            {"$project": {"ns": 1, "operationType": 1, "clusterTime": 1, "wallTime": 1, **fields}},
+        ]
+
+    def on_change(self, change: dict) -> None:
+        collection = change["ns"]["coll"]
+        document = change.get("fullDocument") or {}
+        if "wallTime" in change:
+            sent_at = change["wallTime"].replace(tzinfo=timezone.utc).timestamp()
+        elif "clusterTime" in change:
+            sent_at = float(change["clusterTime"].time)
+        else:
+            sent_at = None
+        for field, callback in self._subscribers.get(collection, []):
+            callback([document[field]] if field in document else None)  # deletes carry no document
+        self._count(1, sent_at)
+
+    async def _watch(self, stream) -> None:
+        delay = 1.0
+        while True:
+            try:
+                async with stream:
+                    async for change in stream:
+                        self.on_change(change)
+                        delay = 1.0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Change stream closed, reopening in {delay:.0f}s: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+            # Changes made while we were away are lost; start from an empty cache
+            for collection in self._subscribers:
+                self.deliver(collection, None)
+            stream = db.watch(self._change_pipeline(), full_document="updateLookup")
+
+    async def start(self) -> None:
+        if self.mode == "local" or self._task or not self._subscribers:
+            return
+        if self.mode in ("auto", "changestream"):
+            try:
+                stream = db.watch(self._change_pipeline(), full_document="updateLookup")
+                await stream.try_next()  # fails here on servers without change streams
+                self.mode = "changestream"
+                self._task = asyncio.create_task(self._watch(stream))
+                return
+            except Exception as e:
+                if self.mode == "changestream":
+                    raise
+                logger.info(f"Change streams unavailable ({e}); polling cache versions instead")
+                self.mode = "poll"
+        await self.poll_once()
+        self._task = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "collections": sorted(self._subscribers),
+            "events": self.events,
+            "keysInvalidated": self.keys_invalidated,
+            "lagMsAvg": round(self.lag_ms_total / self.events, 1) if self.events else 0.0,
+            "lagMsMax": round(self.lag_ms_max, 1),
+        }
+
+cache_bus = InvalidationBus()
+
+# ============ STUDENT EXAM CARDS ============
+
+# One `studentExamCards` document per student holds everything the student dashboard shows:
+#   {"studentId", "examIds": [...], "exams": {examId: {seat fields, "exam", "room", "block"}}, "updatedAt"}
+# Cards are written when seats are committed and patched when an exam, room or seat changes, so
+# the student view is one indexed read (plus a short in-process cache).
+
+STUDENT_CARD_CACHE_SECONDS = float(os.environ.get("STUDENT_CARD_CACHE_SECONDS", "30"))
+STUDENT_CARD_CACHE_SIZE = int(os.environ.get("STUDENT_CARD_CACHE_SIZE", "50000"))
+_card_cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+def _drop_cards(student_ids: Optional[List[str]]) -> None:
+    if student_ids is None:
+        _card_cache.clear()
+        return
+    for student_id in student_ids:
+        _card_cache.pop(student_id, None)
+
+cache_bus.subscribe("studentExamCards", "studentId", _drop_cards)
+
+def _invalidate_cards(student_ids=None) -> None:
+    """Forget cached cards after a write, in this worker and (through the bus) every other."""
+    cache_bus.publish("studentExamCards", student_ids)
+
+def _card_exam(exam: dict) -> dict:
+    return {key: exam.get(key) for key in ("id", "title", "date", "startTime", "endTime", "subjects")}
+
+def _card_entry(exam: dict, seat_id: str, seat: dict, room: Optional[dict], block: Optional[dict]) -> dict:
+    return {
+        "id": seat_id,
+        "examSessionId": exam["id"],
+        "studentId": seat["s"],
+        "roomId": room["id"] if room else None,
+        "benchNumber": seat["b"],
+        "seatPosition": seat["p"],
+        "exam": _card_exam(exam),
+        "room": {"id": room["id"], "roomNumber": room.get("roomNumber"), "blockId": room.get("blockId")} if room else None,
+        "block": {"id": block["id"], "name": block.get("name")} if block else None,
+    }
+
+def _card_upsert(entry: dict) -> UpdateOne:
+    exam_id = entry["examSessionId"]
+    return UpdateOne(
+        {"studentId": entry["studentId"]},
+        {
+            "$set": {f"exams.{exam_id}": entry, "updatedAt": datetime.now(timezone.utc).isoformat()},
+            "$addToSet": {"examIds": exam_id},
+        },
+        upsert=True,
+    )
+
+async def write_exam_cards(entries: List[dict]) -> None:
+    if entries:
+        await db.studentExamCards.bulk_write([_card_upsert(entry) for entry in entries], ordered=False)
+        _invalidate_cards(entry["studentId"] for entry in entries)
+
+async def detach_exam_cards(exam_ids: List[str], student_ids: Optional[List[str]] = None) -> None:
+    """Drop the given exams from students' cards (every student, or just `student_ids`)."""
+    query: Dict[str, Any] = {"examIds": {"$in": exam_ids}}
+    if student_ids is not None:
+        query["studentId"] = {"$in": student_ids}
+    await db.studentExamCards.update_many(query, {
+        "$unset": {f"exams.{exam_id}": "" for exam_id in exam_ids},
+        "$pull": {"examIds": {"$in": exam_ids}},
+    })
+    _invalidate_cards(student_ids)
+
+async def update_exam_cards(exam: dict) -> None:
+    await db.studentExamCards.update_many(
+        {"examIds": exam["id"]}, {"$set": {f"exams.{exam['id']}.exam": _card_exam(exam)}}
+    )
+    _invalidate_cards()
+
+async def refresh_exam_cards(student_ids: List[str]) -> None:
+    """Rebuild cards from roomSeatings; for changes that cut across exams (room edits and deletes)."""
+    student_ids = [student_id for student_id in dict.fromkeys(student_ids) if student_id]  # not vacated seats
+    if not student_ids:
+        return
+    wanted = set(student_ids)
+    buckets = await db.roomSeatings.aggregate([
+        {"$match": {"seats.s": {"$in": student_ids}}},
+        {"$lookup": {"from": "examSessions", "localField": "examSessionId", "foreignField": "id", "as": "exam"}},
+        {"$lookup": {"from": "rooms", "localField": "roomId", "foreignField": "id", "as": "room"}},
+        {"$unwind": {"path": "$room", "preserveNullAndEmptyArrays": True}},
+        {"$lookup": {"from": "blocks", "localField": "room.blockId", "foreignField": "id", "as": "block"}},
+        {"$project": {"_id": 0}},
+    ]).to_list(None)
+    cards: Dict[str, dict] = {student_id: {} for student_id in student_ids}
+    for bucket in buckets:
+        exam = (bucket.get("exam") or [None])[0]
+        if not exam or exam.get("deletedAt"):
+            continue
+        block = (bucket.get("block") or [None])[0]
+        for index, seat in enumerate(bucket["seats"]):
+            if seat["s"] in wanted:
+                cards[seat["s"]][exam["id"]] = _card_entry(exam, f"{bucket['id']}:{index}", seat, bucket.get("room"), block)
+    now = datetime.now(timezone.utc).isoformat()
+    await db.studentExamCards.bulk_write([
+        ReplaceOne(
+            {"studentId": student_id},
+            {"studentId": student_id, "examIds": list(exams), "exams": exams, "updatedAt": now},
+            upsert=True,
+        )
+        for student_id, exams in cards.items()
+    ], ordered=False)
+    _invalidate_cards(student_ids)
+
+async def rebuild_all_exam_cards(batch: int = 1000) -> int:
+    """Backfill cards for every seated student, e.g. after upgrading an existing database."""
+    student_ids = await db.roomSeatings.distinct("seats.s")
+    for start in range(0, len(student_ids), batch):
+        await refresh_exam_cards(student_ids[start:start + batch])
+    return len(student_ids)
+
+async def get_student_card(student_id: str) -> List[dict]:
+    """Upcoming seats for a student, soonest first."""
+    now = time.monotonic()
+    cached = _card_cache.get(student_id)
+    if cached and cached[0] > now:
+        _card_cache.move_to_end(student_id)
+        return cached[1]
+    card = await read_db.studentExamCards.find_one({"studentId": student_id}, {"_id": 0, "exams": 1})
+    today = datetime.now(timezone.utc).date().isoformat()
+    seats = sorted(
+        ({**entry, "checkinToken": checkin_token(entry)}
+         for entry in (card or {}).get("exams", {}).values() if (entry["exam"].get("date") or "") >= today),
+        key=lambda entry: (entry["exam"].get("date") or "", entry["exam"].get("startTime") or ""),
+    )
+    _card_cache[student_id] = (now + STUDENT_CARD_CACHE_SECONDS, seats)
+    _card_cache.move_to_end(student_id)
+    while len(_card_cache) > STUDENT_CARD_CACHE_SIZE:
+        _card_cache.popitem(last=False)
+    return seats
+
+# ============ EXAM CLASHES ============
+
+# A cohort is one (year, branch) pair. An exam books every cohort in years x branches for its
+# start..end window; two exams clash when they share a cohort and their windows overlap.
+
+def exam_cohorts(exam: dict) -> set:
+    return {(int(year), branch) for year in exam.get("years") or [] for branch in exam.get("branches") or []}
+
+class CohortIndex:
+    """Booked (start, end, examId) intervals per cohort, sorted by start.
+
+    No booking is longer than `longest`, so an overlap lookup bisects to the first interval that
+    starts after the window and walks back at most that far: O(log n + k) per cohort.
+    `keys` picks what an exam books; pass e.g. its room ids to index rooms instead of cohorts.
+    """
+
+    def __init__(self, exams: List[dict], keys=exam_cohorts):
+        self.exams: Dict[str, dict] = {}
+        self._keys = keys
+        self._intervals: Dict[Any, List[tuple]] = {}
+        self._longest = timedelta(0)
+        for exam in exams:
+            start, end = exam_window(exam)
+            self.exams[exam["id"]] = exam
+            self._longest = max(self._longest, end - start)
+            for cohort in keys(exam):
+                self._intervals.setdefault(cohort, []).append((start, end, exam["id"]))
+        for intervals in self._intervals.values():
+            intervals.sort()
+
+    def overlapping(self, cohort: tuple, start: datetime, end: datetime) -> List[str]:
+        intervals = self._intervals.get(cohort, [])
+        i = bisect.bisect_left(intervals, (end,))
+        found = []
+        while i > 0:
+            i -= 1
+            other_start, other_end, exam_id = intervals[i]
+            if other_start + self._longest <= start:
+                break
+            if other_end > start:
+                found.append(exam_id)
+        return found
+
+    def clashes(self, exam: dict) -> Dict[str, List[tuple]]:
+        """Exam id -> the cohorts it shares with `exam` during an overlapping window."""
+        start, end = exam_window(exam)
+        found: Dict[str, List[tuple]] = {}
+        for cohort in sorted(self._keys(exam)):
+            for other_id in self.overlapping(cohort, start, end):
+                if other_id != exam.get("id"):
+                    found.setdefault(other_id, []).append(cohort)
+        return found
+
+async def load_cohort_index(college_id: str, start: datetime, end: datetime) -> CohortIndex:
+    """Index the college's exams that can overlap [start, end); one (collegeId, start) range scan."""
+    exams = await db.examSessions.find(
+        {"collegeId": college_id, "start": {"$gte": start - MAX_EXAM_DURATION, "$lt": end}, "deletedAt": None},
+        {"_id": 0, "id": 1, "title": 1, "date": 1, "startTime": 1, "endTime": 1, "start": 1, "end": 1, "years": 1, "branches": 1},
+    ).to_list(None)
+    return CohortIndex(exams)
+
+def _clash_summary(other: dict, cohorts: List[tuple]) -> dict:
+    return {
+        "examId": other["id"],
+        "title": other.get("title"),
+        "date": other.get("date"),
+        "startTime": other.get("startTime"),
+        "endTime": other.get("endTime"),
+        "cohorts": [{"year": year, "branch": branch} for year, branch in cohorts],
+    }
+
+async def find_clashes(exam: dict, include_students: bool = False) -> List[dict]:
+    """Scheduled exams sharing a cohort with `exam` at an overlapping time, with the affected students."""
+    index = await load_cohort_index(exam["collegeId"], *exam_window(exam))
+    clashing = index.clashes(exam)
+    if not clashing:
+        return []
+    cohorts = {cohort for shared in clashing.values() for cohort in shared}
+    group: Dict[str, Any] = {"_id": {"year": "$profile.year", "branch": "$profile.branch"}, "count": {"$sum": 1}}
+    if include_students:
+        group["studentIds"] = {"$push": "$id"}
+    # One grouped pass over the students of every clashing cohort
+    rows = await db.users.aggregate([
+        {"$match": {
+            "collegeId": exam["collegeId"], "role": "student",
+            "profile.year": {"$in": sorted({year for year, _ in cohorts})},
+            "profile.branch": {"$in": sorted({branch for _, branch in cohorts})},
+        }},
+        {"$group": group},
+    ]).to_list(None)
+    members = {(row["_id"]["year"], row["_id"]["branch"]): row for row in rows}
+    result = []
+    for other_id, shared in clashing.items():
+        summary = _clash_summary(index.exams[other_id], shared)
+        summary["studentCount"] = sum(members.get(cohort, {}).get("count", 0) for cohort in shared)
+        if include_students:
+            summary["studentIds"] = [sid for cohort in shared for sid in members.get(cohort, {}).get("studentIds", [])]
+        result.append(summary)
+    return sorted(result, key=lambda clash: (clash["date"] or "", clash["startTime"] or ""))
+
+async def seat_clashes(exam: dict, student_ids: List[str]) -> List[dict]:
+    """Students in `student_ids` who already hold a seat in an overlapping exam."""
+    try:
+        window = exam_window(exam)
+    except (KeyError, TypeError, ValueError):
+        return []  # a legacy exam without usable times can't be placed on the timeline
+    index = await load_cohort_index(exam["collegeId"], *window)
+    clashing = index.clashes(exam)
+    if not clashing or not student_ids:
+        return []
+    seated = await db.roomSeatings.aggregate([
+        {"$match": {"examSessionId": {"$in": list(clashing)}}},
+        {"$unwind": "$seats"},
+        {"$group": {"_id": "$examSessionId", "students": {"$addToSet": "$seats.s"}}},
+    ]).to_list(None)
+    wanted = set(student_ids)
+    result = []
+    for row in seated:
+        double_booked = sorted(wanted.intersection(row["students"]))
+        if double_booked:
+            summary = _clash_summary(index.exams[row["_id"]], clashing[row["_id"]])
+            result.append({**summary, "studentCount": len(double_booked), "studentIds": double_booked})
+    return result
+
+# ============ CASCADE DELETE ============
+
+# Every collection that references a parent, declared once: (collection, field holding the parent id).
+# "children" are parents in their own right, so their dependents are removed too.
+# allocations/examStudents are the pre-roomSeatings seat format, kept here for unmigrated data.
+CASCADE_RELATIONS: Dict[str, dict] = {
+    "exam": {
+        "collection": "examSessions",
+        "dependents": [
+            ("roomSeatings", "examSessionId"),
+            ("allocations", "examSessionId"),
+            ("examStudents", "examSessionId"),
+            ("examRooms", "examSessionId"),
+            ("examInvigilators", "examSessionId"),
+            ("invigilatorDuties", "examSessionId"),
+            ("incidents", "examSessionId"),
+            ("examAttendanceRestrictions", "examId"),
+            ("calendarEvents", "examId"),
+            ("notifications", "examId"),
+        ],
+    },
+    "room": {
+        "collection": "rooms",
+        "dependents": [
+            ("roomSeatings", "roomId"),
+            ("allocations", "roomId"),
+            ("examStudents", "roomId"),
+            ("examRooms", "roomId"),
+            ("examInvigilators", "roomId"),
+            ("invigilatorDuties", "roomId"),
+        ],
+    },
+    "block": {
+        "collection": "blocks",
+        "dependents": [],
+        "children": [("room", "blockId")],
+    },
+}
+
+CASCADE_PURGE_BATCH = int(os.environ.get("CASCADE_PURGE_BATCH", "5000"))
+
+async def _cascade_targets(kind: str, ids: List[str]) -> List[tuple]:
+    """(collection, filter) for everything that must go when `ids` of `kind` are deleted."""
+    spec = CASCADE_RELATIONS[kind]
+    targets = [(collection, {field: {"$in": ids}}) for collection, field in spec["dependents"]]
+    for child_kind, field in spec.get("children", []):
+        child_collection = CASCADE_RELATIONS[child_kind]["collection"]
+        child_ids = await db[child_collection].distinct("id", {field: {"$in": ids}})
+        if child_ids:
+            targets += await _cascade_targets(child_kind, child_ids)
+            targets.append((child_collection, {"id": {"$in": child_ids}}))
+    return targets
+
+async def tombstone(kind: str, ids: List[str]) -> None:
+    """Hide the parents from reads; their data is removed by `cascade_delete` or `purge_tombstoned`."""
+    await db[CASCADE_RELATIONS[kind]["collection"]].update_many(
+        {"id": {"$in": ids}}, {"$set": {"deletedAt": datetime.now(timezone.utc).isoformat()}}
+    )
+
+async def cascade_delete(kind: str, ids: List[str]) -> Dict[str, int]:
+    # Motor sessions can't be shared by concurrent operations, so instead of a transaction the
+    # tombstone is the commit point: once it is written readers skip the parent, the independent
+    # deletes run concurrently, and the parent goes last so a failed cascade can simply be re-run.
+    await tombstone(kind, ids)
+    targets = await _cascade_targets(kind, ids)
+    # Exam cards are derived data: drop a deleted exam outright, rebuild cards that lose a room
+    if kind == "exam":
+        await detach_exam_cards(ids)
+        displaced = []
+    else:
+        displaced = [
+            student_id for collection, query in targets if collection == "roomSeatings"
+            for student_id in await db.roomSeatings.distinct("seats.s", query)
+        ]
+    results = await asyncio.gather(*(db[collection].delete_many(query) for collection, query in targets))
+    deleted: Dict[str, int] = {}
+    for (collection, _), result in zip(targets, results):
+        deleted[collection] = deleted.get(collection, 0) + result.deleted_count
+    collection = CASCADE_RELATIONS[kind]["collection"]
+    deleted[collection] = (await db[collection].delete_many({"id": {"$in": ids}})).deleted_count
+    await refresh_exam_cards(displaced)
+    return deleted
+
+async def purge_tombstoned(kind: str, ids: List[str], job: Optional[JobContext] = None) -> Dict[str, int]:
+    """Delete a tombstoned parent's data in small batches so no single command holds the DB for long."""
+    targets = await _cascade_targets(kind, ids)
+    targets.append((CASCADE_RELATIONS[kind]["collection"], {"id": {"$in": ids}}))
+    return await _purge_in_batches(targets, job)
+
+async def _purge_in_batches(targets: List[tuple], job: Optional[JobContext] = None) -> Dict[str, int]:
+    deleted: Dict[str, int] = {}
+    done = 0
+    for collection, query in targets:
+        while True:
+            if job:
+                job.checkpoint()
+            batch = await db[collection].find(query, {"_id": 1}).limit(CASCADE_PURGE_BATCH).to_list(CASCADE_PURGE_BATCH)
+            if not batch:
+                break
+            result = await db[collection].delete_many({"_id": {"$in": [d["_id"] for d in batch]}})
+            deleted[collection] = deleted.get(collection, 0) + result.deleted_count
+            done += result.deleted_count
+            if job:
+                await job.progress(done, message=f"Purging {collection}")
+    return deleted
+
+# ============ ARCHIVAL ============
+
+# Completed exams are moved out of the hot collections some time after they end. Everything that
+# hangs off the exam (CASCADE_RELATIONS, minus the calendar entry) is streamed into one compressed
+# NDJSON file per exam, one {"c": collection, "d": document} object per line, in Extended JSON so
+# datetimes survive the round trip. The exam document stays behind as the summary:
+#   {"status": "archived", "archive": {"file", "format", "bytes", "sha256", "counts", "attendance", "archivedAt", "purged"}}
+# The hot copies are only deleted after the summary is written, and `purged` records that they were.
+
+ARCHIVE_DIR = Path(os.environ.get("ARCHIVE_DIR", str(ROOT_DIR / "archive")))
+ARCHIVE_AFTER_DAYS = float(os.environ.get("ARCHIVE_AFTER_DAYS", "30"))
+ARCHIVE_INTERVAL_HOURS = float(os.environ.get("ARCHIVE_INTERVAL_HOURS", "24"))
+ARCHIVE_BATCH = int(os.environ.get("ARCHIVE_BATCH", "1000"))
+ARCHIVE_LEASE_SECONDS = _env_int("ARCHIVE_LEASE_SECONDS", 300)  # renewed every third of it while archiving
+ARCHIVE_FORMATS = {"zstd": ".ndjson.zst", "gzip": ".ndjson.gz"}
+ARCHIVE_COLLECTIONS = [
+    (collection, field) for collection, field in CASCADE_RELATIONS["exam"]["dependents"] if collection != "calendarEvents"
+]
+
+def _archive_format() -> str:
+    wanted = os.environ.get("ARCHIVE_COMPRESSION", "zstd")
+    if wanted == "zstd" and not _available_compressors("zstd"):
+        return "gzip"  # zstandard is optional
+    return wanted if wanted in ARCHIVE_FORMATS else "gzip"
+
+def _open_archive(path: Path, fmt: str, mode: str):
+    if fmt == "zstd":
+        import zstandard
+        raw = open(path, mode)
+        if mode == "wb":
+            return zstandard.ZstdCompressor(level=10).stream_writer(raw, closefd=True)
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw, closefd=True))
+    return gzip.open(path, mode, compresslevel=6) if mode == "wb" else gzip.open(path, mode)
+
+def _archive_path(exam: dict, fmt: str) -> Path:
+    return ARCHIVE_DIR / exam["collegeId"] / f"{exam['id']}{ARCHIVE_FORMATS[fmt]}"
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+async def complete_finished_exams(college_id: Optional[str] = None) -> int:
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    query: Dict[str, Any] = {"status": "scheduled", "end": {"$lte": now}, "deletedAt": None}
+    if college_id:
+        query["collegeId"] = college_id
+    result = await db.examSessions.update_many(query, {"$set": {"status": "completed", "updatedAt": datetime.now(timezone.utc).isoformat()}})
+    return result.modified_count
+
+async def archive_exam(exam: dict, job: Optional[JobContext] = None) -> dict:
+    """Write the exam's data to its archive file and record the summary; the caller purges."""
+    fmt = _archive_format()
+    path = _archive_path(exam, fmt)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + ".partial")
+    counts: Dict[str, int] = {}
+    attendance: Dict[str, int] = {}
+    writer = await asyncio.to_thread(_open_archive, partial, fmt, "wb")
+    try:
+        exam_doc = await db.examSessions.find_one({"id": exam["id"]}, {"_id": 0})
+        await asyncio.to_thread(writer.write, (json_util.dumps({"c": "examSessions", "d": exam_doc}) + "\n").encode())
+        for collection, field in ARCHIVE_COLLECTIONS:
+            cursor = db[collection].find({field: exam["id"]}, {"_id": 0}).batch_size(ARCHIVE_BATCH)
+            lines = []
+            async for doc in cursor:
+                counts[collection] = counts.get(collection, 0) + 1
+                if collection == "roomSeatings":
+                    for seat in doc.get("seats", []):
+                        attendance[seat.get("a") or "pending"] = attendance.get(seat.get("a") or "pending", 0) + 1
+                lines.append(json_util.dumps({"c": collection, "d": doc}))
+                if len(lines) >= ARCHIVE_BATCH:
+                    await asyncio.to_thread(writer.write, ("\n".join(lines) + "\n").encode())
+                    lines = []
+                    if job:
+                        job.checkpoint()
+            if lines:
+                await asyncio.to_thread(writer.write, ("\n".join(lines) + "\n").encode())
+    finally:
+        await asyncio.to_thread(writer.close)
+    await asyncio.to_thread(os.replace, partial, path)
+    summary = {
+        "file": str(path.relative_to(ARCHIVE_DIR)),
+        "format": fmt,
+        "bytes": path.stat().st_size,
+        "sha256": await asyncio.to_thread(_file_digest, path),
+        "counts": counts,
+        "attendance": attendance,
+        "archivedAt": datetime.now(timezone.utc).isoformat(),
+        "purged": False,
+    }
+    await db.examSessions.update_one(
+        {"id": exam["id"]},
+        {"$set": {"status": "archived", "archive": summary}, "$unset": {"archivingAt": "", "archivingBy": ""}},
+    )
+    return summary
+
+async def _purge_archived(exam_id: str, job: Optional[JobContext] = None) -> Dict[str, int]:
+    deleted = await _purge_in_batches([(collection, {field: exam_id}) for collection, field in ARCHIVE_COLLECTIONS], job)
+    await detach_exam_cards([exam_id])
+    await db.examSessions.update_one({"id": exam_id}, {"$set": {"archive.purged": True}})
+    return deleted
+
+async def _keep_archive_claim(exam_id: str, owner: str) -> None:
+    while True:
+        await asyncio.sleep(ARCHIVE_LEASE_SECONDS / 3)
+        await db.examSessions.update_one(
+            {"id": exam_id, "status": "archiving", "archivingBy": owner},
+            {"$set": {"archivingAt": datetime.now(timezone.utc).replace(tzinfo=None)}},
+        )
+
+async def archive_finished_exams(college_id: Optional[str] = None, job: Optional[JobContext] = None) -> dict:
+    """Mark ended exams completed, archive those past ARCHIVE_AFTER_DAYS and drop their hot data."""
+    completed = await complete_finished_exams(college_id)
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=ARCHIVE_AFTER_DAYS)
+    scope = {"collegeId": college_id} if college_id else {}
+    archived = []
+    while True:
+        # Claiming is atomic, so several workers can run this at once. A claim whose worker stopped
+        # renewing it (killed mid-archive) is taken over once its lease runs out.
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        owner = str(uuid.uuid4())
+        exam = await db.examSessions.find_one_and_update(
+            {**scope, "$or": [
+                # A restored exam gets a fresh grace period, counted from its restore
+                {"status": "completed", "end": {"$lte": cutoff}, "deletedAt": None,
+                 "$or": [{"restoredAt": None}, {"restoredAt": {"$lte": cutoff}}]},
+                {"status": "archiving", "$or": [
+                    {"archivingAt": None}, {"archivingAt": {"$lt": now - timedelta(seconds=ARCHIVE_LEASE_SECONDS)}},
+                ]},
+            ]},
+            {"$set": {"status": "archiving", "archivingAt": now, "archivingBy": owner}},
+            projection={"_id": 0, "id": 1, "collegeId": 1},
+        )
+        if not exam:
+            break
+        renewal = asyncio.create_task(_keep_archive_claim(exam["id"], owner))
+        try:
+            await archive_exam(exam, job)
+        except BaseException:
+            await db.examSessions.update_one(
+                {"id": exam["id"], "status": "archiving", "archivingBy": owner},
+                {"$set": {"status": "completed"}, "$unset": {"archivingAt": "", "archivingBy": ""}},
+            )
+            raise
+        finally:
+            renewal.cancel()
+        archived.append(exam["id"])
+        if job:
+            await job.progress(len(archived), message="Archiving exams")
+    # Also finishes purges that an earlier run was interrupted in
+    pending = await db.examSessions.distinct("id", {**scope, "status": "archived", "archive.purged": False})
+    deleted: Dict[str, int] = {}
+    for exam_id in pending:
+        for collection, count in (await _purge_archived(exam_id, job)).items():
+            deleted[collection] = deleted.get(collection, 0) + count
+    return {"completed": completed, "archived": archived, "deleted": deleted}
+
+def _read_archive(path: Path, fmt: str, collection: Optional[str], skip: int, limit: Optional[int]) -> List[tuple]:
+    rows = []
+    with _open_archive(path, fmt, "rb") as f:
+        for line in f:
+            record = json_util.loads(line)
+            if collection and record["c"] != collection:
+                continue
+            if skip:
+                skip -= 1
+                continue
+            rows.append((record["c"], record["d"]))
+            if limit is not None and len(rows) >= limit:
+                break
+    return rows
+
+async def read_archive(exam: dict, collection: Optional[str] = None, skip: int = 0, limit: Optional[int] = None) -> List[tuple]:
+    archive = exam["archive"]
+    return await asyncio.to_thread(_read_archive, ARCHIVE_DIR / archive["file"], archive["format"], collection, skip, limit)
+
+async def restore_exam(exam: dict) -> Dict[str, int]:
+    """Put an archived exam's data back into the hot collections and delete the archive file."""
+    rows = await read_archive(exam)
+    by_collection: Dict[str, List[dict]] = {}
+    for collection, doc in rows:
+        if collection != "examSessions":
+            by_collection.setdefault(collection, []).append(doc)
+    # Anything still hot (an unfinished purge) is replaced by the archived copy
+    await _purge_in_batches([(collection, {field: exam["id"]}) for collection, field in ARCHIVE_COLLECTIONS])
+    for collection, docs in by_collection.items():
+        for start in range(0, len(docs), ARCHIVE_BATCH):
+            await db[collection].insert_many(docs[start:start + ARCHIVE_BATCH], ordered=False)
+    await db.examSessions.update_one(
+        {"id": exam["id"]},
+        {"$set": {"status": "completed", "restoredAt": datetime.now(timezone.utc).replace(tzinfo=None)}, "$unset": {"archive": ""}},
+    )
+    await refresh_exam_cards(list({seat["s"] for bucket in by_collection.get("roomSeatings", []) for seat in bucket["seats"]}))
+    await asyncio.to_thread((ARCHIVE_DIR / exam["archive"]["file"]).unlink, True)
+    return {collection: len(docs) for collection, docs in by_collection.items()}
+
+async def _archive_loop() -> None:
+    while True:
+        await asyncio.sleep(ARCHIVE_INTERVAL_HOURS * 3600)
+        try:
+            result = await archive_finished_exams()
+            if result["archived"]:
+                logger.info(f"Archived {len(result['archived'])} exam(s)")
+        except Exception as e:
+            logger.error(f"❌ Archival run failed: {e}")
+
+# ============ SEAT STORAGE ============
+
+# Seats are stored as one `roomSeatings` document per (exam, room) rather than one `allocations`
+# document per student:
+#   {"id", "examSessionId", "roomId", "order", "seats": [{"b": bench, "p": "A" | "B" | None, "s": studentId, "a": attendance}],
+#    "free": [{"b", "p"}, ...]}
+# Seats are only ever appended, so an index into `seats` is stable and "<bucket id>:<index>" is the
+# allocation id the API hands out. A student who loses their seat leaves it with `"s": None`.
+# `_seat_rows` expands buckets back into the Allocation shape.
+# `free` is the exam's free-seat index: the room's unoccupied (bench, position) slots in seating order.
+
+def _bench_slots(benches: int, students_per_bench: int) -> List[dict]:
+    positions = ["A", "B"] if students_per_bench == 2 else [None] * students_per_bench
+    return [{"b": bench, "p": position} for bench in range(1, benches + 1) for position in positions]
+
+def _room_bucket(exam_id: str, room_id: str, seats: List[dict], free: Optional[List[dict]] = None, order: int = 0) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "examSessionId": exam_id,
+        "roomId": room_id,
+        "order": order,
+        "seats": seats,
+        "free": free or [],
+        "updatedAt": datetime.now(timezone.utc).isoformat(),
+    }
+
+def _seat_rows(bucket: dict, student_id: Optional[str] = None) -> List[dict]:
+    return [
+        {
+            "id": f"{bucket['id']}:{index}",
+            "examSessionId": bucket["examSessionId"],
+            "studentId": seat["s"],
+            "roomId": bucket["roomId"],
+            "benchNumber": seat["b"],
+            "seatPosition": seat["p"],
+            "attendance": seat["a"],
+        }
+        for index, seat in enumerate(bucket.get("seats", []))
+        if seat["s"] and (student_id is None or seat["s"] == student_id)
+    ]
+
+async def find_allocations(exam_id: str, room_id: Optional[str] = None) -> List[dict]:
+    query = {"examSessionId": exam_id}
+    if room_id:
+        query["roomId"] = room_id
+    buckets = await db.roomSeatings.find(query, {"_id": 0}).to_list(None)
+    return [row for bucket in buckets for row in _seat_rows(bucket)]
+
+def _seating_notification(exam: dict, allocation: dict, rooms_by_id: Dict[str, dict], blocks_by_id: Dict[str, dict], change: str) -> dict:
+    room = rooms_by_id.get(allocation["roomId"], {})
+    block = blocks_by_id.get(room.get("blockId"))
+    return {
+        "userId": allocation["studentId"],
+        "examId": exam["id"],
+        "message": f"Your seating for {exam['title']} {change}. Block: {block['name'] if block else 'Unknown'}, Room: {room.get('roomNumber', 'Unknown')}, Bench: {allocation['benchNumber']}",
+    }
+
+async def place_students(exam: dict, students: List[dict], change: str = "is confirmed") -> dict:
+    """
+    Seat students in the exam's free seats without touching anyone already seated.
+
+    `students` are {"s": studentId, "a": attendance}. Reads only the free-seat index, writes one
+    conditional update per room that receives students and notifies only the students placed.
+    Returns the diff: {"placed": [allocation, ...], "unplaced": [studentId, ...]}.
+    """
+    placed: List[dict] = []
+    pending = list(students)
+    for _ in range(3):  # a concurrent placement can take our slots; re-read and try again
+        if not pending:
+            break
+        index = await db.roomSeatings.find(
+            {"examSessionId": exam["id"], "free.0": {"$exists": True}},
+            {"_id": 0, "id": 1, "roomId": 1, "free": {"$slice": len(pending)}},
+        ).sort("order", 1).to_list(None)
+        plan = []
+        remaining = pending
+        for bucket in index:
+            if not remaining:
+                break
+            slots = bucket["free"][:len(remaining)]
+            plan.append((bucket, [{**slot, **student} for slot, student in zip(slots, remaining)]))
+            remaining = remaining[len(slots):]
+        if not plan:
+            break
+        # The pre-update document (bench numbers only) tells us where the appended seats landed
+        results = await asyncio.gather(*(
+            db.roomSeatings.find_one_and_update(
+                {"id": bucket["id"], "free": {"$all": [{"b": seat["b"], "p": seat["p"]} for seat in seats]}},
+                {
+                    "$pull": {"free": {"$in": [{"b": seat["b"], "p": seat["p"]} for seat in seats]}},
+                    "$push": {"seats": {"$each": seats}},
+                    "$set": {"updatedAt": datetime.now(timezone.utc).isoformat()},
+                },
+                projection={"_id": 0, "seats.b": 1},
+            )
+            for bucket, seats in plan
+        ))
+        seated = set()
+        for (bucket, seats), before in zip(plan, results):
+            if before:
+                seated.update(seat["s"] for seat in seats)
+                first = len(before.get("seats", []))
+                placed.extend(
+                    {"id": f"{bucket['id']}:{first + i}", "studentId": seat["s"], "roomId": bucket["roomId"],
+                     "benchNumber": seat["b"], "seatPosition": seat["p"]}
+                    for i, seat in enumerate(seats)
+                )
+        pending = [student for student in pending if student["s"] not in seated]
+
+    if placed:
+        rooms_by_id, blocks_by_id = await _find_rooms_with_blocks([p["roomId"] for p in placed])
+        await db.notifications.insert_many(notification_records.build(
+            _seating_notification(exam, allocation, rooms_by_id, blocks_by_id, change) for allocation in placed
+        ))
+        await write_exam_cards([
+            _card_entry(
+                exam, p["id"], {"s": p["studentId"], "b": p["benchNumber"], "p": p["seatPosition"]},
+                rooms_by_id.get(p["roomId"]), blocks_by_id.get(rooms_by_id.get(p["roomId"], {}).get("blockId")),
+            )
+            for p in placed
+        ])
+    return {"placed": placed, "unplaced": [student["s"] for student in pending]}
+
+async def seat_newly_allowed(exam_id: str, student_ids: List[str]) -> Optional[dict]:
+    """After a permission grant, seat the students if the exam already has a seating plan."""
+    if not student_ids or not await db.roomSeatings.find_one({"examSessionId": exam_id}, {"_id": 1}):
+        return None
+    exam = await db.examSessions.find_one({"id": exam_id}, {"_id": 0})
+    already = await db.roomSeatings.distinct("seats.s", {"examSessionId": exam_id, "seats.s": {"$in": student_ids}})
+    already = set(already)
+    return await place_students(exam, [{"s": sid, "a": "pending"} for sid in student_ids if sid not in already])
+
+async def unseat_students(exam: dict, student_ids: List[str]) -> List[str]:
+    """Give up the seats of students who may no longer sit the exam; returns the ids unseated.
+
+    Seats keep their index (allocation ids stay stable): the seat's student is cleared and its
+    slot goes back on the free-seat index, with one conditional update per room in one bulk write.
+    """
+    if not student_ids:
+        return []
+    buckets = await db.roomSeatings.find(
+        {"examSessionId": exam["id"], "seats.s": {"$in": student_ids}}, {"_id": 0, "id": 1, "seats": 1}
+    ).to_list(None)
+    wanted = set(student_ids)
+    operations = []
+    unseated = []
+    for bucket in buckets:
+        taken = [(index, seat) for index, seat in enumerate(bucket["seats"]) if seat["s"] in wanted]
+        operations.append(UpdateOne(
+            {"id": bucket["id"], **{f"seats.{index}.s": seat["s"] for index, seat in taken}},
+            {
+                "$set": {**{f"seats.{index}.s": None for index, _ in taken}, "updatedAt": datetime.now(timezone.utc).isoformat()},
+                "$push": {"free": {"$each": [{"b": seat["b"], "p": seat["p"]} for _, seat in taken]}},
+            },
+        ))
+        unseated.extend(seat["s"] for _, seat in taken)
+    if not operations:
+        return []
+    await db.roomSeatings.bulk_write(operations, ordered=False)
+    await detach_exam_cards([exam["id"]], unseated)
+    await db.notifications.insert_many(notification_records.build(
+        {"userId": student_id, "examId": exam["id"], "message": f"Your seat for {exam['title']} has been withdrawn"}
+        for student_id in unseated
+    ))
+    return unseated
+
+# One-off data migrations run from every worker's startup. A lease in the `migrations` collection
+# makes sure only one worker runs a given migration at a time; the others skip it.
+MIGRATION_LEASE_SECONDS = 300
+
+async def claim_migration(name: str) -> Optional[str]:
+    """Take the lease on migration `name`; returns an owner token, or None if another worker holds it."""
+    owner, now = str(uuid.uuid4()), datetime.utcnow()
+    try:
+        await db.migrations.find_one_and_update(
+            {"_id": name, "$or": [{"lockedUntil": None}, {"lockedUntil": {"$lt": now}}]},
+            {"$set": {"owner": owner, "lockedUntil": now + timedelta(seconds=MIGRATION_LEASE_SECONDS)}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        return None  # the document exists with a live lease
+    return owner
+
+async def renew_migration(name: str, owner: str) -> None:
+    result = await db.migrations.update_one(
+        {"_id": name, "owner": owner},
+        {"$set": {"lockedUntil": datetime.utcnow() + timedelta(seconds=MIGRATION_LEASE_SECONDS)}},
+    )
+    if not result.matched_count:
+        raise RuntimeError(f"Lost the lease on migration {name}")
+
+async def release_migration(name: str, owner: str) -> None:
+    await db.migrations.update_one({"_id": name, "owner": owner}, {"$set": {"lockedUntil": None, "finishedAt": datetime.utcnow()}})
+
+async def migrate_allocations_to_room_seatings() -> int:
+    """Fold legacy per-student `allocations`/`examStudents` documents into room buckets, one exam at a time.
+
+    Safe to re-run, and to start from several workers: only the lease holder converts anything.
+    """
+    owner = await claim_migration("roomSeatings")
+    if owner is None:
+        logger.info("Another worker is migrating legacy allocations")
+        return 0
+    converted = 0
+    seated: List[str] = []
+    try:
+        for exam_id in await db.allocations.distinct("examSessionId"):
+            await renew_migration("roomSeatings", owner)
+            legacy = await db.allocations.find({"examSessionId": exam_id}, {"_id": 0}).to_list(None)
+            if not legacy:
+                continue  # converted since the list was read
+            seats_by_room: Dict[str, List[dict]] = {}
+            for alloc in legacy:
+                seats_by_room.setdefault(alloc["roomId"], []).append({
+                    "b": alloc["benchNumber"], "p": alloc.get("seatPosition"),
+                    "s": alloc["studentId"], "a": alloc.get("attendance", "pending"),
+                })
+            exam = await db.examSessions.find_one({"id": exam_id}, {"_id": 0, "studentsPerBench": 1}) or {}
+            rooms = await _find_by_ids(db.rooms, seats_by_room.keys(), {"_id": 0, "id": 1, "benches": 1})
+            buckets = []
+            for order, (room_id, seats) in enumerate(seats_by_room.items()):
+                taken = {(seat["b"], seat["p"]) for seat in seats}
+                slots = _bench_slots(rooms.get(room_id, {}).get("benches", 0), exam.get("studentsPerBench", 2))
+                free = [slot for slot in slots if (slot["b"], slot["p"]) not in taken]
+                buckets.append(_room_bucket(exam_id, room_id, sorted(seats, key=lambda seat: (seat["b"], seat["p"] or "")), free, order))
+            # Rebuild the exam from scratch so an interrupted run is simply repeated
+            await db.roomSeatings.delete_many({"examSessionId": exam_id})
+            await db.roomSeatings.insert_many(buckets)
+            await db.allocations.delete_many({"examSessionId": exam_id, "id": {"$in": [alloc.get("id") for alloc in legacy]}})
+            # examStudents only ever mirrored allocations and was never read
+            await db.examStudents.delete_many({"examSessionId": exam_id})
+            seated.extend(seat["s"] for seats in seats_by_room.values() for seat in seats)
+            converted += 1
+    finally:
+        try:
+            # Cards span exams, so rebuild each moved student's card once, after every exam is converted
+            seated = list(dict.fromkeys(seated))
+            for start in range(0, len(seated), 1000):
+                await refresh_exam_cards(seated[start:start + 1000])
+        finally:
+            await release_migration("roomSeatings", owner)
+    return converted
+
+# ============ LOGIN THROTTLING ============
+
+# Failed logins are counted in a sliding window per client IP and per (collegeId, identifier).
+# Once either key has too many recent failures, /auth/login answers 429 before looking the user
+# up, so a password-guessing script can't make the server run bcrypt. Every attempt is logged as a
+# failure *before* the password check and withdrawn on success, so concurrent guesses can't all
+# slip past the check: an attempt proceeds only if it is within the limit by its rank in the log.
+# The log lives in a pluggable store: in-process by default, or the `loginFailures` collection
+# when several workers must share it (LOGIN_THROTTLE_STORE=mongo).
+
+LOGIN_WINDOW_SECONDS = _env_int("LOGIN_WINDOW_SECONDS", 900)
+LOGIN_MAX_FAILURES = _env_int("LOGIN_MAX_FAILURES", 5)
+LOGIN_MAX_FAILURES_PER_IP = _env_int("LOGIN_MAX_FAILURES_PER_IP", 100)
+# Behind a reverse proxy every request comes from the proxy; name the header carrying the client
+# address. The proxy appends the address it saw, so the last entry is the one to trust.
+LOGIN_CLIENT_IP_HEADER = os.environ.get("LOGIN_CLIENT_IP_HEADER", "").strip()
+
+class MemoryThrottleStore:
+    """Per-process failure log: a bounded deque of (time, sequence) per key, least recently used keys evicted."""
+
+    def __init__(self, max_keys: int = 100000, max_entries: int = 1000):
+        self.max_keys = max_keys
+        self.max_entries = max_entries
+        self._log: "OrderedDict[str, deque]" = OrderedDict()
+        self._sequence = itertools.count()
+
+    async def setup(self) -> None:
+        pass
+
+    def _entries(self, key: str, since: float) -> List[tuple]:
+        entries = self._log.get(key)
+        if not entries:
+            return []
+        while entries and entries[0][0] < since:
+            entries.popleft()
+        return list(entries)
+
+    async def recent(self, key: str, since: float, limit: int) -> List[float]:
+        """Up to `limit` failure times at or after `since`, oldest first."""
+        return [at for at, _ in self._entries(key, since)[:limit]]
+
+    async def add(self, key: str, now: float) -> int:
+        """Log a failure; returns a token for `rank` and `remove`."""
+        entries = self._log.get(key)
+        if entries is None:
+            entries = self._log[key] = deque(maxlen=self.max_entries)
+        token = next(self._sequence)
+        entries.append((now, token))
+        self._log.move_to_end(key)
+        while len(self._log) > self.max_keys:
+            self._log.popitem(last=False)
+        return token
+
+    async def rank(self, key: str, token: int, since: float) -> int:
+        """How many failures since `since` were logged up to and including `token`."""
+        return sum(1 for _, other in self._entries(key, since) if other <= token)
+
+    async def remove(self, key: str, token: int) -> None:
+        entries = self._log.get(key)
+        if entries:
+            self._log[key] = deque((entry for entry in entries if entry[1] != token), maxlen=self.max_entries)
+
+    async def clear(self, key: str) -> None:
+        self._log.pop(key, None)
+
+class MongoThrottleStore:
+    """Failure log shared by every worker: one document per failure, expired by a TTL index."""
+
+    def __init__(self, collection: str = "loginFailures"):
+        self.collection = collection
+
+    async def setup(self) -> None:
+        await db[self.collection].create_index([("key", 1), ("at", 1)])
+        await db[self.collection].create_index("at", expireAfterSeconds=LOGIN_WINDOW_SECONDS)
+
+    async def recent(self, key: str, since: float, limit: int) -> List[float]:
+        docs = await db[self.collection].find(
+            {"key": key, "at": {"$gte": datetime.utcfromtimestamp(since)}}, {"_id": 0, "at": 1}
+        ).sort("at", 1).limit(limit).to_list(limit)
+        return [doc["at"].replace(tzinfo=timezone.utc).timestamp() for doc in docs]
+
+    async def add(self, key: str, now: float):
+        result = await db[self.collection].insert_one({"key": key, "at": datetime.utcfromtimestamp(now)})
+        return result.inserted_id
+
+    async def rank(self, key: str, token, since: float) -> int:
+        # ObjectIds increase with insertion time, which orders attempts across workers
+        return await db[self.collection].count_documents(
+            {"key": key, "at": {"$gte": datetime.utcfromtimestamp(since)}, "_id": {"$lte": token}}
+        )
+
+    async def remove(self, key: str, token) -> None:
+        await db[self.collection].delete_one({"_id": token})
+
+    async def clear(self, key: str) -> None:
+        await db[self.collection].delete_many({"key": key})
+
+LOGIN_THROTTLE_STORES = {"memory": MemoryThrottleStore, "mongo": MongoThrottleStore}
+
+class LoginThrottle:
+    def __init__(self, store, window: int, max_failures: int, max_failures_per_ip: int):
+        self.store = store
+        self.window = window
+        self.limits = {"account": max_failures, "ip": max_failures_per_ip}
+
+    @staticmethod
+    def keys(ip: str, college_id: str, identifier: str) -> Dict[str, str]:
+        return {"account": f"account:{college_id}:{identifier.strip().lower()}", "ip": f"ip:{ip}"}
+
+    async def retry_after(self, keys: Dict[str, str], now: Optional[float] = None) -> Optional[int]:
+        """Seconds until a login may be attempted again, or None if it may be attempted now."""
+        now = time.time() if now is None else now
+        since = now - self.window
+        recent = await asyncio.gather(*(self.store.recent(keys[kind], since, self.limits[kind]) for kind in keys))
+        waits = [
+            entries[0] + self.window - now
+            for kind, entries in zip(keys, recent) if len(entries) >= self.limits[kind]
+        ]
+        return max(1, math.ceil(max(waits))) if waits else None
+
+    async def attempt(self, keys: Dict[str, str]) -> tuple:
+        """Log an attempt as a failure up front; returns ``(retry_after, tokens)``.
+
+        `retry_after` is set when the attempt is over a limit; it is then withdrawn again.
+        Otherwise the attempt stands as a failure unless `succeeded` is called with `tokens`.
+        """
+        now = time.time()
+        since = now - self.window
+        tokens = dict(zip(keys, await asyncio.gather(*(self.store.add(keys[kind], now) for kind in keys))))
+        ranks = await asyncio.gather(*(self.store.rank(keys[kind], tokens[kind], since) for kind in keys))
+        if all(rank <= self.limits[kind] for kind, rank in zip(keys, ranks)):
+            return None, tokens
+        await asyncio.gather(*(self.store.remove(keys[kind], tokens[kind]) for kind in keys))
+        return await self.retry_after(keys, now) or 1, {}
+
+    async def succeeded(self, keys: Dict[str, str], tokens: Dict[str, Any]) -> None:
+        await asyncio.gather(self.store.clear(keys["account"]), self.store.remove(keys["ip"], tokens["ip"]))
+
+def _login_store():
+    name = os.environ.get("LOGIN_THROTTLE_STORE", "memory").strip().lower()
+    if name not in LOGIN_THROTTLE_STORES:
+        raise RuntimeError(f"Unknown LOGIN_THROTTLE_STORE {name!r}; expected one of {', '.join(LOGIN_THROTTLE_STORES)}")
+    return LOGIN_THROTTLE_STORES[name]()
+
+login_throttle = LoginThrottle(_login_store(), LOGIN_WINDOW_SECONDS, LOGIN_MAX_FAILURES, LOGIN_MAX_FAILURES_PER_IP)
+
+def client_ip(request: Request) -> str:
+    if LOGIN_CLIENT_IP_HEADER:
+        forwarded = request.headers.get(LOGIN_CLIENT_IP_HEADER, "").split(",")[-1].strip()
+        if forwarded:
+            return forwarded
+    return request.client.host if request.client else "unknown"
+
 # ============ AUTH ROUTES ============
 
 class SignupRequest(BaseModel):
@@ -419,7 +2567,7 @@ async def signup(request: SignupRequest):
     }
 
 @api_router.post("/auth/login", response_model=TokenResponse)
-async def login(request: LoginRequest):
+async def login(request: LoginRequest, http_request: Request):
     # Find user based on role
     query = {"collegeId": request.collegeId, "role": request.role}
     
@@ -432,13 +2580,19 @@ async def login(request: LoginRequest):
             raise HTTPException(status_code=400, detail="Email is required for admin/invigilator")
         query["email"] = request.email
     
-    user = await db.users.find_one(query, {"_id": 0})
+    throttle_keys = LoginThrottle.keys(client_ip(http_request), request.collegeId, query.get("rollNumber") or query["email"])
+    retry_after, attempt = await login_throttle.attempt(throttle_keys)
+    if retry_after:
+        raise HTTPException(
+            status_code=429, detail="Too many failed login attempts. Try again later.",
+            headers={"Retry-After": str(retry_after)},
+        )
     
-    if not user:
-        raise HTTPException(status_code=401, detail="Invalid credentials")
+    user = await db.users.find_one(query, {"_id": 0})
     
-    if not verify_password(request.password, user["password"]):
-        raise HTTPException(status_code=401, detail="Invalid credentials")
+    if not user or not verify_password(request.password, user["password"]):
+        raise HTTPException(status_code=401, detail="Invalid credentials")  # the attempt is already logged
+    await login_throttle.succeeded(throttle_keys, attempt)
     
     # Create access token
     token = create_access_token({"user_id": user["id"], "role": user["role"]})
@@ -563,9 +2717,8 @@ async def create_block(block: Block, current_user: dict = Depends(get_current_us
 async def delete_block(block_id: str, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Only admins can delete blocks")
-    await db.blocks.delete_one({"id": block_id})
-    await db.rooms.delete_many({"blockId": block_id})
-    return {"message": "Block deleted successfully"}
+    deleted = await cascade_delete("block", [block_id])
+    return {"message": "Block deleted successfully", "deleted": deleted}
 
 # ============ ROOM ROUTES ============
 
@@ -588,14 +2741,15 @@ async def update_room(room_id: str, room: Room, current_user: dict = Depends(get
         raise HTTPException(status_code=403, detail="Only admins can update rooms")
     doc = room.model_dump()
     await db.rooms.update_one({"id": room_id}, {"$set": doc})
+    await refresh_exam_cards(await db.roomSeatings.distinct("seats.s", {"roomId": room_id}))
     return room
 
 @api_router.delete("/rooms/{room_id}")
 async def delete_room(room_id: str, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Only admins can delete rooms")
-    await db.rooms.delete_one({"id": room_id})
-    return {"message": "Room deleted successfully"}
+    deleted = await cascade_delete("room", [room_id])
+    return {"message": "Room deleted successfully", "deleted": deleted}
 
 # ============ STUDENT ROUTES ============
 
@@ -615,7 +2769,13 @@ class Student(BaseModel):
     password: Optional[str] = None  # Only used for creation, never returned
 
 @api_router.get("/students/{college_id}")
-async def get_students(college_id: str, year: Optional[int] = None, branch: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+async def get_students(
+    college_id: str,
+    year: Optional[int] = None,
+    branch: Optional[str] = None,
+    fields: FieldSelection = Depends(field_selection({"": STUDENT_FIELDS})),
+    current_user: dict = Depends(get_current_user)
+):
     query = {"collegeId": college_id}
     if year:
         query["year"] = year
@@ -623,7 +2783,7 @@ async def get_students(college_id: str, year: Optional[int] = None, branch: Opti
         query["branch"] = branch
     
     # First try the dedicated students collection
-    students = await db.students.find(query, {"_id": 0, "password": 0}).to_list(1000)
+    students = await db.students.find(query, fields.projection({"_id": 0, "password": 0})).to_list(1000)
     
     # If no students found and the collection might be empty, fall back to users collection
     if not students:
@@ -650,6 +2810,7 @@ async def get_students(college_id: str, year: Optional[int] = None, branch: Opti
                 "attendancePercent": profile.get("attendancePercent", 85.0),
                 "dob": profile.get("dob", "")
             })
+        students = [fields.trim(student) for student in students]
     
     return students
 
@@ -709,7 +2870,11 @@ async def create_student(student: Student, current_user: dict = Depends(get_curr
     return result
 
 @api_router.post("/students/bulk")
-async def create_students_bulk(students: List[Student], current_user: dict = Depends(get_current_user)):
+async def create_students_bulk(
+    students: List[Student],
+    job_options: JobOptions = Depends(get_job_options),
+    current_user: dict = Depends(get_current_user)
+):
     print(f"=== BULK IMPORT DEBUG ===")
     print(f"Number of students received: {len(students)}")
     print(f"Current user: {current_user}")
@@ -719,11 +2884,21 @@ async def create_students_bulk(students: List[Student], current_user: dict = Dep
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Only admins can create students")
     
+    if job_options.run_async:
+        return await job_runner.submit_response(
+            "students.bulk_import", current_user, {"students": [s.model_dump() for s in students]}, job_options
+        )
+    return await _create_students_bulk(students)
+
+async def _create_students_bulk(students: List[Student], job: Optional[JobContext] = None) -> dict:
     student_docs = []
     user_docs = []
     duplicates = []
     
-    for student in students:
+    for idx, student in enumerate(students):
+        if job:
+            job.checkpoint()
+            await job.progress(idx, len(students), "Validating and hashing passwords")
         # Check if student already exists in students collection
         existing = await db.students.find_one({"collegeId": student.collegeId, "rollNumber": student.rollNumber})
         if existing:
@@ -740,8 +2915,8 @@ async def create_students_bulk(students: List[Student], current_user: dict = Dep
         if not student.password:
             student.password = student.rollNumber
         
-        # Hash the password
-        hashed_password = hash_password(student.password)
+        # Hash the password (off the event loop; bcrypt is deliberately slow)
+        hashed_password = await asyncio.to_thread(hash_password, student.password)
         
         # Create student document
         student_doc = student.model_dump()
@@ -819,11 +2994,16 @@ async def delete_student(student_id: str, current_user: dict = Depends(get_curre
 # ============ STAFF ROUTES ============
 
 @api_router.get("/staff/{college_id}")
-async def get_staff(college_id: str, role: str, current_user: dict = Depends(get_current_user)):
+async def get_staff(
+    college_id: str,
+    role: str,
+    fields: FieldSelection = Depends(field_selection({"": USER_FIELDS})),
+    current_user: dict = Depends(get_current_user)
+):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Only admins can view staff")
     
-    staff = await db.users.find({"collegeId": college_id, "role": role}, {"_id": 0, "password": 0}).to_list(1000)
+    staff = await db.users.find({"collegeId": college_id, "role": role}, fields.projection({"_id": 0, "password": 0})).to_list(1000)
     return staff
 
 @api_router.post("/staff", response_model=User)
@@ -848,21 +3028,142 @@ async def delete_staff(staff_id: str, current_user: dict = Depends(get_current_u
     await db.users.delete_one({"id": staff_id})
     return {"message": "Staff deleted successfully"}
 
+# ============ BATCH LOOKUP ROUTES ============
+
+# Dashboards used to fetch rooms block by block and users/exams one at a time. These endpoints
+# answer a whole page's worth with one `$in` query, keyed by id, and accept `?fields=` like the
+# list endpoints. Ids that don't exist (or belong to another college) are simply absent.
+
+BATCH_GET_MAX = 500
+
+class BatchGetRequest(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    ids: List[str] = Field(..., max_length=BATCH_GET_MAX)
+
+@api_router.post("/rooms:batchGet")
+async def batch_get_rooms(
+    request: BatchGetRequest,
+    fields: FieldSelection = Depends(field_selection({"": ROOM_FIELDS})),
+    current_user: dict = Depends(get_current_user)
+):
+    """Rooms of the given blocks: {blockId: [room, ...]} (`ids` are block ids)."""
+    block_ids = list(dict.fromkeys(request.ids))
+    rooms = await db.rooms.find(
+        {"blockId": {"$in": block_ids}}, fields.projection({"_id": 0}, links=("blockId",))
+    ).sort("roomNumber", 1).to_list(None)
+    by_block: Dict[str, List[dict]] = {block_id: [] for block_id in block_ids}
+    for room in rooms:
+        by_block[room["blockId"]].append(fields.trim(room))
+    return by_block
+
+@api_router.post("/users:batchGet")
+async def batch_get_users(
+    request: BatchGetRequest,
+    fields: FieldSelection = Depends(field_selection({"": USER_FIELDS})),
+    current_user: dict = Depends(get_current_user)
+):
+    """Users of the caller's college by id: {id: user}, without passwords."""
+    if current_user["role"] not in ("admin", "invigilator"):
+        raise HTTPException(status_code=403, detail="Only staff can look up users")
+    users = await db.users.find(
+        {"id": {"$in": list(set(request.ids))}, "collegeId": current_user["collegeId"]},
+        fields.projection({"_id": 0, "password": 0}),
+    ).to_list(None)
+    return {user["id"]: user for user in users}
+
+@api_router.post("/exams:batchGet")
+async def batch_get_exams(
+    request: BatchGetRequest,
+    fields: FieldSelection = Depends(field_selection({"": EXAM_FIELDS})),
+    current_user: dict = Depends(get_current_user)
+):
+    """Exams of the caller's college by id: {id: exam}."""
+    exams = await db.examSessions.find(
+        {"id": {"$in": list(set(request.ids))}, "collegeId": current_user["collegeId"], "deletedAt": None},
+        fields.projection({"_id": 0, "start": 0, "end": 0}),
+    ).to_list(None)
+    return {exam["id"]: exam for exam in exams}
+
+@api_router.get("/colleges/{college_id}/bootstrap")
+async def college_bootstrap(college_id: str, current_user: dict = Depends(get_current_user)):
+    """Everything the dashboards load up front, in one request: the college, its blocks with their
+    rooms, and its branch subjects. Three queries, run concurrently."""
+    if current_user["collegeId"] != college_id:
+        raise HTTPException(status_code=403, detail="Not a member of this college")
+    college, blocks, subjects = await asyncio.gather(
+        db.colleges.find_one({"id": college_id}, {"_id": 0}),
+        db.blocks.aggregate([
+            {"$match": {"collegeId": college_id}},
+            {"$lookup": {"from": "rooms", "localField": "id", "foreignField": "blockId", "as": "rooms"}},
+            {"$project": {"_id": 0, "rooms._id": 0}},
+            {"$sort": {"name": 1}},
+        ]).to_list(None),
+        db.branchSubjects.find({"collegeId": college_id}, {"_id": 0}).to_list(None),
+    )
+    for block in blocks:
+        block["rooms"].sort(key=lambda room: room.get("roomNumber") or "")
+    return {"college": college, "blocks": blocks, "branchSubjects": subjects, "years": [1, 2, 3, 4]}
+
 # ============ EXAM ROUTES ============
 
 @api_router.get("/exams/{college_id}", response_model=List[ExamSession])
-async def get_exams(college_id: str, current_user: dict = Depends(get_current_user)):
-    exams = await db.examSessions.find({"collegeId": college_id}, {"_id": 0}).to_list(1000)
+async def get_exams(
+    college_id: str,
+    fields: FieldSelection = Depends(field_selection({"": EXAM_FIELDS})),
+    current_user: dict = Depends(get_current_user)
+):
+    exams = await db.examSessions.find({"collegeId": college_id, "deletedAt": None}, fields.projection({"_id": 0})).to_list(1000)
+    if fields.selected:
+        return JSONResponse([fields.trim(exam) for exam in exams])  # partial rows; skip the response model
     return exams
 
+class ClashQuery(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    collegeId: str
+    date: str
+    startTime: str
+    endTime: str
+    years: List[int]
+    branches: List[str]
+    examId: Optional[str] = None  # the exam being edited, so it doesn't clash with itself
+
+@api_router.post("/exams/clashes")
+async def check_exam_clashes(
+    proposal: ClashQuery,
+    include_students: bool = Query(False),
+    current_user: dict = Depends(get_current_user)
+):
+    """Which scheduled exams (and how many students) a proposed slot would clash with."""
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can check exam clashes")
+    try:
+        exam = {**proposal.model_dump(), "id": proposal.examId}
+        exam_window(exam)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await find_clashes(exam, include_students=include_students)
+
+@api_router.get("/exams/{college_id}/upcoming", response_model=List[ExamSession])
+async def get_upcoming_exams(
+    college_id: str,
+    limit: int = Query(20, ge=1, le=500),
+    current_user: dict = Depends(get_current_user)
+):
+    """Exams that have not finished yet, soonest first; an indexed range scan on (collegeId, start)."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return await read_db.examSessions.find(
+        {"collegeId": college_id, "start": {"$gte": now - MAX_EXAM_DURATION}, "end": {"$gt": now}, "deletedAt": None},
+        {"_id": 0},
+    ).sort("start", 1).to_list(limit)
+
 @api_router.get("/exams/{exam_id}", response_model=ExamSession)
 async def get_exam(exam_id: str, current_user: dict = Depends(get_current_user)):
-    exam = await db.examSessions.find_one({"id": exam_id}, {"_id": 0})
+    exam = await db.examSessions.find_one({"id": exam_id, "deletedAt": None}, {"_id": 0})
     if not exam:
         raise HTTPException(status_code=404, detail="Exam not found")
     return exam
 
-@api_router.post("/exams", response_model=ExamSession)
+@api_router.post("/exams", response_model=ExamSessionWithClashes)
 async def create_exam(exam: ExamSession, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Only admins can create exams")
@@ -887,7 +3188,7 @@ async def create_exam(exam: ExamSession, current_user: dict = Depends(get_curren
     exam.startTime = start_time
     exam.endTime = end_time
 
-    doc = exam.model_dump()
+    doc = {**exam.model_dump(), **exam_times(exam.model_dump())}
     await db.examSessions.insert_one(doc)
     
     # Create calendar event for the exam
@@ -900,9 +3201,9 @@ async def create_exam(exam: ExamSession, current_user: dict = Depends(get_curren
         status=exam.status,
         examId=exam.id
     )
-    await db.calendarEvents.insert_one(calendar_event.model_dump())
+    await db.calendarEvents.insert_one(_event_doc(calendar_event))
     
-    return exam
+    return ExamSessionWithClashes(**exam.model_dump(), clashes=await find_clashes(doc))
 
 @api_router.put("/exams/{exam_id}", response_model=ExamSession)
 async def update_exam(exam_id: str, exam: ExamSession, current_user: dict = Depends(get_current_user)):
@@ -929,11 +3230,12 @@ async def update_exam(exam_id: str, exam: ExamSession, current_user: dict = Depe
     exam.endTime = end_time
 
     # Use atomic transaction for exam updates
-    async with db.client.start_session() as session:
+    async with await db.client.start_session() as session:
         async with session.start_transaction():
             exam.updatedAt = datetime.now(timezone.utc).isoformat()
             doc = exam.model_dump()
-            await db.examSessions.update_one({"id": exam_id}, {"$set": doc}, session=session)
+            times = exam_times(doc)
+            await db.examSessions.update_one({"id": exam_id}, {"$set": {**doc, **times}}, session=session)
             
             # Update calendar event
             await db.calendarEvents.update_one(
@@ -942,42 +3244,397 @@ async def update_exam(exam_id: str, exam: ExamSession, current_user: dict = Depe
                     "title": exam.title,
                     "date": normalized_date,
                     "time": start_time,
+                    "start": times["start"],
                     "updatedAt": datetime.now(timezone.utc).isoformat()
                 }},
                 session=session
             )
     
+    await update_exam_cards({**doc, "id": exam_id})
     return exam
 
-# ============ CALENDAR EVENTS ROUTES ============
-
-@api_router.get("/calendar_events/{college_id}")
-async def get_calendar_events(college_id: str, current_user: dict = Depends(get_current_user)):
-    if current_user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Only admins can view calendar events")
-    
-    events = await db.calendarEvents.find({"collegeId": college_id}, {"_id": 0}).to_list(1000)
-    return events
+# ============ TIMETABLE IMPORT ============
+
+# POST /exams/import takes a semester timetable as CSV or XLSX, with one exam per row. Every row is
+# checked before anything is written. Clashes are found in memory, both within the file and with
+# the college's existing exams. The exams and their calendar events are then written with one
+# insert each. A file with any bad row imports nothing, and every row error is returned at once.
+
+TIMETABLE_MAX_ROWS = _env_int("TIMETABLE_MAX_ROWS", 2000)
+
+# Accepted header spellings per field, compared lower-case with spaces and punctuation removed
+TIMETABLE_COLUMNS = {
+    "title": ("title", "exam", "examtitle", "name"),
+    "date": ("date", "examdate"),
+    "startTime": ("starttime", "start", "from"),
+    "endTime": ("endtime", "end", "to"),
+    "subjects": ("subjects", "subject"),
+    "years": ("years", "year"),
+    "branches": ("branches", "branch"),
+    "rooms": ("rooms", "room"),
+    "status": ("status",),
+    "allocationType": ("allocationtype", "allocation"),
+    "studentsPerBench": ("studentsperbench", "perbench"),
+}
+TIMETABLE_REQUIRED = ("title", "date", "startTime", "endTime", "years", "branches")
+TIMETABLE_STATUSES = {"scheduled", "draft"}
+ALLOCATION_TYPES = {"random", "jumbled", "serial"}
+
+_TIMETABLE_HEADERS = {alias: field for field, aliases in TIMETABLE_COLUMNS.items() for alias in aliases}
+_HEADER_NOISE = re.compile(r"[^a-z0-9]")
+_LIST_SEPARATOR = re.compile(r"\s*[;,|]\s*")
+_CLOCK = re.compile(r"(\d{1,2})(?:[:.](\d{2}))?(?::\d{2})?\s*(?:([ap])\.?m\.?)?", re.IGNORECASE)
+_timetable_date = functools.lru_cache(maxsize=1024)(_normalize_date_str)  # a semester has few distinct dates
+
+def _cell_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # spreadsheets hand back 3.0 for 3
+    return str(value).strip()
+
+def _cell_list(value) -> List[str]:
+    return [item for item in _LIST_SEPARATOR.split(_cell_text(value)) if item]
+
+def _cell_date(value) -> str:
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return _timetable_date(_cell_text(value))
+
+def _cell_time(value) -> str:
+    """HH:MM from "14:00", "14.00", "2:00 PM", "2 pm" or a spreadsheet time."""
+    if isinstance(value, datetime):
+        value = value.time()
+    if isinstance(value, time_of_day):
+        return f"{value.hour:02d}:{value.minute:02d}"
+    match = _CLOCK.fullmatch(_cell_text(value))
+    if not match or (match[2] is None and match[3] is None):
+        raise ValueError(f"Invalid time: {_cell_text(value) or 'empty'}")
+    hour, minute = int(match[1]), int(match[2] or 0)
+    if match[3]:
+        if not 1 <= hour <= 12:
+            raise ValueError(f"Invalid time: {_cell_text(value)}")
+        hour = hour % 12 + (12 if match[3].lower() == "p" else 0)
+    if hour > 23 or minute > 59:
+        raise ValueError(f"Time out of range: {_cell_text(value)}")
+    return f"{hour:02d}:{minute:02d}"
+
+def _cell_years(value) -> List[int]:
+    years = []
+    for item in _cell_list(value):
+        if not item.isdigit() or int(item) < 1:
+            raise ValueError(f"Invalid year: {item}")
+        years.append(int(item))
+    return years
+
+def _timetable_table(filename: str, contents: bytes) -> List[list]:
+    """The file's rows as lists of cells, header first."""
+    if filename.lower().endswith((".xlsx", ".xlsm")):
+        workbook = openpyxl.load_workbook(io.BytesIO(contents), read_only=True, data_only=True)
+        try:
+            return [list(row) for row in workbook.active.iter_rows(values_only=True)]
+        finally:
+            workbook.close()
+    if not filename.lower().endswith(".csv"):
+        raise ValueError(f"Only CSV and XLSX timetables are supported. Received: {filename}")
+    try:
+        text = contents.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        text = contents.decode("latin-1")
+    return list(csv.reader(io.StringIO(text)))
+
+def parse_timetable(filename: str, contents: bytes) -> tuple:
+    """Validate every row of a timetable file; returns ``(rows, errors)``.
+
+    Rows are normalized exam fields plus "row" (the line number) and "rooms" (room names).
+    Errors are ``{"row", "column", "message"}``; a row with any error is left out of `rows`.
+    Problems with the file as a whole raise ValueError.
+    """
+    table = _timetable_table(filename, contents)
+    while table and not any(_cell_text(cell) for cell in table[-1]):
+        table.pop()
+    if not table:
+        raise ValueError("The timetable is empty")
+    columns = {}
+    for index, header in enumerate(table[0]):
+        field = _TIMETABLE_HEADERS.get(_HEADER_NOISE.sub("", _cell_text(header).lower()))
+        if field and field not in columns:
+            columns[field] = index
+    missing = [field for field in TIMETABLE_REQUIRED if field not in columns]
+    if missing:
+        raise ValueError(f"Timetable is missing column(s): {', '.join(missing)}")
+    if len(table) - 1 > TIMETABLE_MAX_ROWS:
+        raise ValueError(f"A timetable can have at most {TIMETABLE_MAX_ROWS} exams")
+
+    today = date.today().isoformat()
+    rows, errors = [], []
+    for number, cells in enumerate(table[1:], start=2):
+        if not any(_cell_text(cell) for cell in cells):
+            continue
+        row: Dict[str, Any] = {"row": number}
+        row_errors = []
 
-@api_router.post("/calendar_events", response_model=CalendarEvent)
-async def create_calendar_event(event: CalendarEvent, current_user: dict = Depends(get_current_user)):
-    if current_user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Only admins can create calendar events")
-    
-    doc = event.model_dump()
-    await db.calendarEvents.insert_one(doc)
-    return event
+        def cell(field):
+            index = columns.get(field)
+            return cells[index] if index is not None and index < len(cells) else None
 
-@api_router.put("/calendar_events/{event_id}", response_model=CalendarEvent)
-async def update_calendar_event(event_id: str, event: CalendarEvent, current_user: dict = Depends(get_current_user)):
-    if current_user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Only admins can update calendar events")
-    
-    doc = event.model_dump()
-    await db.calendarEvents.update_one({"id": event_id}, {"$set": doc})
-    return event
+        def check(field, parse):
+            try:
+                row[field] = parse(cell(field))
+            except ValueError as e:
+                row_errors.append({"row": number, "column": field, "message": str(e)})
+
+        check("title", _cell_text)
+        check("date", _cell_date)
+        check("startTime", _cell_time)
+        check("endTime", _cell_time)
+        check("subjects", _cell_list)
+        check("years", _cell_years)
+        check("branches", _cell_list)
+        row["rooms"] = _cell_list(cell("rooms"))
+        row["status"] = _cell_text(cell("status")).lower() or "scheduled"
+        row["allocationType"] = _cell_text(cell("allocationType")).lower() or "random"
+        per_bench = _cell_text(cell("studentsPerBench")) or "1"
+
+        for field in ("title", "years", "branches"):
+            if field in row and not row[field]:
+                row_errors.append({"row": number, "column": field, "message": f"{field} is required"})
+        if row.get("date") and row["date"] < today:
+            row_errors.append({"row": number, "column": "date", "message": "Exam date cannot be in the past"})
+        if row.get("startTime") and row.get("endTime") and row["endTime"] <= row["startTime"]:
+            row_errors.append({"row": number, "column": "endTime", "message": "End time must be after start time"})
+        if row["status"] not in TIMETABLE_STATUSES:
+            row_errors.append({"row": number, "column": "status", "message": f"Status must be one of {', '.join(sorted(TIMETABLE_STATUSES))}"})
+        if row["allocationType"] not in ALLOCATION_TYPES:
+            row_errors.append({"row": number, "column": "allocationType", "message": f"Allocation type must be one of {', '.join(sorted(ALLOCATION_TYPES))}"})
+        if not per_bench.isdigit() or int(per_bench) < 1:
+            row_errors.append({"row": number, "column": "studentsPerBench", "message": f"Invalid students per bench: {per_bench}"})
+        else:
+            row["studentsPerBench"] = int(per_bench)
+
+        if row_errors:
+            errors.extend(row_errors)
+        else:
+            rows.append(row)
+    return rows, errors
+
+async def _college_rooms_by_name(college_id: str) -> Dict[str, List[dict]]:
+    """The college's rooms under both "A-101" and "Main Block/A-101" (lower-case); one aggregate."""
+    blocks = await db.blocks.aggregate([
+        {"$match": {"collegeId": college_id}},
+        {"$lookup": {"from": "rooms", "localField": "id", "foreignField": "blockId", "as": "rooms"}},
+        {"$project": {"_id": 0, "name": 1, "rooms.id": 1, "rooms.roomNumber": 1, "rooms.benches": 1}},
+    ]).to_list(None)
+    by_name: Dict[str, List[dict]] = {}
+    for block in blocks:
+        for room in block["rooms"]:
+            by_name.setdefault(room["roomNumber"].lower(), []).append(room)
+            by_name.setdefault(f"{block['name']}/{room['roomNumber']}".lower(), []).append(room)
+    return by_name
+
+async def _booked_rooms(exam_ids: List[str], room_ids: List[str]) -> Dict[str, List[str]]:
+    """Exam id -> the given rooms it holds, through a room allocation or seats."""
+    if not exam_ids or not room_ids:
+        return {}
+    query = {"examSessionId": {"$in": exam_ids}, "roomId": {"$in": room_ids}}
+    projection = {"_id": 0, "examSessionId": 1, "roomId": 1}
+    allocated, seated = await asyncio.gather(
+        db.examRooms.find(query, projection).to_list(None),
+        db.roomSeatings.find(query, projection).to_list(None),
+    )
+    booked: Dict[str, List[str]] = {}
+    for doc in allocated + seated:
+        if doc["roomId"] not in booked.setdefault(doc["examSessionId"], []):
+            booked[doc["examSessionId"]].append(doc["roomId"])
+    return booked
+
+async def _insert_timetable(exams: List[dict], events: List[dict], exam_rooms: List[dict]) -> None:
+    async def write(session=None):
+        await db.examSessions.insert_many(exams, session=session)
+        await db.calendarEvents.insert_many(events, session=session)
+        if exam_rooms:
+            await db.examRooms.insert_many(exam_rooms, session=session)
 
-@api_router.delete("/calendar_events/{event_id}")
+    try:
+        async with await db.client.start_session() as session:
+            async with session.start_transaction():
+                await write(session)
+        return
+    except OperationFailure as e:
+        if e.code != 20:  # IllegalOperation: a standalone server has no transactions
+            raise
+    try:
+        await write()
+    except Exception:
+        # Without a transaction, undo the part that was written so the file can be re-imported
+        exam_ids = [exam["id"] for exam in exams]
+        await asyncio.gather(
+            db.examSessions.delete_many({"id": {"$in": exam_ids}}),
+            db.calendarEvents.delete_many({"examId": {"$in": exam_ids}}),
+            db.examRooms.delete_many({"examSessionId": {"$in": exam_ids}}),
+        )
+        raise
+
+@api_router.post("/exams/import")
+async def import_timetable(
+    file: UploadFile = File(...),
+    dry_run: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    """Create a semester's exams from a CSV/XLSX timetable; `dry_run` validates without writing."""
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can import timetables")
+    college_id = current_user["collegeId"]
+    contents = await file.read()
+    if not contents:
+        raise HTTPException(status_code=400, detail="File is empty")
+    try:
+        # openpyxl is CPU-bound; keep it off the event loop
+        rows, errors = await asyncio.to_thread(parse_timetable, file.filename or "", contents)
+    except ImportError:
+        raise HTTPException(status_code=500, detail="XLSX import requires openpyxl. Please install: pip install openpyxl")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Resolve room names
+    rooms_by_name = await _college_rooms_by_name(college_id) if any(row["rooms"] for row in rows) else {}
+    room_names: Dict[str, str] = {}
+    room_benches: Dict[str, int] = {}
+    for row in rows:
+        row["roomIds"] = []
+        for name in row["rooms"]:
+            matches = rooms_by_name.get(name.lower(), [])
+            if len(matches) != 1:
+                problem = "Unknown room" if not matches else "Room number is in several blocks; write it as Block/Room"
+                errors.append({"row": row["row"], "column": "rooms", "message": f"{problem}: {name}"})
+            elif matches[0]["id"] not in row["roomIds"]:
+                row["roomIds"].append(matches[0]["id"])
+                room_names[matches[0]["id"]] = name
+                room_benches[matches[0]["id"]] = matches[0].get("benches", 20)
+
+    exam_fields = ("title", "date", "startTime", "endTime", "subjects", "years", "branches", "status", "allocationType", "studentsPerBench")
+    exams = [
+        {**record, **exam_times(record), "roomIds": row["roomIds"]}
+        for row, record in zip(rows, exam_session_records.build(
+            {"collegeId": college_id, **{field: row[field] for field in exam_fields}} for row in rows
+        ))
+    ]
+    imported = {exam["id"]: row for row, exam in zip(rows, exams)}
+
+    # Clashes with each other and with the college's exams in the same weeks
+    existing: List[dict] = []
+    if exams:
+        existing = await db.examSessions.find(
+            {
+                "collegeId": college_id, "deletedAt": None,
+                "start": {"$gte": min(e["start"] for e in exams) - MAX_EXAM_DURATION, "$lt": max(e["end"] for e in exams)},
+            },
+            {"_id": 0, "id": 1, "title": 1, "date": 1, "startTime": 1, "endTime": 1, "start": 1, "end": 1, "years": 1, "branches": 1},
+        ).to_list(None)
+    booked = await _booked_rooms([e["id"] for e in existing], list(room_names))
+    for exam in existing:
+        exam["roomIds"] = booked.get(exam["id"], [])
+    candidates = existing + exams
+    cohort_index = CohortIndex(candidates)
+    room_index = CohortIndex(candidates, keys=lambda exam: exam["roomIds"])
+
+    def describe(exam_id: str) -> str:
+        if exam_id in imported:
+            return f"row {imported[exam_id]['row']}"
+        other = cohort_index.exams[exam_id]
+        return f"'{other['title']}' on {other['date']} {other['startTime']}-{other['endTime']}"
+
+    seen: Dict[tuple, int] = {(e["title"].lower(), e["date"], e["startTime"]): 0 for e in existing}
+    results = []
+    for row, exam in zip(rows, exams):
+        key = (exam["title"].lower(), exam["date"], exam["startTime"])
+        if key in seen:
+            duplicate = f"row {seen[key]}" if seen[key] else "an existing exam"
+            errors.append({"row": row["row"], "column": "title", "message": f"Same exam as {duplicate}"})
+        seen.setdefault(key, row["row"])
+        for other_id, room_ids in room_index.clashes(exam).items():
+            if other_id in imported and imported[other_id]["row"] > row["row"]:
+                continue  # reported on the later row
+            for room_id in room_ids:
+                errors.append({"row": row["row"], "column": "rooms",
+                               "message": f"Room {room_names[room_id]} is already booked by {describe(other_id)}"})
+        clashes = [
+            {**_clash_summary(cohort_index.exams[other_id], cohorts), "row": imported[other_id]["row"] if other_id in imported else None}
+            for other_id, cohorts in cohort_index.clashes(exam).items()
+        ]
+        results.append({"row": row["row"], "id": exam["id"], "title": exam["title"], "date": exam["date"],
+                        "startTime": exam["startTime"], "endTime": exam["endTime"], "clashes": clashes})
+
+    if errors:
+        errors.sort(key=lambda error: error["row"])
+        raise HTTPException(status_code=422, detail={
+            "message": f"{len({e['row'] for e in errors})} row(s) have errors; nothing was imported",
+            "errors": errors,
+        })
+    if not dry_run and exams:
+        events = [
+            {**event, "start": exam["start"]}
+            for exam, event in zip(exams, calendar_event_records.build(
+                {"collegeId": college_id, "title": exam["title"], "date": exam["date"], "time": exam["startTime"],
+                 "type": "exam", "status": exam["status"], "examId": exam["id"]}
+                for exam in exams
+            ))
+        ]
+        exam_rooms = exam_room_records.build(
+            {"examSessionId": exam["id"], "roomId": room_id, "capacity": room_benches[room_id] * exam["studentsPerBench"],
+             "benches": room_benches[room_id], "studentsPerBench": exam["studentsPerBench"]}
+            for exam in exams for room_id in exam.pop("roomIds")
+        )
+        await _insert_timetable(exams, events, exam_rooms)
+    return {"imported": 0 if dry_run else len(exams), "dryRun": dry_run, "exams": results}
+
+# ============ CALENDAR EVENTS ROUTES ============
+
+@api_router.get("/calendar_events/{college_id}")
+async def get_calendar_events(
+    college_id: str,
+    from_: Optional[str] = Query(None, alias="from"),
+    to: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=5000),
+    current_user: dict = Depends(get_current_user)
+):
+    """Events of a college; with `from`/`to` only those starting in [from, to), soonest first."""
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can view calendar events")
+    
+    query: Dict[str, Any] = {"collegeId": college_id}
+    if from_ is None and to is None:
+        cursor = read_db.calendarEvents.find(query, {"_id": 0, "start": 0})
+    else:
+        window: Dict[str, Any] = {"$ne": None}
+        if from_ is not None:
+            window["$gte"] = parse_range_bound(from_)
+        if to is not None:
+            window["$lt"] = parse_range_bound(to)
+        query["start"] = window
+        # Served by the (collegeId, start) index
+        cursor = read_db.calendarEvents.find(query, {"_id": 0, "start": 0}).sort("start", 1)
+    return await cursor.to_list(limit)
+
+@api_router.post("/calendar_events", response_model=CalendarEvent)
+async def create_calendar_event(event: CalendarEvent, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can create calendar events")
+    
+    await db.calendarEvents.insert_one(_event_doc(event))
+    return event
+
+@api_router.put("/calendar_events/{event_id}", response_model=CalendarEvent)
+async def update_calendar_event(event_id: str, event: CalendarEvent, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can update calendar events")
+    
+    await db.calendarEvents.update_one({"id": event_id}, {"$set": _event_doc(event)})
+    return event
+
+@api_router.delete("/calendar_events/{event_id}")
 async def delete_calendar_event(event_id: str, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Only admins can delete calendar events")
@@ -986,23 +3643,31 @@ async def delete_calendar_event(event_id: str, current_user: dict = Depends(get_
     return {"message": "Calendar event deleted successfully"}
 
 @api_router.delete("/exams/{exam_id}")
-async def delete_exam(exam_id: str, current_user: dict = Depends(get_current_user)):
+async def delete_exam(
+    exam_id: str,
+    mode: str = Query("hard", pattern="^(hard|soft)$"),
+    job_options: JobOptions = Depends(get_job_options),
+    current_user: dict = Depends(get_current_user)
+):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Only admins can delete exams")
     
-    # Delete related data
-    await db.examSessions.delete_one({"id": exam_id})
-    await db.allocations.delete_many({"examSessionId": exam_id})
-    await db.invigilatorDuties.delete_many({"examSessionId": exam_id})
-    await db.examRooms.delete_many({"examSessionId": exam_id})
-    await db.examStudents.delete_many({"examSessionId": exam_id})
-    await db.examInvigilators.delete_many({"examSessionId": exam_id})
-    
-    return {"message": "Exam deleted successfully"}
+    if mode == "soft":
+        # Hide the exam now and purge its allocations, notifications etc. in the background
+        await tombstone("exam", [exam_id])
+        await detach_exam_cards([exam_id])
+        return await job_runner.submit_response("cascade.purge", current_user, {"kind": "exam", "ids": [exam_id]}, job_options)
+    if job_options.run_async:
+        return await job_runner.submit_response("exams.delete", current_user, {"examId": exam_id}, job_options)
+    return await _delete_exam(exam_id)
+
+async def _delete_exam(exam_id: str, job: Optional[JobContext] = None) -> dict:
+    deleted = await cascade_delete("exam", [exam_id])
+    return {"message": "Exam deleted successfully", "deleted": deleted}
 
 # ============ DRAFT EXAM ROUTES ============
 
-@api_router.post("/draft_exam", response_model=DraftExam)
+@api_router.post("/draft_exam", response_model=DraftExamWithClashes)
 async def save_draft_exam(draft: DraftExam, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Only admins can save draft exams")
@@ -1039,9 +3704,9 @@ async def save_draft_exam(draft: DraftExam, current_user: dict = Depends(get_cur
         status="draft",
         examId=draft.id
     )
-    await db.calendarEvents.insert_one(calendar_event.model_dump())
+    await db.calendarEvents.insert_one(_event_doc(calendar_event))
     
-    return draft
+    return DraftExamWithClashes(**draft.model_dump(), clashes=await find_clashes(doc))
 
 @api_router.get("/draft_exam/{college_id}", response_model=List[DraftExam])
 async def get_draft_exams(college_id: str, current_user: dict = Depends(get_current_user)):
@@ -1077,6 +3742,7 @@ async def update_draft_exam(draft_id: str, draft: DraftExam, current_user: dict
             "title": f"[DRAFT] {draft.title}",
             "date": draft.date,
             "time": draft.startTime,
+            **event_times({"date": draft.date, "time": draft.startTime}),
             "updatedAt": datetime.now(timezone.utc).isoformat()
         }}
     )
@@ -1133,31 +3799,31 @@ async def finalize_draft_exam(draft_id: str, current_user: dict = Depends(get_cu
     )
     
     # Save exam
-    await db.examSessions.insert_one(exam.model_dump())
+    await db.examSessions.insert_one({**exam.model_dump(), **exam_times(exam.model_dump())})
     
     # Create room allocations
-    for room_id in draft["selectedRooms"]:
-        room = await db.rooms.find_one({"id": room_id}, {"_id": 0})
-        if room:
-            exam_room = ExamRoom(
-                examSessionId=exam.id,
-                roomId=room_id,
-                invigilatorId=draft["selectedInvigilators"].get(room_id),
-                capacity=room["benches"] * draft["studentsPerBench"],
-                benches=room["benches"],
-                studentsPerBench=draft["studentsPerBench"]
-            )
-            await db.examRooms.insert_one(exam_room.model_dump())
+    rooms = await _find_by_ids(db.rooms, draft["selectedRooms"], {"_id": 0, "id": 1, "benches": 1})
+    exam_rooms = exam_room_records.build(
+        {
+            "examSessionId": exam.id,
+            "roomId": room_id,
+            "invigilatorId": draft["selectedInvigilators"].get(room_id),
+            "capacity": rooms[room_id]["benches"] * draft["studentsPerBench"],
+            "benches": rooms[room_id]["benches"],
+            "studentsPerBench": draft["studentsPerBench"],
+        }
+        for room_id in draft["selectedRooms"] if room_id in rooms
+    )
+    if exam_rooms:
+        await db.examRooms.insert_many(exam_rooms)
     
     # Create invigilator duties
-    for room_id, invigilator_id in draft["selectedInvigilators"].items():
-        if invigilator_id:
-            duty = ExamInvigilator(
-                examSessionId=exam.id,
-                invigilatorId=invigilator_id,
-                roomId=room_id
-            )
-            await db.examInvigilators.insert_one(duty.model_dump())
+    duties = exam_invigilator_records.build(
+        {"examSessionId": exam.id, "invigilatorId": invigilator_id, "roomId": room_id}
+        for room_id, invigilator_id in draft["selectedInvigilators"].items() if invigilator_id
+    )
+    if duties:
+        await db.examInvigilators.insert_many(duties)
     
     # Create or update calendar event
     calendar_event = CalendarEvent(
@@ -1175,10 +3841,10 @@ async def finalize_draft_exam(draft_id: str, current_user: dict = Depends(get_cu
     if existing_event:
         await db.calendarEvents.update_one(
             {"examId": draft_id},
-            {"$set": calendar_event.model_dump()}
+            {"$set": _event_doc(calendar_event)}
         )
     else:
-        await db.calendarEvents.insert_one(calendar_event.model_dump())
+        await db.calendarEvents.insert_one(_event_doc(calendar_event))
     
     # Delete draft
     await db.draftExams.delete_one({"id": draft_id})
@@ -1308,10 +3974,17 @@ async def remove_room_allocation(exam_id: str, room_id: str, current_user: dict
     # Remove invigilator duty
     await db.examInvigilators.delete_many({"examSessionId": exam_id, "roomId": room_id})
     
-    # Remove student allocations for this room
-    await db.allocations.delete_many({"examSessionId": exam_id, "roomId": room_id})
+    # Remove the room's seats and move only its students into free seats elsewhere
+    bucket = await db.roomSeatings.find_one_and_delete({"examSessionId": exam_id, "roomId": room_id}, {"_id": 0, "seats": 1})
+    displaced = [{"s": seat["s"], "a": seat["a"]} for seat in (bucket or {}).get("seats", []) if seat["s"]]
+    seating = None
+    if displaced:
+        exam = await db.examSessions.find_one({"id": exam_id}, {"_id": 0})
+        seating = await place_students(exam, displaced, change="has changed")
+        if seating["unplaced"]:
+            await detach_exam_cards([exam_id], seating["unplaced"])
     
-    return {"message": "Room allocation removed successfully"}
+    return {"message": "Room allocation removed successfully", "seating": seating}
 
 @api_router.get("/allocate_room/{exam_id}/capacity")
 async def get_allocation_capacity(exam_id: str, current_user: dict = Depends(get_current_user)):
@@ -1344,10 +4017,22 @@ async def get_allocation_capacity(exam_id: str, current_user: dict = Depends(get
     }
 
 @api_router.post("/exams/{exam_id}/allocate")
-async def allocate_seats(exam_id: str, room_ids: List[str], current_user: dict = Depends(get_current_user)):
+async def allocate_seats(
+    exam_id: str,
+    room_ids: List[str],
+    job_options: JobOptions = Depends(get_job_options),
+    current_user: dict = Depends(get_current_user)
+):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Only admins can allocate seats")
     
+    if job_options.run_async:
+        return await job_runner.submit_response(
+            "exams.allocate_seats", current_user, {"examId": exam_id, "roomIds": room_ids}, job_options
+        )
+    return await _allocate_seats(exam_id, room_ids)
+
+async def _allocate_seats(exam_id: str, room_ids: List[str], job: Optional[JobContext] = None) -> dict:
     # Get exam details
     exam = await db.examSessions.find_one({"id": exam_id}, {"_id": 0})
     if not exam:
@@ -1363,16 +4048,14 @@ async def allocate_seats(exam_id: str, room_ids: List[str], current_user: dict =
     students = await db.users.find(query, {"_id": 0}).to_list(10000)
     
     # Filter out students with attendance restrictions (unless permission granted)
-    restricted_students = await db.examAttendanceRestrictions.find(
-        {"examId": exam_id, "isAllowed": False},
-        {"_id": 0}
-    ).to_list(1000)
-    
-    restricted_student_ids = {rest["studentId"] for rest in restricted_students}
+    restricted_student_ids = set(await db.examAttendanceRestrictions.distinct(
+        "studentId", {"examId": exam_id, "isAllowed": False}
+    ))
     students = [s for s in students if s["id"] not in restricted_student_ids]
     
-    # Get selected rooms
-    rooms = await db.rooms.find({"id": {"$in": room_ids}}, {"_id": 0}).to_list(1000)
+    # Get selected rooms (with their blocks, used for the notification text)
+    rooms_by_id, blocks_by_id = await _find_rooms_with_blocks(room_ids)
+    rooms = [rooms_by_id[room_id] for room_id in dict.fromkeys(room_ids) if room_id in rooms_by_id]
     
     # Calculate total capacity
     total_capacity = sum(room["benches"] * exam["studentsPerBench"] for room in rooms)
@@ -1380,13 +4063,21 @@ async def allocate_seats(exam_id: str, room_ids: List[str], current_user: dict =
     if len(students) > total_capacity:
         raise HTTPException(status_code=400, detail=f"Not enough capacity. Students: {len(students)}, Capacity: {total_capacity}")
     
+    # Students already seated in an overlapping exam; reported, not dropped, so the admin decides
+    clashes = await seat_clashes(exam, [s["id"] for s in students])
+    
+    if job:
+        # Last point at which cancelling leaves the previous allocation untouched
+        job.checkpoint()
+        await job.progress(0, len(students), "Assigning seats")
+    
     # Clear existing allocations for this exam
-    await db.allocations.delete_many({"examSessionId": exam_id})
-    await db.examStudents.delete_many({"examSessionId": exam_id})
+    await db.roomSeatings.delete_many({"examSessionId": exam_id})
+    await detach_exam_cards([exam_id])
     
     # Allocate seats
     allocations = []
-    exam_students = []
+    buckets = []
     
     if exam["allocationType"] == "serial":
         # Sort students by roll number for serial allocation
@@ -1395,131 +4086,139 @@ async def allocate_seats(exam_id: str, room_ids: List[str], current_user: dict =
         # Random allocation
         random.shuffle(students)
     
-    # Assign seats
+    # Assign seats room by room; every selected room gets a bucket so its empty seats stay usable
     student_idx = 0
-    for room in rooms:
-        for bench in range(1, room["benches"] + 1):
-            for seat_pos in range(exam["studentsPerBench"]):
-                if student_idx >= len(students):
-                    break
-                
-                allocation = Allocation(
-                    examSessionId=exam_id,
-                    studentId=students[student_idx]["id"],
-                    roomId=room["id"],
-                    benchNumber=bench,
-                    seatPosition="A" if exam["studentsPerBench"] == 2 and seat_pos == 0 else "B" if exam["studentsPerBench"] == 2 else None
-                )
-                allocations.append(allocation.model_dump())
-                
-                exam_student = ExamStudent(
-                    examSessionId=exam_id,
-                    studentId=students[student_idx]["id"],
-                    roomId=room["id"],
-                    benchNumber=bench,
-                    seatPosition="A" if exam["studentsPerBench"] == 2 and seat_pos == 0 else "B" if exam["studentsPerBench"] == 2 else None
-                )
-                exam_students.append(exam_student.model_dump())
-                
-                student_idx += 1
-            
-            if student_idx >= len(students):
-                break
-        
-        if student_idx >= len(students):
-            break
-    
-    # Save allocations
-    if allocations:
-        await db.allocations.insert_many(allocations)
-        await db.examStudents.insert_many(exam_students)
+    for order, room in enumerate(rooms):
+        slots = _bench_slots(room["benches"], exam["studentsPerBench"])
+        seated = students[student_idx:student_idx + len(slots)]
+        seats = [{**slot, "s": student["id"], "a": "pending"} for slot, student in zip(slots, seated)]
+        buckets.append(_room_bucket(exam_id, room["id"], seats, free=slots[len(seats):], order=order))
+        allocations.extend({"studentId": seat["s"], "roomId": room["id"], "benchNumber": seat["b"]} for seat in seats)
+        student_idx += len(seats)
+    
+    # Save allocations, one document per room, and each student's exam card
+    if buckets:
+        await db.roomSeatings.insert_many(buckets)
+        await write_exam_cards([
+            _card_entry(exam, f"{bucket['id']}:{index}", seat, rooms_by_id[bucket["roomId"]], blocks_by_id.get(rooms_by_id[bucket["roomId"]]["blockId"]))
+            for bucket in buckets for index, seat in enumerate(bucket["seats"])
+        ])
     
     # Update exam status
     await db.examSessions.update_one({"id": exam_id}, {"$set": {"status": "scheduled"}})
+    if job:
+        await job.progress(len(allocations), len(students), "Sending notifications")
     
     # Create notifications for students
-    notifications = []
-    for allocation in allocations:
-        room = next(r for r in rooms if r["id"] == allocation["roomId"])
-        block = await db.blocks.find_one({"id": room["blockId"]}, {"_id": 0})
-        notification = Notification(
-            userId=allocation["studentId"],
-            message=f"Your seating for {exam['title']} is confirmed. Block: {block['name']}, Room: {room['roomNumber']}, Bench: {allocation['benchNumber']}"
-        )
-        notifications.append(notification.model_dump())
+    notifications = notification_records.build(
+        _seating_notification(exam, allocation, rooms_by_id, blocks_by_id, "is confirmed")
+        for allocation in allocations
+    )
     
     if notifications:
         await db.notifications.insert_many(notifications)
     
-    return {"message": f"Successfully allocated {len(allocations)} seats", "count": len(allocations)}
+    return {"message": f"Successfully allocated {len(allocations)} seats", "count": len(allocations), "clashes": clashes}
 
 @api_router.get("/allocations/exam/{exam_id}")
-async def get_exam_allocations(exam_id: str, current_user: dict = Depends(get_current_user)):
-    allocations = await db.allocations.find({"examSessionId": exam_id}, {"_id": 0}).to_list(10000)
-    
-    # Enrich with student and room details
+async def get_exam_allocations(
+    exam_id: str,
+    fields: FieldSelection = Depends(field_selection({"": SEAT_FIELDS, "student": USER_FIELDS, "room": ROOM_FIELDS, "block": BLOCK_FIELDS})),
+    current_user: dict = Depends(get_current_user)
+):
+    allocations = await find_allocations(exam_id)
+    
+    # Enrich with student and room details (batched lookups, not one query per seat)
+    students, rooms, blocks = {}, {}, {}
+    if fields.wants("student"):
+        students = await _find_by_ids(db.users, [a["studentId"] for a in allocations], fields.projection({"_id": 0, "password": 0}, "student"))
+    if fields.wants("room") or fields.wants("block"):
+        rooms, blocks = await _find_rooms_with_blocks(
+            [a["roomId"] for a in allocations],
+            fields.fields("room"), fields.fields("block"),
+        )
     enriched = []
     for alloc in allocations:
-        student = await db.users.find_one({"id": alloc["studentId"]}, {"_id": 0, "password": 0})
-        room = await db.rooms.find_one({"id": alloc["roomId"]}, {"_id": 0})
-        block = await db.blocks.find_one({"id": room["blockId"]}, {"_id": 0}) if room else None
-        
-        enriched.append({
+        room = rooms.get(alloc["roomId"])
+        enriched.append(fields.trim({
             **alloc,
-            "student": student,
+            "student": students.get(alloc["studentId"]),
             "room": room,
-            "block": block
-        })
+            "block": blocks.get(room["blockId"]) if room else None
+        }))
     
     return enriched
 
 @api_router.get("/allocations/student/{student_id}")
-async def get_student_allocations(student_id: str):
-    allocations = await db.allocations.find({"studentId": student_id}, {"_id": 0}).to_list(1000)
-    
-    # Enrich with exam, room, and block details
-    enriched = []
-    for alloc in allocations:
-        exam = await db.examSessions.find_one({"id": alloc["examSessionId"]}, {"_id": 0})
-        room = await db.rooms.find_one({"id": alloc["roomId"]}, {"_id": 0})
-        block = await db.blocks.find_one({"id": room["blockId"]}, {"_id": 0}) if room else None
-        
-        enriched.append({
-            **alloc,
-            "exam": exam,
-            "room": room,
-            "block": block
-        })
-    
-    return enriched
+async def get_student_allocations(student_id: str, claims: dict = Depends(get_token_claims)):
+    if claims.get("role") != "student" or claims["user_id"] != student_id:
+        raise HTTPException(status_code=403, detail="Students can only view their own seating")
+    return await get_student_card(student_id)
 
 # ============ DOWNLOAD ROUTES ============
 
 @api_router.get("/exams/{exam_id}/download")
-async def download_allocation_list(exam_id: str, format: str = "excel", current_user: dict = Depends(get_current_user)):
+async def download_allocation_list(
+    exam_id: str,
+    format: str = "excel",
+    job_options: JobOptions = Depends(get_job_options),
+    current_user: dict = Depends(get_current_user)
+):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Only admins can download allocation lists")
     
+    if job_options.run_async:
+        return await job_runner.submit_response(
+            "exams.export_allocations", current_user, {"examId": exam_id, "format": format}, job_options
+        )
+    export = await _build_allocation_export(exam_id, format)
+    return _file_response(export["content"], export["filename"], export["content_type"])
+
+def _file_response(content, filename: str, content_type: str) -> Response:
+    return Response(
+        content=content,
+        media_type=content_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+def _write_excel(rows: List[dict]) -> bytes:
+    openpyxl.load()  # surface a missing engine as ImportError
+    df = pandas.DataFrame(rows)
+    
+    # Create Excel file in memory
+    output = io.BytesIO()
+    with pandas.ExcelWriter(output, engine='openpyxl') as writer:
+        df.to_excel(writer, sheet_name='Allocation List', index=False)
+    
+    content = output.getvalue()
+    output.close()
+    return content
+
+async def _build_allocation_export(exam_id: str, format: str, job: Optional[JobContext] = None) -> dict:
+    """Build the allocation list for an exam as CSV or Excel bytes."""
     # Get exam details
     exam = await db.examSessions.find_one({"id": exam_id}, {"_id": 0})
     if not exam:
         raise HTTPException(status_code=404, detail="Exam not found")
     
     # Get allocations with student and room details
-    allocations = await db.allocations.find({"examSessionId": exam_id}, {"_id": 0}).to_list(10000)
+    allocations = await find_allocations(exam_id)
+    
+    # Enrich with student, room, block and invigilator details using batched lookups
+    students = await _find_by_ids(db.users, [a["studentId"] for a in allocations], {"_id": 0, "password": 0})
+    rooms, blocks = await _find_rooms_with_blocks([a["roomId"] for a in allocations])
+    invigilator_duties = await db.examInvigilators.find({"examSessionId": exam_id}, {"_id": 0}).to_list(1000)
+    invigilator_by_room = {}
+    for duty in invigilator_duties:
+        invigilator_by_room.setdefault(duty["roomId"], duty["invigilatorId"])
+    invigilators = await _find_by_ids(db.users, invigilator_by_room.values(), {"_id": 0, "password": 0})
     
-    # Enrich with student, room, and block details
     enriched_allocations = []
     for alloc in allocations:
-        student = await db.users.find_one({"id": alloc["studentId"]}, {"_id": 0, "password": 0})
-        room = await db.rooms.find_one({"id": alloc["roomId"]}, {"_id": 0})
-        block = await db.blocks.find_one({"id": room["blockId"]}, {"_id": 0}) if room else None
-        
-        # Get invigilator for this room
-        invigilator_duty = await db.examInvigilators.find_one({"examSessionId": exam_id, "roomId": alloc["roomId"]}, {"_id": 0})
-        invigilator = None
-        if invigilator_duty:
-            invigilator = await db.users.find_one({"id": invigilator_duty["invigilatorId"]}, {"_id": 0, "password": 0})
+        student = students.get(alloc["studentId"])
+        room = rooms.get(alloc["roomId"])
+        block = blocks.get(room["blockId"]) if room else None
+        invigilator = invigilators.get(invigilator_by_room.get(alloc["roomId"]))
         
         enriched_allocations.append({
             "studentName": student["profile"]["name"] if student else "Unknown",
@@ -1535,9 +4234,6 @@ async def download_allocation_list(exam_id: str, format: str = "excel", current_
     
     if format.lower() == "csv":
         # Generate CSV content
-        import csv
-        import io
-        
         output = io.StringIO()
         writer = csv.writer(output)
         
@@ -1555,7 +4251,7 @@ async def download_allocation_list(exam_id: str, format: str = "excel", current_
                 alloc["seatPosition"], alloc["invigilatorName"]
             ])
         
-        content = output.getvalue()
+        content = output.getvalue().encode("utf-8")
         output.close()
         
         return {
@@ -1565,18 +4261,11 @@ async def download_allocation_list(exam_id: str, format: str = "excel", current_
         }
     
     else:  # Excel format
+        if job:
+            await job.progress(len(enriched_allocations), len(enriched_allocations), "Writing spreadsheet")
         try:
-            import pandas as pd
-            
-            df = pd.DataFrame(enriched_allocations)
-            
-            # Create Excel file in memory
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Allocation List', index=False)
-            
-            content = output.getvalue()
-            output.close()
+            # pandas/openpyxl are CPU-bound; keep them off the event loop
+            content = await asyncio.to_thread(_write_excel, enriched_allocations)
             
             return {
                 "content": content,
@@ -1587,6 +4276,225 @@ async def download_allocation_list(exam_id: str, format: str = "excel", current_
         except ImportError:
             raise HTTPException(status_code=500, detail="Excel generation requires pandas and openpyxl. Please install: pip install pandas openpyxl")
 
+# ============ DOCUMENT ROUTES ============
+
+# Hall tickets and room seating sheets are rendered by backend/documents.py in a process pool, so
+# the event loop keeps serving requests while thousands of pages are laid out. Each room's PDFs are
+# cached under RENDER_CACHE_DIR by a hash of exactly what they print, and an exam's zip by the hash
+# of its rooms: re-downloading an unchanged exam renders nothing, and a change re-renders only the
+# rooms it touched. The directory is a pure cache and can be cleared at any time.
+
+RENDER_WORKERS = _env_int("RENDER_WORKERS", min(4, os.cpu_count() or 1))
+RENDER_CACHE_DIR = Path(os.environ.get("RENDER_CACHE_DIR", str(ROOT_DIR / "render_cache")))
+_render_pool: Optional[ProcessPoolExecutor] = None
+
+def _get_render_pool() -> ProcessPoolExecutor:
+    global _render_pool
+    if _render_pool is None:
+        # spawn: workers import only backend.documents, not this module and its DB client
+        _render_pool = ProcessPoolExecutor(RENDER_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _render_pool
+
+async def _render(fn, *args):
+    if RENDER_WORKERS <= 0:
+        return await asyncio.to_thread(fn, *args)
+    return await asyncio.get_running_loop().run_in_executor(_get_render_pool(), fn, *args)
+
+def _content_hash(payload: Any) -> str:
+    encoded = json.dumps([documents.RENDERER_VERSION, payload], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+def _safe_filename(name: str) -> str:
+    return "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in name).strip("_") or "untitled"
+
+async def _document_inputs(exam_id: str, room_id: Optional[str] = None) -> tuple:
+    """The exam and, per room in seating order, everything its documents print."""
+    exam = await db.examSessions.find_one({"id": exam_id}, {"_id": 0})
+    if not exam:
+        raise HTTPException(status_code=404, detail="Exam not found")
+    query = {"examSessionId": exam_id}
+    if room_id:
+        query["roomId"] = room_id
+    buckets = await db.roomSeatings.find(query, {"_id": 0, "roomId": 1, "order": 1, "seats": 1}).sort("order", 1).to_list(None)
+    students = await _find_by_ids(
+        db.users, [seat["s"] for bucket in buckets for seat in bucket["seats"]], {"_id": 0, "id": 1, "rollNumber": 1, "profile": 1}
+    )
+    rooms, blocks = await _find_rooms_with_blocks([bucket["roomId"] for bucket in buckets])
+    college = await db.colleges.find_one({"id": exam["collegeId"]}, {"_id": 0, "name": 1}) or {}
+    duties = await db.examInvigilators.find({"examSessionId": exam_id}, {"_id": 0, "roomId": 1, "invigilatorId": 1}).to_list(None)
+    invigilator_by_room = {duty["roomId"]: duty["invigilatorId"] for duty in duties}
+    invigilators = await _find_by_ids(db.users, invigilator_by_room.values(), {"_id": 0, "id": 1, "profile": 1})
+
+    payloads = []
+    for bucket in buckets:
+        room = rooms.get(bucket["roomId"], {})
+        invigilator = invigilators.get(invigilator_by_room.get(bucket["roomId"]))
+        seats = []
+        for seat in bucket["seats"]:
+            if not seat["s"]:
+                continue  # vacated; its slot is back in `free`
+            student = students.get(seat["s"], {})
+            profile = student.get("profile", {})
+            seats.append({
+                "bench": seat["b"], "position": seat["p"], "roll": student.get("rollNumber"),
+                "name": profile.get("name"), "branch": profile.get("branch"), "year": profile.get("year"),
+            })
+        payloads.append({
+            "exam": {key: exam.get(key) for key in ("title", "date", "startTime", "endTime", "subjects")},
+            "college": college.get("name"),
+            "roomId": bucket["roomId"],
+            "roomNumber": room.get("roomNumber"),
+            "block": blocks.get(room.get("blockId"), {}).get("name"),
+            "invigilator": invigilator["profile"]["name"] if invigilator else None,
+            "seats": seats,
+        })
+    return exam, payloads
+
+def _write_file(path: Path, content: bytes) -> None:
+    partial = path.with_name(path.name + ".partial")
+    partial.write_bytes(content)
+    os.replace(partial, path)
+
+async def _render_rooms(payloads: List[dict], job: Optional[JobContext] = None) -> List[str]:
+    """Render (or reuse) both PDFs of every room; returns each room's cache key."""
+    RENDER_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    keys = [_content_hash(payload) for payload in payloads]
+    missing = [(key, payload) for key, payload in zip(keys, payloads) if not (RENDER_CACHE_DIR / f"{key}.sheet.pdf").exists()]
+    window = max(RENDER_WORKERS, 1) * 2
+    for start in range(0, len(missing), window):
+        if job:
+            job.checkpoint()
+            await job.progress(start, len(missing), "Rendering rooms")
+        batch = missing[start:start + window]
+        rendered = await asyncio.gather(*(_render(documents.render_room_documents, payload) for _, payload in batch))
+        for (key, _), files in zip(batch, rendered):
+            # Tickets first: the sheet's presence is what marks a room as cached
+            await asyncio.to_thread(_write_file, RENDER_CACHE_DIR / f"{key}.tickets.pdf", files["tickets"])
+            await asyncio.to_thread(_write_file, RENDER_CACHE_DIR / f"{key}.sheet.pdf", files["sheet"])
+    return keys
+
+def _write_documents_zip(path: Path, entries: List[tuple]) -> None:
+    partial = path.with_name(path.name + ".partial")
+    # PDF content streams are already deflated, so store them as they are
+    with zipfile.ZipFile(partial, "w", compression=zipfile.ZIP_STORED) as archive:
+        for name, source in entries:
+            archive.write(source, name)
+    os.replace(partial, path)
+
+async def render_exam_documents(exam_id: str, job: Optional[JobContext] = None) -> dict:
+    exam, payloads = await _document_inputs(exam_id)
+    keys = await _render_rooms(payloads, job)
+    zip_path = RENDER_CACHE_DIR / f"exam-{_content_hash(keys)}.zip"
+    if not zip_path.exists():
+        entries = []
+        for key, payload in zip(keys, payloads):
+            name = _safe_filename(f"{payload['block'] or 'block'}-{payload['roomNumber'] or payload['roomId']}")
+            entries.append((f"hall-tickets/{name}.pdf", RENDER_CACHE_DIR / f"{key}.tickets.pdf"))
+            entries.append((f"room-sheets/{name}.pdf", RENDER_CACHE_DIR / f"{key}.sheet.pdf"))
+        await asyncio.to_thread(_write_documents_zip, zip_path, entries)
+    return {
+        "path": zip_path,
+        "filename": f"{_safe_filename(exam['title'])}_documents.zip",
+        "rooms": len(payloads),
+        "tickets": sum(len(payload["seats"]) for payload in payloads),
+    }
+
+@api_router.get("/exams/{exam_id}/documents")
+async def download_exam_documents(
+    exam_id: str,
+    job_options: JobOptions = Depends(get_job_options),
+    current_user: dict = Depends(get_current_user)
+):
+    """Zip of hall tickets and seating sheets for every room of the exam."""
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can download exam documents")
+    
+    if job_options.run_async:
+        # The job warms the cache; fetching this URL again afterwards is instant
+        return await job_runner.submit_response("exams.render_documents", current_user, {"examId": exam_id}, job_options)
+    rendered = await render_exam_documents(exam_id)
+    return FileResponse(rendered["path"], media_type="application/zip", filename=rendered["filename"])
+
+@api_router.get("/rooms/{room_id}/exam/{exam_id}/sheet.pdf")
+async def download_room_sheet(exam_id: str, room_id: str, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] not in ("admin", "invigilator"):
+        raise HTTPException(status_code=403, detail="Only staff can download seating sheets")
+    
+    exam, payloads = await _document_inputs(exam_id, room_id)
+    if not payloads:
+        raise HTTPException(status_code=404, detail="No seating for this room")
+    [key] = await _render_rooms(payloads)
+    return FileResponse(
+        RENDER_CACHE_DIR / f"{key}.sheet.pdf", media_type="application/pdf",
+        filename=f"{_safe_filename(exam['title'])}_{_safe_filename(payloads[0]['roomNumber'] or room_id)}.pdf",
+    )
+
+LAYOUT_CACHE_SIZE = _env_int("LAYOUT_CACHE_SIZE", 512)
+_layout_cache: "OrderedDict[str, str]" = OrderedDict()
+
+def _layout_columns(room: dict) -> int:
+    benches = max(room.get("benches") or 0, 1)
+    if room.get("columns"):
+        return room["columns"]
+    if room.get("rows"):
+        return -(-benches // room["rows"])
+    return math.ceil(math.sqrt(benches))
+
+@api_router.get("/rooms/{room_id}/exam/{exam_id}/layout.svg")
+async def room_layout_svg(
+    room_id: str,
+    exam_id: str,
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """Bench grid of a room for one exam: roll numbers, with seats coloured by attendance."""
+    if current_user["role"] not in ("admin", "invigilator"):
+        raise HTTPException(status_code=403, detail="Only staff can view seating layouts")
+    
+    bucket = await db.roomSeatings.find_one(
+        {"examSessionId": exam_id, "roomId": room_id}, {"_id": 0, "id": 1, "seats": 1, "free": 1, "updatedAt": 1}
+    )
+    room = await db.rooms.find_one({"id": room_id}, {"_id": 0})
+    if not bucket or not room:
+        raise HTTPException(status_code=404, detail="No seating for this room")
+    
+    # Every seat write bumps the bucket's updatedAt, so it versions the allocation
+    columns = _layout_columns(room)
+    etag = '"' + hashlib.sha1(
+        f"{bucket['id']}|{bucket.get('updatedAt')}|{room.get('roomNumber')}|{room.get('benches')}|{columns}".encode()
+    ).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+    cached = _layout_cache.get(etag)
+    if cached is not None:
+        _layout_cache.move_to_end(etag)
+        return Response(cached, media_type="image/svg+xml", headers=headers)
+    
+    students = await _find_by_ids(db.users, [seat["s"] for seat in bucket["seats"]], {"_id": 0, "id": 1, "rollNumber": 1})
+    slots: Dict[int, List[dict]] = {}
+    for seat in bucket["seats"]:
+        if not seat["s"]:
+            continue  # vacated; drawn from `free` below
+        roll = students.get(seat["s"], {}).get("rollNumber") or "?"
+        slots.setdefault(seat["b"], []).append({"position": seat["p"], "roll": roll, "attendance": seat.get("a") or "pending"})
+    for slot in bucket.get("free", []):
+        slots.setdefault(slot["b"], []).append({"position": slot["p"], "roll": None, "attendance": None})
+    for seats in slots.values():
+        seats.sort(key=lambda seat: seat["position"] or "")
+    
+    chunks: List[str] = []
+    
+    def stream():
+        for chunk in documents.iter_room_svg(f"Room {room.get('roomNumber', '')}", room.get("benches") or 0, columns, slots):
+            chunks.append(chunk)
+            yield chunk
+        _layout_cache[etag] = "".join(chunks)
+        while len(_layout_cache) > LAYOUT_CACHE_SIZE:
+            _layout_cache.popitem(last=False)
+    
+    return StreamingResponse(stream(), media_type="image/svg+xml", headers=headers)
+
 # ============ INVIGILATOR DUTY ROUTES ============
 
 @api_router.post("/duties", response_model=InvigilatorDuty)
@@ -1603,6 +4511,7 @@ async def create_duty(duty: InvigilatorDuty, current_user: dict = Depends(get_cu
     
     notification = Notification(
         userId=duty.invigilatorId,
+        examId=duty.examSessionId,
         message=f"You have been assigned to Room {room['roomNumber']} for {exam['title']} on {exam['date']}"
     )
     await db.notifications.insert_one(notification.model_dump())
@@ -1610,22 +4519,35 @@ async def create_duty(duty: InvigilatorDuty, current_user: dict = Depends(get_cu
     return duty
 
 @api_router.get("/duties/invigilator/{invigilator_id}")
-async def get_invigilator_duties(invigilator_id: str, current_user: dict = Depends(get_current_user)):
-    duties = await db.invigilatorDuties.find({"invigilatorId": invigilator_id}, {"_id": 0}).to_list(1000)
+async def get_invigilator_duties(
+    invigilator_id: str,
+    fields: FieldSelection = Depends(field_selection({
+        "": set(InvigilatorDuty.model_fields), "exam": EXAM_FIELDS, "room": ROOM_FIELDS, "block": BLOCK_FIELDS,
+    })),
+    current_user: dict = Depends(get_current_user)
+):
+    duties = await db.invigilatorDuties.find(
+        {"invigilatorId": invigilator_id}, fields.projection({"_id": 0}, links=("examSessionId", "roomId"))
+    ).to_list(1000)
     
-    # Enrich with exam and room details
+    # Enrich with exam and room details (batched lookups, not one query per duty)
+    exams, rooms, blocks = {}, {}, {}
+    if fields.wants("exam"):
+        exams = await _find_by_ids(db.examSessions, [d["examSessionId"] for d in duties], fields.projection({"_id": 0}, "exam"))
+    if fields.wants("room") or fields.wants("block"):
+        rooms, blocks = await _find_rooms_with_blocks(
+            [d["roomId"] for d in duties],
+            fields.fields("room"), fields.fields("block"),
+        )
     enriched = []
     for duty in duties:
-        exam = await db.examSessions.find_one({"id": duty["examSessionId"]}, {"_id": 0})
-        room = await db.rooms.find_one({"id": duty["roomId"]}, {"_id": 0})
-        block = await db.blocks.find_one({"id": room["blockId"]}, {"_id": 0}) if room else None
-        
-        enriched.append({
+        room = rooms.get(duty["roomId"])
+        enriched.append(fields.trim({
             **duty,
-            "exam": exam,
+            "exam": exams.get(duty["examSessionId"]),
             "room": room,
-            "block": block
-        })
+            "block": blocks.get(room["blockId"]) if room else None
+        }))
     
     return enriched
 
@@ -1639,17 +4561,24 @@ async def update_duty_status(duty_id: str, status: str, reason: Optional[str] =
     return {"message": "Duty status updated successfully"}
 
 @api_router.get("/duties/room/{room_id}/exam/{exam_id}")
-async def get_room_students(room_id: str, exam_id: str, current_user: dict = Depends(get_current_user)):
-    allocations = await db.allocations.find({"roomId": room_id, "examSessionId": exam_id}, {"_id": 0}).to_list(1000)
+async def get_room_students(
+    room_id: str,
+    exam_id: str,
+    fields: FieldSelection = Depends(field_selection({"": SEAT_FIELDS, "student": USER_FIELDS})),
+    current_user: dict = Depends(get_current_user)
+):
+    allocations = await find_allocations(exam_id, room_id)
     
     # Enrich with student details
+    students = {}
+    if fields.wants("student"):
+        students = await _find_by_ids(db.users, [a["studentId"] for a in allocations], fields.projection({"_id": 0, "password": 0}, "student"))
     enriched = []
     for alloc in allocations:
-        student = await db.users.find_one({"id": alloc["studentId"]}, {"_id": 0, "password": 0})
-        enriched.append({
+        enriched.append(fields.trim({
             **alloc,
-            "student": student
-        })
+            "student": students.get(alloc["studentId"])
+        }))
     
     return enriched
 
@@ -1658,15 +4587,551 @@ async def mark_attendance(allocation_id: str, attendance: str, current_user: dic
     if current_user["role"] != "invigilator":
         raise HTTPException(status_code=403, detail="Only invigilators can mark attendance")
     
-    await db.allocations.update_one({"id": allocation_id}, {"$set": {"attendance": attendance}})
+    bucket_id, _, index = allocation_id.rpartition(":")
+    if bucket_id and index.isdigit():
+        await db.roomSeatings.update_one({"id": bucket_id}, {"$set": {f"seats.{index}.a": attendance, "updatedAt": datetime.now(timezone.utc).isoformat()}})
+    else:
+        await db.allocations.update_one({"id": allocation_id}, {"$set": {"attendance": attendance}})  # unmigrated seat
     return {"message": "Attendance marked successfully"}
 
+# ============ QR CHECK-IN ============
+
+# Every seat on a student's exam card carries a signed check-in token, shown as a QR code:
+#   base64url("<seat id>|<exam id>|<student id>|<room id>|<bench>|<position>|<expiry>") "." base64url(mac)
+# The MAC is HMAC-SHA256 under a per-exam key derived from CHECKIN_SECRET, truncated to 16 bytes.
+# The server verifies a token without reading the database. An invigilator's device can fetch the
+# exam's key and verify scans offline too. Tokens expire CHECKIN_GRACE_MINUTES after the exam ends,
+# so a queue scanned offline can still be uploaded after the exam.
+
+CHECKIN_SECRET = os.environ.get("CHECKIN_SECRET") or SECRET_KEY
+CHECKIN_GRACE_MINUTES = _env_int("CHECKIN_GRACE_MINUTES", 120)
+CHECKIN_BATCH_MAX = 500
+_checkin_keys: Dict[str, bytes] = {}
+
+def checkin_key(exam_id: str) -> bytes:
+    key = _checkin_keys.get(exam_id)
+    if key is None:
+        key = _checkin_keys[exam_id] = hmac.new(CHECKIN_SECRET.encode(), f"checkin:{exam_id}".encode(), hashlib.sha256).digest()
+    return key
+
+def _b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+def _unb64(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+def checkin_token(seat: dict) -> Optional[str]:
+    """Signed token for a student exam card entry; None when it has no room or usable exam times."""
+    if not seat.get("roomId"):
+        return None
+    try:
+        _, end = exam_window(seat["exam"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    expiry = int((end - datetime(1970, 1, 1)).total_seconds()) + CHECKIN_GRACE_MINUTES * 60
+    payload = "|".join([
+        seat["id"], seat["examSessionId"], seat["studentId"], seat["roomId"],
+        str(seat["benchNumber"]), seat.get("seatPosition") or "", str(expiry),
+    ]).encode()
+    mac = hmac.new(checkin_key(seat["examSessionId"]), payload, hashlib.sha256).digest()[:16]
+    return f"{_b64(payload)}.{_b64(mac)}"
+
+def verify_checkin_token(token: str, now: Optional[float] = None) -> dict:
+    """Decode and check a token. Raises ValueError("invalid" | "expired") when it can't be used."""
+    try:
+        encoded, _, signature = token.partition(".")
+        payload = _unb64(encoded)
+        seat_id, exam_id, student_id, room_id, bench, position, expiry = payload.decode().split("|")
+        expected = hmac.new(checkin_key(exam_id), payload, hashlib.sha256).digest()[:16]
+        valid = hmac.compare_digest(expected, _unb64(signature))
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("invalid")
+    if not valid:
+        raise ValueError("invalid")
+    if int(expiry) < (time.time() if now is None else now):
+        raise ValueError("expired")
+    return {
+        "seatId": seat_id, "examId": exam_id, "studentId": student_id, "roomId": room_id,
+        "benchNumber": int(bench), "seatPosition": position or None,
+    }
+
+class CheckinBatch(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    tokens: List[str] = Field(..., max_length=CHECKIN_BATCH_MAX)
+    examId: Optional[str] = None  # reject scans for other exams
+    roomId: Optional[str] = None  # reject students at the wrong room
+
+async def exams_on_duty(user: dict, exam_ids) -> set:
+    """The exams in `exam_ids` the user may check students in for.
+
+    Admins may for every exam of their college; invigilators only for exams they hold a duty in.
+    """
+    wanted = list({exam_id for exam_id in exam_ids if exam_id})
+    if not wanted:
+        return set()
+    if user["role"] == "admin":
+        return set(await db.examSessions.distinct("id", {"id": {"$in": wanted}, "collegeId": user.get("collegeId")}))
+    if user["role"] != "invigilator":
+        return set()
+    query = {"invigilatorId": user["id"], "status": {"$ne": "declined"}}
+    allowed = set(await db.examInvigilators.distinct("examSessionId", {**query, "examSessionId": {"$in": wanted}}))
+    missing = [exam_id for exam_id in wanted if exam_id not in allowed]
+    if missing:  # a duty created by hand has no examInvigilators row
+        allowed.update(await db.invigilatorDuties.distinct("examSessionId", {**query, "examSessionId": {"$in": missing}}))
+    return allowed
+
+@api_router.get("/exams/{exam_id}/checkin_key")
+async def get_checkin_key(exam_id: str, current_user: dict = Depends(get_current_user)):
+    if exam_id not in await exams_on_duty(current_user, [exam_id]):
+        raise HTTPException(status_code=403, detail="Only the exam's invigilators can verify check-ins")
+    return {"examId": exam_id, "algorithm": "HMAC-SHA256/128", "key": _b64(checkin_key(exam_id))}
+
+@api_router.post("/checkin:batch")
+async def checkin_batch(batch: CheckinBatch, current_user: dict = Depends(get_current_user)):
+    """Mark every validly signed seat present in one write; report the rest by position in `tokens`."""
+    if current_user["role"] not in ("admin", "invigilator"):
+        raise HTTPException(status_code=403, detail="Only invigilators can mark attendance")
+
+    now = time.time()
+    verified = []
+    rejected = []
+    for index, token in enumerate(batch.tokens):
+        try:
+            seat = verify_checkin_token(token, now)
+        except ValueError as error:
+            rejected.append({"index": index, "reason": str(error)})
+            continue
+        if batch.examId and seat["examId"] != batch.examId:
+            rejected.append({"index": index, "reason": "wrong_exam"})
+        elif batch.roomId and seat["roomId"] != batch.roomId:
+            rejected.append({"index": index, "reason": "wrong_room", "roomId": seat["roomId"]})
+        else:
+            verified.append((index, seat))
+
+    # A valid token only proves the seat exists; the caller must also be on duty for its exam
+    on_duty = await exams_on_duty(current_user, [seat["examId"] for _, seat in verified])
+    seats: Dict[str, dict] = {}
+    for index, seat in verified:
+        if seat["examId"] not in on_duty:
+            rejected.append({"index": index, "reason": "not_on_duty"})
+        else:
+            seats[seat["seatId"]] = seat  # a student scanned twice is marked once
+    rejected.sort(key=lambda rejection: rejection["index"])
+
+    marked = 0
+    if seats:
+        updated_at = datetime.now(timezone.utc).isoformat()
+        operations = []
+        for seat_id, seat in seats.items():
+            bucket_id, _, position = seat_id.rpartition(":")
+            # The seat must still belong to the student; a moved or removed seat is reported as stale
+            operations.append(UpdateOne(
+                {"id": bucket_id, "examSessionId": seat["examId"], f"seats.{position}.s": seat["studentId"]},
+                {"$set": {f"seats.{position}.a": "present", "updatedAt": updated_at}},
+            ))
+        marked = (await db.roomSeatings.bulk_write(operations, ordered=False)).matched_count
+    return {"marked": marked, "stale": len(seats) - marked, "rejected": rejected}
+
+# ============ INVIGILATOR ASSIGNMENT ============
+
+def _exam_interval(exam: dict) -> tuple:
+    """(start, end) of an exam in minutes since the epoch, for overlap checks."""
+    epoch = datetime(1970, 1, 1)
+    return tuple(int((moment - epoch).total_seconds() // 60) for moment in exam_window(exam))
+
+class _Schedule:
+    """An invigilator's booked intervals, sorted by start.
+
+    Existing duties can overlap each other, so the nearest earlier interval isn't enough to decide
+    whether a window is free. As in CohortIndex, no booking is longer than `longest`: a check
+    bisects to the first interval starting at or after the window's end and walks back at most that far.
+    """
+
+    def __init__(self):
+        self.intervals: List[tuple] = []
+        self.longest = 0
+
+    def is_free(self, start: int, end: int) -> bool:
+        i = bisect.bisect_left(self.intervals, (end,))
+        while i > 0:
+            i -= 1
+            other_start, other_end = self.intervals[i]
+            if other_start + self.longest <= start:
+                break
+            if other_end > start:
+                return False
+        return True
+
+    def book(self, start: int, end: int) -> None:
+        bisect.insort(self.intervals, (start, end))
+        self.longest = max(self.longest, end - start)
+
+    def release(self, start: int, end: int) -> None:
+        self.intervals.remove((start, end))
+
+def assign_invigilators(
+    slots: List[dict],
+    invigilator_ids: List[str],
+    busy: Optional[Dict[str, List[tuple]]] = None,
+    declined: Optional[set] = None,
+    improvement_passes: int = 2,
+) -> dict:
+    """
+    Assign one invigilator to each slot, minimising the maximum load (minutes on duty).
+
+    `slots` are {"examSessionId", "roomId", "start", "end"}; `busy` maps invigilator -> intervals
+    they already cover (their load counts too); `declined` holds (invigilatorId, examSessionId)
+    pairs that must not be assigned. A heap-based greedy pass hands each slot, longest first, to
+    the least-loaded invigilator who is free; improvement passes then move or swap slots off the
+    most loaded invigilators while that lowers their load without pushing anyone above it.
+    """
+    busy = busy or {}
+    declined = declined or set()
+    schedules = {inv: _Schedule() for inv in invigilator_ids}
+    load = {inv: 0 for inv in invigilator_ids}
+    for inv, intervals in busy.items():
+        if inv in schedules:
+            for start, end in intervals:
+                schedules[inv].book(start, end)
+                load[inv] += end - start
+
+    heap = [(load[inv], inv) for inv in invigilator_ids]
+    heapq.heapify(heap)
+    assignment: Dict[int, str] = {}
+    unassigned = []
+    # Longest slots first (LPT), which keeps the maximum load close to optimal
+    for index in sorted(range(len(slots)), key=lambda i: (slots[i]["start"] - slots[i]["end"], slots[i]["start"])):
+        slot = slots[index]
+        skipped = []
+        chosen = None
+        while heap:
+            current_load, inv = heapq.heappop(heap)
+            if current_load != load[inv]:
+                continue  # stale entry
+            if (inv, slot["examSessionId"]) not in declined and schedules[inv].is_free(slot["start"], slot["end"]):
+                chosen = inv
+                break
+            skipped.append((current_load, inv))
+        for entry in skipped:
+            heapq.heappush(heap, entry)
+        if chosen is None:
+            unassigned.append(index)
+            continue
+        assignment[index] = chosen
+        schedules[chosen].book(slot["start"], slot["end"])
+        load[chosen] += slot["end"] - slot["start"]
+        heapq.heappush(heap, (load[chosen], chosen))
+
+    def can_take(inv: str, index: int) -> bool:
+        slot = slots[index]
+        return (inv, slot["examSessionId"]) not in declined and schedules[inv].is_free(slot["start"], slot["end"])
+
+    def reassign(index: int, giver: str, receiver: str) -> None:
+        slot = slots[index]
+        duration = slot["end"] - slot["start"]
+        schedules[giver].release(slot["start"], slot["end"])
+        schedules[receiver].book(slot["start"], slot["end"])
+        load[giver] -= duration
+        load[receiver] += duration
+        assignment[index] = receiver
+
+    def duration(index: int) -> int:
+        return slots[index]["end"] - slots[index]["start"]
+
+    def improve(giver: str, slots_of: Dict[str, List[int]]) -> bool:
+        # Move one of the giver's slots to a less loaded invigilator, or swap it for a shorter one,
+        # whenever both sides end up below the giver's current load
+        for receiver in sorted(load, key=load.get):
+            if receiver == giver or load[receiver] >= load[giver]:
+                break
+            for x in slots_of.get(giver, []):
+                if assignment[x] == giver and load[receiver] + duration(x) < load[giver] and can_take(receiver, x):
+                    reassign(x, giver, receiver)
+                    return True
+            for x in slots_of.get(giver, []):
+                for y in slots_of.get(receiver, []):
+                    gain = duration(x) - duration(y)
+                    if assignment[x] != giver or assignment[y] != receiver or gain <= 0 or load[receiver] + gain >= load[giver]:
+                        continue
+                    reassign(x, giver, receiver)
+                    if can_take(giver, y):
+                        reassign(y, receiver, giver)
+                        return True
+                    reassign(x, receiver, giver)
+        return False
+
+    for _ in range(improvement_passes):
+        slots_of: Dict[str, List[int]] = {}
+        for index, inv in assignment.items():
+            slots_of.setdefault(inv, []).append(index)
+        improved = False
+        for giver in sorted(slots_of, key=load.get, reverse=True):
+            while improve(giver, slots_of):
+                improved = True
+                slots_of = {}
+                for index, inv in assignment.items():
+                    slots_of.setdefault(inv, []).append(index)
+        if not improved:
+            break
+
+    loads = list(load.values()) or [0]
+    return {
+        "assignments": [{**slots[i], "invigilatorId": inv} for i, inv in sorted(assignment.items())],
+        "unassigned": [slots[i] for i in unassigned],
+        "maxLoadMinutes": max(loads),
+        "minLoadMinutes": min(loads),
+        "load": load,
+    }
+
+class AutoAssignRequest(BaseModel):
+    examIds: List[str]
+    roomIds: Optional[List[str]] = None  # default: each exam's allocated rooms
+    invigilatorIds: Optional[List[str]] = None  # default: every invigilator of the college
+    improvementPasses: int = 2
+    replaceExisting: bool = False
+
+@api_router.post("/invigilators/auto_assign")
+async def auto_assign_invigilators(
+    request: AutoAssignRequest,
+    dry_run: bool = Query(False),
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can assign invigilators")
+    college_id = current_user["collegeId"]
+    
+    exams = await db.examSessions.find(
+        {"id": {"$in": request.examIds}, "collegeId": college_id, "deletedAt": None}, {"_id": 0}
+    ).to_list(None)
+    if not exams:
+        raise HTTPException(status_code=404, detail="No exams found")
+    exam_ids = [exam["id"] for exam in exams]
+    
+    # Only this college's invigilators can be assigned, whatever ids the request names
+    invigilator_query = {"collegeId": college_id, "role": "invigilator"}
+    if request.invigilatorIds is not None:
+        invigilator_query["id"] = {"$in": request.invigilatorIds}
+    invigilator_ids = await db.users.distinct("id", invigilator_query)
+    
+    # Rooms per exam: the ones given, else the exam's allocated/seated rooms
+    if request.roomIds is not None:
+        # Only this college's rooms; unknown ids and other colleges' rooms are dropped
+        requested_rooms, room_blocks = await _find_rooms_with_blocks(request.roomIds, [], ["collegeId"])
+        room_ids = [
+            room_id for room_id in dict.fromkeys(request.roomIds)
+            if room_id in requested_rooms
+            and room_blocks.get(requested_rooms[room_id]["blockId"], {}).get("collegeId") == college_id
+        ]
+        rooms_by_exam = {exam_id: list(room_ids) for exam_id in exam_ids}
+    else:
+        rooms_by_exam = {exam_id: [] for exam_id in exam_ids}
+        exam_rooms = await db.examRooms.find({"examSessionId": {"$in": exam_ids}}, {"_id": 0, "examSessionId": 1, "roomId": 1}).to_list(None)
+        seated_rooms = await db.roomSeatings.find({"examSessionId": {"$in": exam_ids}}, {"_id": 0, "examSessionId": 1, "roomId": 1}).to_list(None)
+        for doc in exam_rooms + seated_rooms:
+            if doc["roomId"] not in rooms_by_exam[doc["examSessionId"]]:
+                rooms_by_exam[doc["examSessionId"]].append(doc["roomId"])
+    
+    # Existing duties: inside these exams they are kept (unless replaced); everywhere they block time
+    existing = await db.examInvigilators.find({"invigilatorId": {"$in": invigilator_ids}}, {"_id": 0}).to_list(None)
+    existing += await db.examInvigilators.find(
+        {"examSessionId": {"$in": exam_ids}, "invigilatorId": {"$nin": invigilator_ids}}, {"_id": 0}
+    ).to_list(None)
+    other_exam_ids = {duty["examSessionId"] for duty in existing} - set(exam_ids)
+    other_exams = await _find_by_ids(
+        db.examSessions, other_exam_ids, {"_id": 0, "id": 1, "start": 1, "end": 1, "date": 1, "startTime": 1, "endTime": 1}
+    )
+    intervals = {}
+    for exam in [*exams, *other_exams.values()]:
+        try:
+            intervals[exam["id"]] = _exam_interval(exam)
+        except (KeyError, TypeError, ValueError):
+            continue  # a legacy exam without usable times blocks no one and can't be planned
+    
+    busy: Dict[str, List[tuple]] = {}
+    covered = set()
+    for duty in existing:
+        if duty["examSessionId"] in rooms_by_exam:
+            if request.replaceExisting and duty["roomId"] in rooms_by_exam[duty["examSessionId"]]:
+                continue
+            covered.add((duty["examSessionId"], duty["roomId"]))
+        if duty["examSessionId"] in intervals:
+            busy.setdefault(duty["invigilatorId"], []).append(intervals[duty["examSessionId"]])
+    
+    declined_duties = await db.invigilatorDuties.find(
+        {"examSessionId": {"$in": exam_ids}, "status": "declined"}, {"_id": 0, "invigilatorId": 1, "examSessionId": 1}
+    ).to_list(None)
+    declined = {(duty["invigilatorId"], duty["examSessionId"]) for duty in declined_duties}
+    
+    slots = [
+        {"examSessionId": exam_id, "roomId": room_id, "start": intervals[exam_id][0], "end": intervals[exam_id][1]}
+        for exam_id, room_ids in rooms_by_exam.items() for room_id in room_ids
+        if exam_id in intervals and (exam_id, room_id) not in covered
+    ]
+    # CPU-bound for large colleges; keep it off the event loop
+    plan = await asyncio.to_thread(
+        assign_invigilators, slots, invigilator_ids, busy, declined, request.improvementPasses
+    )
+    for entry in plan["assignments"] + plan["unassigned"]:
+        entry.pop("start")
+        entry.pop("end")
+    plan["skippedExamIds"] = [exam_id for exam_id in exam_ids if exam_id not in intervals]
+    plan["dryRun"] = dry_run
+    if dry_run or not plan["assignments"]:
+        return plan
+    
+    if request.replaceExisting:
+        # Exactly the (exam, room) pairs being re-planned; declined duties stay on record
+        replaced = {"$or": [{"examSessionId": slot["examSessionId"], "roomId": slot["roomId"]} for slot in slots]}
+        await db.examInvigilators.delete_many(replaced)
+        await db.invigilatorDuties.delete_many({**replaced, "status": {"$ne": "declined"}})
+        await db.examRooms.update_many(replaced, {"$set": {"invigilatorId": None}})
+    await db.examInvigilators.insert_many(exam_invigilator_records.build(
+        {"examSessionId": a["examSessionId"], "invigilatorId": a["invigilatorId"], "roomId": a["roomId"]}
+        for a in plan["assignments"]
+    ))
+    await db.invigilatorDuties.insert_many(duty_records.build(
+        {"examSessionId": a["examSessionId"], "invigilatorId": a["invigilatorId"], "roomId": a["roomId"]}
+        for a in plan["assignments"]
+    ))
+    await db.examRooms.bulk_write([
+        UpdateOne({"examSessionId": a["examSessionId"], "roomId": a["roomId"]}, {"$set": {"invigilatorId": a["invigilatorId"]}})
+        for a in plan["assignments"]
+    ])
+    
+    exams_by_id = {exam["id"]: exam for exam in exams}
+    rooms_by_id = await _find_by_ids(db.rooms, {a["roomId"] for a in plan["assignments"]}, {"_id": 0, "id": 1, "roomNumber": 1})
+    await db.notifications.insert_many(notification_records.build(
+        {
+            "userId": a["invigilatorId"],
+            "examId": a["examSessionId"],
+            "message": f"You have been assigned to Room {rooms_by_id.get(a['roomId'], {}).get('roomNumber', 'Unknown')} for {exams_by_id[a['examSessionId']]['title']} on {exams_by_id[a['examSessionId']]['date']}",
+        }
+        for a in plan["assignments"]
+    ))
+    return plan
+
 # ============ ATTENDANCE RESTRICTION ROUTES ============
 
+ELIGIBILITY_BANDS = ("blocked", "conditional", "eligible")
+
+class EligibilityPolicy(BaseModel):
+    """Attendance thresholds for an exam: below `blockedBelow` is blocked, below `conditionalBelow`
+    needs an admin's grant, anything else is allowed automatically."""
+    model_config = ConfigDict(extra="ignore")
+    blockedBelow: float = Field(65.0, ge=0, le=100)
+    conditionalBelow: float = Field(75.0, ge=0, le=100)
+
+    @model_validator(mode="after")
+    def _ordered(self):
+        if self.conditionalBelow < self.blockedBelow:
+            raise ValueError("conditionalBelow must not be lower than blockedBelow")
+        return self
+
+def _exam_policy(exam: dict) -> Optional[EligibilityPolicy]:
+    # Exams without a policy keep the original behaviour: every student in the CSV is blocked
+    policy = exam.get("eligibilityPolicy")
+    return EligibilityPolicy(**policy) if policy else None
+
+def eligibility_band(policy: Optional[EligibilityPolicy], percentage: float) -> str:
+    if policy is None or percentage < policy.blockedBelow:
+        return "blocked"
+    if percentage < policy.conditionalBelow:
+        return "conditional"
+    return "eligible"
+
+def _band_expression(policy: Optional[EligibilityPolicy]) -> Any:
+    """`eligibility_band` as an aggregation expression, so a whole exam is re-banded server-side."""
+    if policy is None:
+        return {"$literal": "blocked"}
+    return {"$switch": {
+        "branches": [
+            {"case": {"$lt": ["$attendancePercentage", policy.blockedBelow]}, "then": "blocked"},
+            {"case": {"$lt": ["$attendancePercentage", policy.conditionalBelow]}, "then": "conditional"},
+        ],
+        "default": "eligible",
+    }}
+
+async def evaluate_eligibility(exam_id: str, policy: Optional[EligibilityPolicy]) -> dict:
+    """Re-band every restriction of the exam in one update; seat anyone who became eligible and
+    unseat anyone who lost it."""
+    # Students whose isAllowed is about to flip, either way; manual grants never lose it
+    losing: Dict[str, Any] = {"isAllowed": True, "grantedBy": None}
+    flips = [losing]
+    if policy is not None:
+        losing["attendancePercentage"] = {"$lt": policy.conditionalBelow}
+        flips.append({"isAllowed": False, "attendancePercentage": {"$gte": policy.conditionalBelow}})
+    changing = await db.examAttendanceRestrictions.find(
+        {"examId": exam_id, "$or": flips}, {"_id": 0, "studentId": 1, "isAllowed": 1}
+    ).to_list(None)
+    newly_allowed = [row["studentId"] for row in changing if not row["isAllowed"]]
+    newly_blocked = [row["studentId"] for row in changing if row["isAllowed"]]
+    result = await db.examAttendanceRestrictions.update_many({"examId": exam_id}, [
+        {"$set": {"band": _band_expression(policy), "updatedAt": datetime.now(timezone.utc).isoformat()}},
+        # Manual grants stay in force whatever band the student lands in
+        {"$set": {"isAllowed": {"$or": [
+            {"$eq": ["$band", "eligible"]},
+            {"$ne": [{"$ifNull": ["$grantedBy", None]}, None]},
+        ]}}},
+    ])
+    unseated = []
+    if newly_blocked:
+        exam = await db.examSessions.find_one({"id": exam_id}, {"_id": 0, "id": 1, "title": 1})
+        unseated = await unseat_students(exam, newly_blocked)
+    seating = await seat_newly_allowed(exam_id, newly_allowed)
+    return {"evaluated": result.matched_count, "seating": seating, "unseated": unseated}
+
+async def eligibility_page(
+    exam_id: str, branch: Optional[str], year: Optional[int], band: Optional[str], skip: int, limit: int
+) -> dict:
+    """Restrictions joined to their students in a single aggregation.
+
+    Branch and year filter everything; `band` only narrows the page and total, so the band
+    counts still describe the whole filtered list.
+    """
+    student_match: Dict[str, Any] = {}
+    if branch:
+        student_match["student.profile.branch"] = branch
+    if year is not None:
+        student_match["student.profile.year"] = year
+    band_match = [{"$match": {"band": band}}] if band else []
+    pipeline = [
+        {"$match": {"examId": exam_id}},
+        {"$lookup": {"from": "users", "localField": "studentId", "foreignField": "id", "as": "student"}},
+        {"$unwind": "$student"},
+        {"$match": student_match},
+        {"$set": {"band": {"$ifNull": ["$band", "blocked"]}}},
+        {"$facet": {
+            "counts": [{"$group": {"_id": "$band", "count": {"$sum": 1}}}],
+            "total": band_match + [{"$count": "count"}],
+            "items": band_match + [
+                {"$sort": {"student.rollNumber": 1}},
+                {"$skip": skip},
+                {"$limit": limit},
+                {"$project": {
+                    "_id": 0, "id": 1, "examId": 1, "studentId": 1, "attendancePercentage": 1, "band": 1,
+                    "isAllowed": 1, "grantedBy": 1, "createdAt": 1, "updatedAt": 1,
+                    "studentName": "$student.profile.name",
+                    "rollNumber": "$student.rollNumber",
+                    "branch": "$student.profile.branch",
+                    "year": "$student.profile.year",
+                }},
+            ],
+        }},
+    ]
+    [result] = await db.examAttendanceRestrictions.aggregate(pipeline).to_list(1)
+    counts = dict.fromkeys(ELIGIBILITY_BANDS, 0)
+    counts.update({row["_id"]: row["count"] for row in result["counts"]})
+    return {
+        "total": result["total"][0]["count"] if result["total"] else 0,
+        "counts": counts,
+        "items": result["items"],
+    }
+
 @api_router.post("/exams/{exam_id}/upload_attendance_csv")
 async def upload_attendance_csv(
     exam_id: str,
     file: UploadFile = File(...),
+    job_options: JobOptions = Depends(get_job_options),
     current_user: dict = Depends(get_current_user)
 ):
     if current_user["role"] != "admin":
@@ -1684,14 +5149,25 @@ async def upload_attendance_csv(
     if not (file.filename.lower().endswith('.csv')):
         raise HTTPException(status_code=400, detail=f"Only CSV files are allowed. Received: {file.filename}")
     
+    # Read CSV
+    contents = await file.read()
+    if not contents:
+        raise HTTPException(status_code=400, detail="File is empty")
+    
+    logger.info(f"Reading CSV file: {file.filename}, Size: {len(contents)} bytes")
+    
+    if job_options.run_async:
+        return await job_runner.submit_response(
+            "exams.attendance_csv", current_user,
+            {"examId": exam_id, "filename": file.filename, "csv": contents.decode("latin-1")},
+            job_options
+        )
+    return await _process_attendance_csv(exam, contents)
+
+async def _process_attendance_csv(exam: dict, contents: bytes, job: Optional[JobContext] = None) -> dict:
+    """Parse an attendance CSV and upsert the exam's attendance restrictions."""
+    exam_id = exam["id"]
     try:
-        # Read and parse CSV
-        contents = await file.read()
-        if not contents:
-            raise HTTPException(status_code=400, detail="File is empty")
-        
-        logger.info(f"Reading CSV file: {file.filename}, Size: {len(contents)} bytes")
-        
         # Try different encodings
         try:
             csv_content = io.StringIO(contents.decode('utf-8'))
@@ -1728,7 +5204,6 @@ async def upload_attendance_csv(
             )
         
         restrictions_created = 0
-        errors = []
         
         # Create a mapping for case-insensitive column access
         column_map = {}
@@ -1740,6 +5215,9 @@ async def upload_attendance_csv(
         
         logger.info(f"Column mapping: {column_map}")
         
+        # First pass: parse and validate every row without touching the database
+        parsed_rows = []
+        row_errors = {}
         for row_idx, row in enumerate(reader, start=2):  # Start at 2 because row 1 is header
             try:
                 # Use mapped column names or original
@@ -1747,7 +5225,7 @@ async def upload_attendance_csv(
                 attendance_str = row.get(column_map.get("Attendance %", "Attendance %"), "").strip()
                 
                 if not roll_number:
-                    errors.append(f"Row {row_idx}: Roll Number is empty")
+                    row_errors[row_idx] = f"Row {row_idx}: Roll Number is empty"
                     continue
                 
                 # Parse attendance percentage
@@ -1755,52 +5233,73 @@ async def upload_attendance_csv(
                 try:
                     attendance_percent = float(attendance_str)
                 except ValueError:
-                    errors.append(f"Row {row_idx}: Invalid attendance percentage: {attendance_str}")
+                    row_errors[row_idx] = f"Row {row_idx}: Invalid attendance percentage: {attendance_str}"
                     continue
                 
-                # Find student
-                student = await db.users.find_one({
-                    "rollNumber": roll_number,
-                    "collegeId": exam["collegeId"],
-                    "role": "student"
-                })
-                
-                if not student:
-                    errors.append(f"Row {row_idx}: Student not found with roll number '{roll_number}'")
-                    continue
-                
-                # Check if restriction already exists
-                existing = await db.examAttendanceRestrictions.find_one({
-                    "examId": exam_id,
-                    "studentId": student["id"]
-                })
-                
-                if existing:
-                    # Update existing restriction
-                    await db.examAttendanceRestrictions.update_one(
-                        {"id": existing["id"]},
-                        {"$set": {
-                            "attendancePercentage": attendance_percent,
-                            "updatedAt": datetime.now(timezone.utc).isoformat()
-                        }}
-                    )
-                    restrictions_created += 1
-                else:
-                    # Create new restriction
-                    restriction = ExamAttendanceRestriction(
-                        examId=exam_id,
-                        studentId=student["id"],
-                        attendancePercentage=attendance_percent,
-                        isAllowed=False
-                    )
-                    await db.examAttendanceRestrictions.insert_one(restriction.model_dump())
-                    restrictions_created += 1
-                
+                parsed_rows.append((row_idx, roll_number, attendance_percent))
             except Exception as e:
-                errors.append(f"Row {row_idx}: Error - {str(e)}")
+                row_errors[row_idx] = f"Row {row_idx}: Error - {str(e)}"
                 logger.error(f"Error processing row {row_idx}: {str(e)}")
                 continue
         
+        # Resolve all students and existing restrictions with one query each
+        roll_numbers = list({roll for _, roll, _ in parsed_rows})
+        students = await db.users.find(
+            {"rollNumber": {"$in": roll_numbers}, "collegeId": exam["collegeId"], "role": "student"},
+            {"_id": 0, "id": 1, "rollNumber": 1}
+        ).to_list(len(roll_numbers) or 1)
+        student_by_roll = {}
+        for student in students:
+            student_by_roll.setdefault(student["rollNumber"], student)
+        existing_restrictions = await db.examAttendanceRestrictions.find(
+            {"examId": exam_id, "studentId": {"$in": [st["id"] for st in student_by_roll.values()]}},
+            {"_id": 0, "studentId": 1, "grantedBy": 1}
+        ).to_list(len(student_by_roll) or 1)
+        granted_by = {r["studentId"]: r.get("grantedBy") for r in existing_restrictions}
+        policy = _exam_policy(exam)
+        
+        operations = []
+        new_restrictions: Dict[str, dict] = {}  # studentId -> restriction to insert; a repeated row overwrites it
+        now = datetime.now(timezone.utc).isoformat()
+        for row_idx, roll_number, attendance_percent in parsed_rows:
+            student = student_by_roll.get(roll_number)
+            if not student:
+                row_errors[row_idx] = f"Row {row_idx}: Student not found with roll number '{roll_number}'"
+                continue
+            
+            band = eligibility_band(policy, attendance_percent)
+            if student["id"] in new_restrictions:
+                new_restrictions[student["id"]].update(attendancePercentage=attendance_percent, band=band, isAllowed=band == "eligible")
+            elif student["id"] in granted_by:
+                # Update existing restriction; a manual grant survives a re-upload
+                operations.append(UpdateOne(
+                    {"examId": exam_id, "studentId": student["id"]},
+                    {"$set": {
+                        "attendancePercentage": attendance_percent,
+                        "band": band,
+                        "isAllowed": band == "eligible" or granted_by[student["id"]] is not None,
+                        "updatedAt": now,
+                    }}
+                ))
+            else:
+                # Create new restriction
+                new_restrictions[student["id"]] = {
+                    "examId": exam_id,
+                    "studentId": student["id"],
+                    "attendancePercentage": attendance_percent,
+                    "band": band,
+                    "isAllowed": band == "eligible",
+                }
+            restrictions_created += 1
+        
+        if job:
+            job.checkpoint()
+            await job.progress(len(parsed_rows), len(parsed_rows), "Saving restrictions")
+        operations.extend(InsertOne(record) for record in restriction_records.build(list(new_restrictions.values())))
+        if operations:
+            await db.examAttendanceRestrictions.bulk_write(operations, ordered=True)
+        errors = [row_errors[idx] for idx in sorted(row_errors)]
+        
         if errors:
             logger.warning(f"CSV upload completed with {len(errors)} errors. Processed: {restrictions_created}")
         
@@ -1818,34 +5317,58 @@ async def upload_attendance_csv(
         raise HTTPException(status_code=400, detail=f"Failed to process CSV: {str(e)}")
 
 @api_router.get("/exams/{exam_id}/restricted_students")
-async def get_restricted_students(exam_id: str, current_user: dict = Depends(get_current_user)):
+async def get_restricted_students(
+    exam_id: str,
+    branch: Optional[str] = None,
+    year: Optional[int] = None,
+    band: Optional[str] = Query(None, pattern="^(blocked|conditional|eligible)$"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=10000),
+    current_user: dict = Depends(get_current_user)
+):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Only admins can view restricted students")
     
-    # Get all restrictions for this exam
-    restrictions = await db.examAttendanceRestrictions.find(
-        {"examId": exam_id},
-        {"_id": 0}
-    ).to_list(1000)
+    page = await eligibility_page(exam_id, branch, year, band, skip, limit)
+    return page["items"]
+
+@api_router.get("/exams/{exam_id}/eligibility")
+async def get_eligibility(
+    exam_id: str,
+    branch: Optional[str] = None,
+    year: Optional[int] = None,
+    band: Optional[str] = Query(None, pattern="^(blocked|conditional|eligible)$"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: dict = Depends(get_current_user)
+):
+    """One page of the exam's restriction list plus per-band counts for the branch/year filter."""
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can view eligibility")
     
-    # Enrich with student details
-    enriched = []
-    for restriction in restrictions:
-        student = await db.users.find_one(
-            {"id": restriction["studentId"]},
-            {"_id": 0, "password": 0}
-        )
-        
-        if student:
-            enriched.append({
-                **restriction,
-                "studentName": student["profile"]["name"],
-                "rollNumber": student["rollNumber"],
-                "branch": student["profile"]["branch"],
-                "year": student["profile"]["year"]
-            })
+    exam = await db.examSessions.find_one({"id": exam_id}, {"_id": 0, "eligibilityPolicy": 1})
+    if not exam:
+        raise HTTPException(status_code=404, detail="Exam not found")
+    page = await eligibility_page(exam_id, branch, year, band, skip, limit)
+    return {"policy": exam.get("eligibilityPolicy"), "skip": skip, "limit": limit, **page}
+
+@api_router.put("/exams/{exam_id}/eligibility_policy")
+async def set_eligibility_policy(
+    exam_id: str,
+    policy: EligibilityPolicy,
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can change the eligibility policy")
     
-    return enriched
+    result = await db.examSessions.update_one(
+        {"id": exam_id}, {"$set": {"eligibilityPolicy": policy.model_dump()}}
+    )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="Exam not found")
+    
+    outcome = await evaluate_eligibility(exam_id, policy)
+    return {"policy": policy.model_dump(), **outcome}
 
 @api_router.post("/exams/{exam_id}/grant_permission/{student_id}")
 async def grant_permission(
@@ -1874,13 +5397,17 @@ async def grant_permission(
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Restriction not found")
     
-    return {"message": "Permission granted successfully"}
+    # If seats were already allocated, seat just this student instead of re-running allocation
+    seating = await seat_newly_allowed(exam_id, [student_id])
+    return {"message": "Permission granted successfully", "seating": seating}
 
 @api_router.post("/exams/{exam_id}/grant_all_permissions")
 async def grant_all_permissions(exam_id: str, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Only admins can grant permissions")
     
+    newly_allowed = await db.examAttendanceRestrictions.distinct("studentId", {"examId": exam_id, "isAllowed": False})
+    
     # Update all restrictions for this exam
     result = await db.examAttendanceRestrictions.update_many(
         {
@@ -1896,9 +5423,11 @@ async def grant_all_permissions(exam_id: str, current_user: dict = Depends(get_c
         }
     )
     
+    seating = await seat_newly_allowed(exam_id, newly_allowed)
     return {
         "message": f"Granted permissions to {result.modified_count} students",
-        "count": result.modified_count
+        "count": result.modified_count,
+        "seating": seating
     }
 
 # ============ INCIDENT REPORTS ============
@@ -1923,8 +5452,12 @@ async def get_exam_incidents(exam_id: str, current_user: dict = Depends(get_curr
 # ============ NOTIFICATION ROUTES ============
 
 @api_router.get("/notifications/{user_id}")
-async def get_notifications(user_id: str, current_user: dict = Depends(get_current_user)):
-    notifications = await db.notifications.find({"userId": user_id}, {"_id": 0}).sort("createdAt", -1).to_list(1000)
+async def get_notifications(
+    user_id: str,
+    fields: FieldSelection = Depends(field_selection({"": set(Notification.model_fields)})),
+    current_user: dict = Depends(get_current_user)
+):
+    notifications = await read_db.notifications.find({"userId": user_id}, fields.projection({"_id": 0})).sort("createdAt", -1).to_list(1000)
     return notifications
 
 @api_router.put("/notifications/{notification_id}/read")
@@ -1958,6 +5491,134 @@ async def get_stats(college_id: str, current_user: dict = Depends(get_current_us
         "totalStaff": total_staff
     }
 
+# ============ ARCHIVE ROUTES ============
+
+@api_router.post("/archive/run")
+async def run_archival(
+    job_options: JobOptions = Depends(get_job_options),
+    current_user: dict = Depends(get_current_user)
+):
+    """Archive this college's exams now instead of waiting for the periodic run."""
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can archive exams")
+    
+    if job_options.run_async:
+        return await job_runner.submit_response("exams.archive", current_user, {}, job_options)
+    return await archive_finished_exams(current_user["collegeId"])
+
+async def _archived_exam(exam_id: str, current_user: dict) -> dict:
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can read archives")
+    exam = await db.examSessions.find_one({"id": exam_id}, {"_id": 0})
+    if not exam:
+        raise HTTPException(status_code=404, detail="Exam not found")
+    if exam["collegeId"] != current_user.get("collegeId"):
+        raise HTTPException(status_code=403, detail="You can only read archives of your own college")
+    if not exam.get("archive"):
+        raise HTTPException(status_code=409, detail="Exam is not archived")
+    return exam
+
+@api_router.get("/archive/exams/{exam_id}")
+async def get_archived_exam(
+    exam_id: str,
+    collection: Optional[str] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=10000),
+    current_user: dict = Depends(get_current_user)
+):
+    """Read-through for audits: the summary plus archived records, straight from the archive file."""
+    exam = await _archived_exam(exam_id, current_user)
+    rows = await read_archive(exam, collection, skip, limit)
+    return {"exam": exam, "records": [{"collection": c, "document": doc} for c, doc in rows]}
+
+@api_router.post("/archive/exams/{exam_id}/restore")
+async def restore_archived_exam(exam_id: str, current_user: dict = Depends(get_current_user)):
+    exam = await _archived_exam(exam_id, current_user)
+    restored = await restore_exam(exam)
+    return {"message": "Exam restored successfully", "restored": restored}
+
+# ============ JOB ROUTES ============
+
+@job_runner.handler("exams.allocate_seats")
+async def _allocate_seats_job(job: JobContext):
+    return await _allocate_seats(job.params["examId"], job.params["roomIds"], job)
+
+@job_runner.handler("students.bulk_import", transient_params=("students",))
+async def _bulk_import_job(job: JobContext):
+    # Validated when the job was submitted
+    return await _create_students_bulk([Student.model_construct(**s) for s in job.params["students"]], job)
+
+@job_runner.handler("exams.attendance_csv", transient_params=("csv",))
+async def _attendance_csv_job(job: JobContext):
+    exam = await db.examSessions.find_one({"id": job.params["examId"]}, {"_id": 0})
+    if not exam:
+        raise HTTPException(status_code=404, detail="Exam not found")
+    return await _process_attendance_csv(exam, job.params["csv"].encode("latin-1"), job)
+
+@job_runner.handler("exams.delete")
+async def _delete_exam_job(job: JobContext):
+    return await _delete_exam(job.params["examId"], job)
+
+@job_runner.handler("cascade.purge")
+async def _cascade_purge_job(job: JobContext):
+    deleted = await purge_tombstoned(job.params["kind"], job.params["ids"], job)
+    return {"deleted": deleted}
+
+@job_runner.handler("exams.archive")
+async def _archive_job(job: JobContext):
+    return await archive_finished_exams(job.college_id, job)
+
+@job_runner.handler("exams.render_documents")
+async def _render_documents_job(job: JobContext):
+    rendered = await render_exam_documents(job.params["examId"], job)
+    return {
+        "filename": rendered["filename"], "rooms": rendered["rooms"], "tickets": rendered["tickets"],
+        "download": f"/api/exams/{job.params['examId']}/documents",
+    }
+
+@job_runner.handler("exams.export_allocations")
+async def _export_allocations_job(job: JobContext):
+    return await _build_allocation_export(job.params["examId"], job.params.get("format", "excel"), job)
+
+async def _get_job_for_user(job_id: str, current_user: dict, projection: Dict[str, int]) -> dict:
+    job = await db.jobs.find_one({"id": job_id}, projection)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if current_user["role"] != "admin" or current_user.get("collegeId") != job["collegeId"]:
+        raise HTTPException(status_code=403, detail="You can only view jobs of your own college")
+    return job
+
+@api_router.get("/jobs/{job_id}")
+async def get_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    job = await _get_job_for_user(job_id, current_user, {"_id": 0, "params": 0, "resultFile": 0})
+    return _public_job(job)
+
+@api_router.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    job = await _get_job_for_user(job_id, current_user, {"_id": 0, "collegeId": 1, "status": 1})
+    if job["status"] in JOB_TERMINAL_STATES:
+        raise HTTPException(status_code=409, detail=f"Job already {job['status']}")
+    job = await job_runner.cancel(job_id)
+    return _public_job(job)
+
+@api_router.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str, current_user: dict = Depends(get_current_user)):
+    job = await _get_job_for_user(job_id, current_user, {"_id": 0, "collegeId": 1, "status": 1, "result": 1, "resultFile": 1})
+    if job["status"] != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    file_result = job.get("resultFile")
+    if file_result and "content" in file_result:  # stored inline by earlier versions
+        return _file_response(bytes(file_result["content"]), file_result["filename"], file_result["content_type"])
+    if file_result:
+        path = JOB_RESULTS_DIR / file_result["path"]
+        if not path.exists():
+            raise HTTPException(status_code=410, detail="The result file is no longer available; run the job again")
+        return FileResponse(
+            path, media_type=file_result["content_type"],
+            headers={"Content-Disposition": f'attachment; filename="{file_result["filename"]}"'},
+        )
+    return job.get("result")
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -1983,17 +5644,155 @@ async def health_options():
 async def root():
     return {"status": "ok", "service": "Pariksha Sarthi Backend"}
 
-@app.on_event("startup")
-async def _log_db_connection():
+# Durations of each startup phase in milliseconds; logged once and exposed on /metrics
+startup_report: Dict[str, float] = {}
+
+# Indexes behind the hot lookups; create_index is a no-op when the index already exists
+INDEXES: Dict[str, list] = {
+    "users": ["id", "email", [("collegeId", 1), ("role", 1)], [("collegeId", 1), ("rollNumber", 1)]],
+    "colleges": ["id"],
+    "blocks": ["id", "collegeId"],
+    "rooms": ["id", "blockId"],
+    "examSessions": ["id", [("collegeId", 1), ("start", 1)]],
+    "roomSeatings": ["id", [("examSessionId", 1), ("roomId", 1)], "seats.s"],
+    "studentExamCards": ["studentId", "examIds"],
+    "allocations": ["examSessionId"],
+    "examRooms": ["examSessionId"],
+    "examInvigilators": ["examSessionId", "invigilatorId"],
+    "invigilatorDuties": ["examSessionId", "invigilatorId"],
+    "examAttendanceRestrictions": [[("examId", 1), ("studentId", 1)], [("examId", 1), ("band", 1)]],
+    "notifications": [[("userId", 1), ("createdAt", -1)]],
+    "calendarEvents": [[("collegeId", 1), ("start", 1)], "examId"],
+}
+
+async def _ensure_indexes() -> None:
+    await asyncio.gather(*(
+        db[collection].create_index(keys) for collection, specs in INDEXES.items() for keys in specs
+    ))
+
+async def _timed(phase: str, coro) -> None:
+    started = time.perf_counter()
     try:
-        # Force a quick ping to verify connectivity
-        await client.admin.command("ping")
-        logger.info(
-            f"✅ Connected to MongoDB Atlas (db='{db_name}', uri='{_sanitize_uri_for_log(raw_mongo_url)}')"
-        )
+        await coro
+    finally:
+        startup_report[phase] = round((time.perf_counter() - started) * 1000, 1)
+
+# Internals of the pool, startup and workers; readable by admins or a scraper holding METRICS_TOKEN
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+async def require_metrics_access(credentials: HTTPAuthorizationCredentials = Depends(security)) -> None:
+    if METRICS_TOKEN and hmac.compare_digest(credentials.credentials.encode(), METRICS_TOKEN.encode()):
+        return
+    user = await get_current_user(credentials)
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can read metrics")
+
+@app.get("/metrics", dependencies=[Depends(require_metrics_access)])
+async def metrics():
+    return {"mongoPool": pool_metrics.snapshot(), "startup": startup_report, "cacheBus": cache_bus.snapshot()}
+
+# Liveness is /health; /ready turns 200 once the database answered and indexes/jobs are set up.
+# That happens in the background so a slow Atlas wake-up doesn't hold the port closed.
+readiness: Dict[str, Any] = {"db": "pending", "error": None}
+_startup_tasks: List[asyncio.Task] = []
+
+async def _become_ready() -> None:
+    delay = 1.0
+    while True:
+        try:
+            # Force a quick ping to verify connectivity
+            await _timed("dbPingMs", client.admin.command("ping"))
+            break
+        except Exception as e:
+            readiness["error"] = str(e)
+            logger.error(f"❌ MongoDB connection failed, retrying in {delay:.0f}s: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+    logger.info(
+        f"✅ Connected to MongoDB Atlas (db='{db_name}', uri='{_sanitize_uri_for_log(raw_mongo_url)}')"
+    )
+    try:
+        await _timed("indexWarmupMs", _ensure_indexes())
+    except Exception as e:
+        logger.error(f"❌ Could not create indexes: {e}")
+    try:
+        if await db.allocations.find_one({}, {"_id": 1}):
+            await _timed("seatMigrationMs", migrate_allocations_to_room_seatings())
+            logger.info("Migrated legacy allocations to roomSeatings")
     except Exception as e:
-        logger.error(f"❌ MongoDB connection failed: {e}")
+        logger.error(f"❌ Could not migrate legacy allocations: {e}")
+    try:
+        if await db.examSessions.find_one({"start": {"$exists": False}}, {"_id": 1}) or \
+                await db.calendarEvents.find_one({"start": {"$exists": False}}, {"_id": 1}):
+            await _timed("temporalMigrationMs", migrate_temporal_fields())
+    except Exception as e:
+        logger.error(f"❌ Could not add start/end datetimes: {e}")
+    try:
+        if not await db.studentExamCards.find_one({}, {"_id": 1}) and await db.roomSeatings.find_one({"seats.0": {"$exists": True}}, {"_id": 1}):
+            await _timed("examCardBackfillMs", rebuild_all_exam_cards())
+    except Exception as e:
+        logger.error(f"❌ Could not backfill student exam cards: {e}")
+    try:
+        await cache_bus.start()
+    except Exception as e:
+        logger.error(f"❌ Could not start cache invalidation: {e}")
+    try:
+        await idempotency.setup()
+    except Exception as e:
+        logger.error(f"❌ Could not set up idempotency keys: {e}")
+    try:
+        await login_throttle.store.setup()
+    except Exception as e:
+        logger.error(f"❌ Could not set up the login throttle store: {e}")
+    try:
+        resumed = await job_runner.resume()
+        if resumed:
+            logger.info(f"Resumed {resumed} background job(s)")
+    except Exception as e:
+        logger.error(f"❌ Could not resume background jobs: {e}")
+    readiness.update(db="ready", error=None)
+    startup_report["readyMs"] = round((time.perf_counter() - _import_started) * 1000, 1)
+    logger.info("Startup: " + ", ".join(f"{phase}={ms}" for phase, ms in startup_report.items()))
+
+async def _warm_optional_modules() -> None:
+    # Import the export dependencies off the event loop so the first download doesn't pay for them
+    for module in OPTIONAL_MODULES:
+        try:
+            await _timed(f"{module.name}ImportMs", asyncio.to_thread(module.load))
+        except ImportError:
+            pass
+
+@app.get("/ready")
+async def ready():
+    is_ready = readiness["db"] == "ready"
+    body = {
+        "status": "ready" if is_ready else "starting",
+        "db": readiness["db"],
+        "optionalModules": {module.name: module.loaded for module in OPTIONAL_MODULES},
+    }
+    if readiness["error"]:
+        body["error"] = readiness["error"]
+    return JSONResponse(body, status_code=200 if is_ready else 503)
+
+@app.on_event("startup")
+async def _start_background_startup():
+    readiness.update(db="pending", error=None)
+    _startup_tasks[:] = [asyncio.create_task(_become_ready())]
+    if os.environ.get("WARM_UP_OPTIONAL_IMPORTS", "1") == "1":
+        _startup_tasks.append(asyncio.create_task(_warm_optional_modules()))
+    if ARCHIVE_INTERVAL_HOURS > 0:
+        _startup_tasks.append(asyncio.create_task(_archive_loop()))
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    for task in _startup_tasks:
+        task.cancel()
+    await asyncio.gather(*_startup_tasks, return_exceptions=True)
+    # Uvicorn has already drained in-flight requests; running jobs are re-queued for the next worker
+    await job_runner.shutdown()
+    await cache_bus.stop()
+    if _render_pool is not None:
+        _render_pool.shutdown(wait=False, cancel_futures=True)
+    client.close()
+
+startup_report["importMs"] = round((time.perf_counter() - _import_started) * 1000, 1)
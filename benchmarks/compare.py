@@ -0,0 +1,46 @@
+"""
+Compare two benchmark reports stage by stage.
+
+    python -m benchmarks.compare benchmarks/reports/old.json benchmarks/reports/new.json
+"""
+import json
+import sys
+
+METRICS = ("latencyMs", "dbCommands", "peakRssMb")
+
+
+def _pct(old: float, new: float) -> str:
+    if not old:
+        return "   n/a"
+    return f"{(new - old) / old * 100:+6.1f}%"
+
+
+def compare(old: dict, new: dict) -> str:
+    old_stages = {s["stage"]: s for s in old["stages"]}
+    lines = [f"{'stage':<24}" + "".join(f"{m:>28}" for m in METRICS)]
+    for stage in new["stages"]:
+        before = old_stages.get(stage["stage"])
+        row = f"{stage['stage']:<24}"
+        for metric in METRICS:
+            if before is None:
+                row += f"{stage[metric]:>28}"
+            else:
+                row += f"{before[metric]:>10} -> {stage[metric]:<8} {_pct(before[metric], stage[metric])}"
+        lines.append(row)
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    argv = argv if argv is not None else sys.argv[1:]
+    if len(argv) != 2:
+        print(__doc__.strip())
+        return 2
+    with open(argv[0]) as f_old, open(argv[1]) as f_new:
+        old, new = json.load(f_old), json.load(f_new)
+    print(f"{old['meta']['commit']} -> {new['meta']['commit']}")
+    print(compare(old, new))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
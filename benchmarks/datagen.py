@@ -0,0 +1,156 @@
+"""
+Synthetic college generator for benchmarks.
+
+Follows the shapes used by scripts/setup_initial_data.py
+(college -> blocks -> rooms -> students -> staff) and scales them to a
+configurable size. Passwords share one precomputed bcrypt hash: hashing
+100k passwords would dominate generation time without telling us anything.
+"""
+import random
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import bcrypt
+
+BRANCHES = ["CSE", "ECE", "EEE", "MECH", "CIVIL"]
+YEARS = [1, 2, 3, 4]
+BRANCH_CODES = {"CSE": "05", "ECE": "04", "EEE": "02", "MECH": "03", "CIVIL": "01"}
+
+_SHARED_HASH = bcrypt.hashpw(b"bench123", bcrypt.gensalt(rounds=4)).decode("utf-8")
+
+
+@dataclass
+class SyntheticCollege:
+    college: Dict
+    admin: Dict
+    invigilators: List[Dict] = field(default_factory=list)
+    blocks: List[Dict] = field(default_factory=list)
+    rooms: List[Dict] = field(default_factory=list)
+    students: List[Dict] = field(default_factory=list)
+
+    def student_payloads(self, students: List[Dict]) -> List[Dict]:
+        """Students in the shape accepted by POST /api/students/bulk."""
+        return [
+            {
+                "id": s["id"],
+                "collegeId": s["collegeId"],
+                "rollNumber": s["rollNumber"],
+                "name": s["profile"]["name"],
+                "year": s["profile"]["year"],
+                "branch": s["profile"]["branch"],
+                "section": s["profile"]["section"],
+                "attendancePercent": s["profile"]["attendancePercent"],
+                "password": "bench123",
+            }
+            for s in students
+        ]
+
+    def student_records(self, students: List[Dict]) -> List[Dict]:
+        """Rows for the dedicated `students` collection, mirroring create_student."""
+        return [
+            {
+                "id": s["id"],
+                "collegeId": s["collegeId"],
+                "rollNumber": s["rollNumber"],
+                "name": s["profile"]["name"],
+                "email": None,
+                "year": s["profile"]["year"],
+                "branch": s["profile"]["branch"],
+                "section": s["profile"]["section"],
+                "attendancePercent": s["profile"]["attendancePercent"],
+                "dob": s["profile"]["dob"],
+                "password": s["password"],
+            }
+            for s in students
+        ]
+
+    def attendance_csv(self, shortfall_ratio: float = 0.1, seed: int = 7) -> bytes:
+        """Attendance CSV (see CSV_UPLOAD_GUIDE.md) for a random share of students."""
+        rng = random.Random(seed)
+        lines = ["Student Name,Roll Number,Branch,Year,Attendance %"]
+        for s in self.students:
+            if rng.random() < shortfall_ratio:
+                pct = round(rng.uniform(40, 74.9), 1)
+                profile = s["profile"]
+                lines.append(f"{profile['name']},{s['rollNumber']},{profile['branch']},{profile['year']},{pct}%")
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def generate_college(
+    students: int = 1000,
+    rooms: int = 10,
+    blocks: int = 2,
+    invigilators: int = 10,
+    benches_per_room: int = 30,
+    seed: int = 42,
+) -> SyntheticCollege:
+    rng = random.Random(seed)
+    college_id = str(uuid.uuid4())
+    college = {"id": college_id, "name": f"Synthetic Institute {seed}", "address": "Hyderabad, India"}
+
+    admin = {
+        "id": str(uuid.uuid4()),
+        "collegeId": college_id,
+        "email": "admin@bench.test",
+        "password": _SHARED_HASH,
+        "role": "admin",
+        "profile": {"name": "Bench Admin", "employeeId": "ADM001"},
+    }
+
+    staff = [
+        {
+            "id": str(uuid.uuid4()),
+            "collegeId": college_id,
+            "email": f"invig{i + 1}@bench.test",
+            "password": _SHARED_HASH,
+            "role": "invigilator",
+            "profile": {"name": f"Invigilator {i + 1}", "employeeId": f"INV{i + 1:03d}"},
+        }
+        for i in range(invigilators)
+    ]
+
+    block_docs = [
+        {"id": str(uuid.uuid4()), "collegeId": college_id, "name": f"{chr(65 + i % 26)} Block {i // 26 or ''}".strip()}
+        for i in range(blocks)
+    ]
+
+    room_docs = []
+    for i in range(rooms):
+        block = block_docs[i % len(block_docs)]
+        room_docs.append({
+            "id": str(uuid.uuid4()),
+            "blockId": block["id"],
+            "roomNumber": f"{block['name'][0]}-{100 + i // len(block_docs) + 1}",
+            "capacity": benches_per_room * 2,
+            "benches": benches_per_room,
+        })
+
+    student_docs = []
+    for i in range(students):
+        branch = BRANCHES[i % len(BRANCHES)]
+        year = YEARS[(i // len(BRANCHES)) % len(YEARS)]
+        student_docs.append({
+            "id": str(uuid.uuid4()),
+            "collegeId": college_id,
+            "rollNumber": f"{22 + (4 - year)}A91A{BRANCH_CODES[branch]}{i:06d}",
+            "password": _SHARED_HASH,
+            "role": "student",
+            "profile": {
+                "name": f"Student {i + 1}",
+                "dob": f"200{rng.randint(2, 6)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                "branch": branch,
+                "year": year,
+                "section": rng.choice("ABC"),
+                "attendancePercent": round(rng.uniform(55, 99), 1),
+            },
+        })
+
+    return SyntheticCollege(
+        college=college,
+        admin=admin,
+        invigilators=staff,
+        blocks=block_docs,
+        rooms=room_docs,
+        students=student_docs,
+    )
@@ -0,0 +1,230 @@
+"""
+Exam lifecycle benchmark.
+
+Builds a synthetic college, then drives the full admin/invigilator flow
+through the ASGI app and records, per stage: wall-clock latency, database
+round-trips and peak RSS. Results are written as JSON so two commits can be
+compared with `python -m benchmarks.compare old.json new.json`.
+
+Usage (from the repository root):
+
+    python -m benchmarks.lifecycle --students 1000 --rooms 10
+    python -m benchmarks.lifecycle --students 20000 --rooms 200 --mongo-url mongodb://localhost:27017
+
+Without --mongo-url the app runs against an in-memory mongomock database, so
+round-trip counts are exact but latencies only reflect server-side CPU.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+
+import httpx  # noqa: E402
+
+from backend import server  # noqa: E402
+from benchmarks.datagen import generate_college  # noqa: E402
+from tests.dbcount import CommandCounter, CountingClient  # noqa: E402
+
+REPORTS_DIR = Path(__file__).parent / "reports"
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+class StageRecorder:
+    def __init__(self, counter: CommandCounter):
+        self.counter = counter
+        self.stages = []
+
+    async def run(self, name: str, coro_fn, **meta):
+        self.counter.reset()
+        rss_before = _peak_rss_mb()
+        started = time.perf_counter()
+        status = "ok"
+        try:
+            result = await coro_fn()
+        except Exception as e:  # keep going so later stages still report
+            result, status = None, f"error: {e}"
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        stage = {
+            "stage": name,
+            "status": status,
+            "latencyMs": round(elapsed_ms, 1),
+            "dbCommands": self.counter.count,
+            "peakRssMb": _peak_rss_mb(),
+            "peakRssGrowthMb": round(_peak_rss_mb() - rss_before, 1),
+            **meta,
+        }
+        self.stages.append(stage)
+        print(f"  {name:<24} {stage['latencyMs']:>10.1f} ms  {stage['dbCommands']:>7} cmds  {stage['peakRssMb']:>8.1f} MB  {status}")
+        return result
+
+
+def _check(response: httpx.Response):
+    if response.status_code >= 400:
+        raise RuntimeError(f"{response.request.method} {response.request.url.path} -> {response.status_code}: {response.text[:200]}")
+    return response
+
+
+async def run_lifecycle(args) -> dict:
+    counter = CommandCounter()
+    if args.mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        raw_client = AsyncIOMotorClient(args.mongo_url)
+        client = CountingClient(raw_client, counter, emulate_sessions=False)
+        db_name = f"bench_{int(time.time())}"
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        client = CountingClient(AsyncMongoMockClient(), counter)
+        db_name = "bench"
+    server.client = client
+    server.db = client[db_name]
+    db = server.db
+
+    data = generate_college(
+        students=args.students, rooms=args.rooms, blocks=args.blocks,
+        invigilators=args.invigilators, benches_per_room=args.benches, seed=args.seed,
+    )
+    imported = data.students[: min(args.import_count, len(data.students))]
+    preseeded = data.students[len(imported):]
+
+    # Seed everything except the students that go through the bulk import API
+    await db.colleges.insert_one(dict(data.college))
+    await db.users.insert_many([dict(data.admin)] + [dict(u) for u in data.invigilators])
+    await db.blocks.insert_many([dict(b) for b in data.blocks])
+    await db.rooms.insert_many([dict(r) for r in data.rooms])
+    if preseeded:
+        await db.users.insert_many([dict(s) for s in preseeded])
+        await db.students.insert_many(data.student_records(preseeded))
+
+    admin_headers = {"Authorization": f"Bearer {server.create_access_token({'user_id': data.admin['id'], 'role': 'admin'})}"}
+    invigilator = data.invigilators[0]
+    invig_headers = {"Authorization": f"Bearer {server.create_access_token({'user_id': invigilator['id'], 'role': 'invigilator'})}"}
+    exam_date = (date.today() + timedelta(days=30)).isoformat()
+    room_ids = [r["id"] for r in data.rooms]
+    state = {}
+
+    recorder = StageRecorder(counter)
+    transport = httpx.ASGITransport(app=server.app)
+    print(f"Lifecycle benchmark: {args.students} students, {args.rooms} rooms ({'mongo' if args.mongo_url else 'mongomock'})")
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+
+        async def bulk_import():
+            payload = data.student_payloads(imported)
+            for start in range(0, len(payload), args.import_batch):
+                _check(await http.post("/api/students/bulk", json=payload[start:start + args.import_batch], headers=admin_headers))
+
+        async def upload_attendance():
+            files = {"file": ("attendance.csv", data.attendance_csv(), "text/csv")}
+            exam_id = state["examId"]
+            return _check(await http.post(f"/api/exams/{exam_id}/upload_attendance_csv", files=files, headers=admin_headers)).json()
+
+        async def save_draft():
+            draft = {
+                "collegeId": data.college["id"],
+                "title": "Synthetic Semester End",
+                "date": exam_date,
+                "startTime": "10:00",
+                "endTime": "13:00",
+                "subjects": ["Algorithms"],
+                "years": [1, 2, 3, 4],
+                "branches": ["CSE", "ECE", "EEE", "MECH", "CIVIL"],
+                "allocationType": "random",
+                "studentsPerBench": 2,
+                "selectedRooms": room_ids,
+                "selectedInvigilators": {
+                    room_id: data.invigilators[i % len(data.invigilators)]["id"] for i, room_id in enumerate(room_ids)
+                },
+            }
+            state["draftId"] = _check(await http.post("/api/draft_exam", json=draft, headers=admin_headers)).json()["id"]
+
+        async def finalize():
+            state["examId"] = _check(await http.post(f"/api/draft_exam/{state['draftId']}/finalize", headers=admin_headers)).json()["examId"]
+
+        async def grant_all():
+            return _check(await http.post(f"/api/exams/{state['examId']}/grant_all_permissions", headers=admin_headers)).json()
+
+        async def allocate():
+            return _check(await http.post(f"/api/exams/{state['examId']}/allocate", json=room_ids, headers=admin_headers)).json()
+
+        async def download(fmt):
+            response = _check(await http.get(f"/api/exams/{state['examId']}/download?format={fmt}", headers=admin_headers))
+            return len(response.content)
+
+        async def roster():
+            duties = _check(await http.get(f"/api/duties/invigilator/{invigilator['id']}", headers=invig_headers)).json()
+            for room_id in room_ids[: args.roster_rooms]:
+                _check(await http.get(f"/api/duties/room/{room_id}/exam/{state['examId']}", headers=invig_headers))
+            return duties
+
+        await recorder.run("bulk_import", bulk_import, students=len(imported))
+        await recorder.run("draft_save", save_draft)
+        await recorder.run("draft_finalize", finalize, rooms=len(room_ids))
+        await recorder.run("attendance_csv_upload", upload_attendance)
+        await recorder.run("grant_all_permissions", grant_all)
+        await recorder.run("allocate_seats", allocate, students=args.students)
+        await recorder.run("download_csv", lambda: download("csv"))
+        await recorder.run("download_excel", lambda: download("excel"))
+        await recorder.run("invigilator_roster", roster, rooms=min(args.roster_rooms, len(room_ids)))
+
+    if args.mongo_url:
+        await raw_client.drop_database(db_name)
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "backend": "mongo" if args.mongo_url else "mongomock",
+            "config": {k: v for k, v in vars(args).items() if k not in {"mongo_url", "output"}},
+        },
+        "stages": recorder.stages,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the exam lifecycle against the ASGI app")
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--rooms", type=int, default=10)
+    parser.add_argument("--blocks", type=int, default=2)
+    parser.add_argument("--invigilators", type=int, default=10)
+    parser.add_argument("--benches", type=int, default=50, help="benches per room (2 students per bench)")
+    parser.add_argument("--import-count", type=int, default=100, help="students created through /students/bulk (bcrypt per row)")
+    parser.add_argument("--import-batch", type=int, default=500)
+    parser.add_argument("--roster-rooms", type=int, default=5, help="rooms whose roster the invigilator opens")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mongo-url", default=None, help="run against a real MongoDB instead of mongomock")
+    parser.add_argument("--output", default=None, help="report path (default: benchmarks/reports/lifecycle-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    if args.students > args.rooms * args.benches * 2:
+        parser.error(f"{args.rooms} rooms x {args.benches} benches x 2 seats cannot seat {args.students} students")
+
+    report = asyncio.run(run_lifecycle(args))
+    output = Path(args.output) if args.output else REPORTS_DIR / f"lifecycle-{report['meta']['commit']}-{args.students}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
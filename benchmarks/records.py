@@ -0,0 +1,71 @@
+"""
+Record construction benchmark: validated Pydantic models versus the
+`RecordFactory` used for documents the server builds from trusted values.
+
+    python -m benchmarks.records --records 100000
+
+For each record type it builds the same rows both ways and reports wall time,
+CPU time and the speed-up. The seat notification rows are what an allocation
+of `--records` students inserts; the restriction rows are what an attendance
+CSV of that size inserts.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+
+from backend import server  # noqa: E402
+
+
+def _rows(records: int) -> dict:
+    return {
+        "Notification": (server.Notification, server.notification_records, [
+            {"userId": f"student-{i}", "examId": "exam-1",
+             "message": f"Your seating for Mid Term is confirmed. Block: A Block, Room: A-{100 + i // 60}, Bench: {i % 30 + 1}"}
+            for i in range(records)
+        ]),
+        "ExamAttendanceRestriction": (server.ExamAttendanceRestriction, server.restriction_records, [
+            {"examId": "exam-1", "studentId": f"student-{i}", "attendancePercentage": 40.0 + i % 60,
+             "band": "blocked", "isAllowed": False}
+            for i in range(records)
+        ]),
+    }
+
+
+def _measure(fn, repeat: int) -> dict:
+    wall, cpu = [], []
+    for _ in range(repeat):
+        started_wall, started_cpu = time.perf_counter(), time.process_time()
+        fn()
+        wall.append((time.perf_counter() - started_wall) * 1000)
+        cpu.append((time.process_time() - started_cpu) * 1000)
+    return {"wallMs": round(statistics.median(wall), 1), "cpuMs": round(statistics.median(cpu), 1)}
+
+
+def run(records: int, repeat: int = 3) -> dict:
+    report = {"records": records}
+    for name, (model, factory, rows) in _rows(records).items():
+        validated = _measure(lambda: [model(**row).model_dump() for row in rows], repeat)
+        trusted = _measure(lambda: factory.build(rows), repeat)
+        report[name] = {
+            "model": validated,
+            "recordFactory": trusted,
+            "speedup": round(validated["cpuMs"] / max(trusted["cpuMs"], 0.1), 1),
+            "cpuSavedMs": round(validated["cpuMs"] - trusted["cpuMs"], 1),
+        }
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare model validation with RecordFactory construction")
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.records, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
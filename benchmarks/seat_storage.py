@@ -0,0 +1,135 @@
+"""
+Seat storage benchmark: legacy per-student `allocations` + `examStudents`
+documents versus one `roomSeatings` bucket per room.
+
+    python -m benchmarks.seat_storage --students 10000 --seats-per-room 60
+    python -m benchmarks.seat_storage --students 10000 --mongo-url mongodb://localhost:27017
+
+Reports document counts, BSON bytes and the latency of a room roster read, a
+student's seat lookup and an exam delete for each format. The legacy side is
+written with the old document shapes directly; the bucket side goes through
+`server.migrate_allocations_to_room_seatings`, so the migration is exercised too.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+import uuid
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+
+import bson  # noqa: E402
+
+from backend import server  # noqa: E402
+
+
+def _legacy_docs(exam_id: str, students: int, seats_per_room: int):
+    room_ids = [str(uuid.uuid4()) for _ in range(-(-students // seats_per_room))]
+    allocations = []
+    for i in range(students):
+        seat = i % seats_per_room
+        allocations.append({
+            "id": str(uuid.uuid4()), "examSessionId": exam_id, "studentId": str(uuid.uuid4()),
+            "roomId": room_ids[i // seats_per_room], "benchNumber": seat // 2 + 1,
+            "seatPosition": "AB"[seat % 2], "attendance": "pending",
+        })
+    exam_students = [{**a, "id": str(uuid.uuid4())} for a in allocations]
+    return room_ids, allocations, exam_students
+
+
+async def _timed(fn, repeat: int = 5) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(samples), 2)
+
+
+async def _collection_bytes(collection) -> int:
+    docs = await collection.find({}).to_list(None)
+    return sum(len(bson.encode(doc)) for doc in docs)
+
+
+async def run(students: int, seats_per_room: int, mongo_url=None) -> dict:
+    if mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(mongo_url)
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        client = AsyncMongoMockClient()
+    db_name = f"seat_storage_bench_{uuid.uuid4().hex[:8]}"
+    server.db = client[db_name]
+    db = server.db
+    exam_id = str(uuid.uuid4())
+    room_ids, allocations, exam_students = _legacy_docs(exam_id, students, seats_per_room)
+    probe_room, probe_student = room_ids[len(room_ids) // 2], allocations[len(allocations) // 2]["studentId"]
+    report = {"students": students, "seatsPerRoom": seats_per_room}
+
+    try:
+        await db.allocations.create_index([("examSessionId", 1), ("roomId", 1)])
+        await db.allocations.create_index("studentId")
+        await db.allocations.insert_many(allocations)
+        await db.examStudents.insert_many(exam_students)
+
+        async def legacy_roster():
+            await db.allocations.find({"examSessionId": exam_id, "roomId": probe_room}, {"_id": 0}).to_list(None)
+
+        async def legacy_student():
+            await db.allocations.find({"studentId": probe_student}, {"_id": 0}).to_list(None)
+
+        report["legacy"] = {
+            "documents": len(allocations) + len(exam_students),
+            "bytes": await _collection_bytes(db.allocations) + await _collection_bytes(db.examStudents),
+            "rosterReadMs": await _timed(legacy_roster),
+            "studentLookupMs": await _timed(legacy_student),
+        }
+        started = time.perf_counter()
+        await db.allocations.delete_many({"examSessionId": exam_id})
+        await db.examStudents.delete_many({"examSessionId": exam_id})
+        report["legacy"]["examDeleteMs"] = round((time.perf_counter() - started) * 1000, 2)
+
+        await db.allocations.insert_many([{k: v for k, v in a.items() if k != "_id"} for a in allocations])
+        await db.roomSeatings.create_index([("examSessionId", 1), ("roomId", 1)])
+        await db.roomSeatings.create_index("seats.s")
+        started = time.perf_counter()
+        await server.migrate_allocations_to_room_seatings()
+        migration_ms = round((time.perf_counter() - started) * 1000, 2)
+
+        async def bucket_roster():
+            await server.find_allocations(exam_id, probe_room)
+
+        async def bucket_student():
+            buckets = await db.roomSeatings.find({"seats.s": probe_student}, {"_id": 0}).to_list(None)
+            [server._seat_rows(b, probe_student) for b in buckets]
+
+        report["roomSeatings"] = {
+            "documents": await db.roomSeatings.count_documents({}),
+            "bytes": await _collection_bytes(db.roomSeatings),
+            "rosterReadMs": await _timed(bucket_roster),
+            "studentLookupMs": await _timed(bucket_student),
+            "migrationMs": migration_ms,
+        }
+        started = time.perf_counter()
+        await db.roomSeatings.delete_many({"examSessionId": exam_id})
+        report["roomSeatings"]["examDeleteMs"] = round((time.perf_counter() - started) * 1000, 2)
+    finally:
+        if mongo_url:
+            await client.drop_database(db_name)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare legacy and bucketed seat storage")
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--seats-per-room", type=int, default=60)
+    parser.add_argument("--mongo-url", default=None)
+    args = parser.parse_args(argv)
+    report = asyncio.run(run(args.students, args.seats_per_room, args.mongo_url))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
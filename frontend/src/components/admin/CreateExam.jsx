@@ -11,6 +11,7 @@ import { Badge } from '@/components/ui/badge';
 import { Progress } from '@/components/ui/progress';
 import { Tabs, TabsContent, TabsList, TabsTrigger } from '@/components/ui/tabs';
 import { axiosInstance } from '@/App';
+import { withIdempotencyKey } from '@/lib/utils';
 import { toast } from 'sonner';
 import CalendarSidebar from './CalendarSidebar';
 
@@ -234,7 +235,9 @@ const CreateExam = ({ user }) => {
 
   const handleFinalizeDraft = async (draftId) => {
     try {
-      const response = await axiosInstance.post(`/draft_exam/${draftId}/finalize`);
+      const response = await withIdempotencyKey(`finalize:${draftId}`, (config) =>
+        axiosInstance.post(`/draft_exam/${draftId}/finalize`, null, config)
+      );
       toast.success('Draft finalized successfully');
       fetchData();
     } catch (error) {
@@ -357,7 +360,9 @@ const CreateExam = ({ user }) => {
 
     setLoading(true);
     try {
-      const response = await axiosInstance.post(`/exams/${createdExamId}/allocate`, selectedRooms);
+      const response = await withIdempotencyKey(`allocate:${createdExamId}:${selectedRooms.join(',')}`, (config) =>
+        axiosInstance.post(`/exams/${createdExamId}/allocate`, selectedRooms, config)
+      );
       toast.success(`${response.data.count} seats allocated successfully`);
       
       const allocationsRes = await axiosInstance.get(`/allocations/exam/${createdExamId}`);
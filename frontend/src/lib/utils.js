@@ -4,3 +4,24 @@ import { twMerge } from "tailwind-merge"
 export function cn(...inputs) {
   return twMerge(clsx(inputs));
 }
+
+// One Idempotency-Key per user action. Repeated clicks on the same action share the key
+// until the server has answered, so a double-click runs it only once. After a network
+// error the key is kept, so the retry can pick up the first attempt's result.
+const pendingActionKeys = new Map();
+
+export async function withIdempotencyKey(action, request) {
+  if (!pendingActionKeys.has(action)) {
+    pendingActionKeys.set(action, crypto.randomUUID());
+  }
+  try {
+    const response = await request({ headers: { 'Idempotency-Key': pendingActionKeys.get(action) } });
+    pendingActionKeys.delete(action);
+    return response;
+  } catch (error) {
+    if (error.response) {
+      pendingActionKeys.delete(action);
+    }
+    throw error;
+  }
+}
@@ -1,13 +1,21 @@
 #!/usr/bin/env python3
 """
 Script to start the backend server and ensure initial data is set up
+
+    python start_backend.py                 # development: one process with --reload
+    python start_backend.py --prod          # production: CPU-sized workers, uvloop/httptools
+    python start_backend.py --prod --workers 4 --seed never
 """
+import argparse
+import importlib.util
 import subprocess
 import sys
 import os
 import time
 from pathlib import Path
 
+SEED_ADMIN_EMAIL = "admin@git.com"
+
 def check_requirements():
     """Check if required packages are installed"""
     try:
@@ -15,7 +23,7 @@ def check_requirements():
         import motor
         import bcrypt
         import jwt
-        import python_dotenv
+        import dotenv
         print("✅ All required packages are installed")
         return True
     except ImportError as e:
@@ -26,6 +34,9 @@ def check_requirements():
 def check_env_file():
     """Check if .env file exists in backend directory"""
     env_path = Path("backend/.env")
+    if os.environ.get("MONGO_URL"):
+        print("✅ Using environment variables")
+        return True
     if not env_path.exists():
         print("❌ .env file not found in backend directory")
         print("Please create backend/.env with the following variables:")
@@ -37,9 +48,31 @@ def check_env_file():
     print("✅ .env file found")
     return True
 
-def setup_initial_data():
+def seed_needed():
+    """Cheap existence check: seed only when the default admin is missing"""
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    load_dotenv(Path("backend/.env"))
+    client = MongoClient(os.environ.get("MONGO_URL", "").strip('"').strip(), serverSelectionTimeoutMS=10000)
+    try:
+        db = client[os.environ.get("DB_NAME", "pariksha_sarthi").strip('"').strip()]
+        return db.users.find_one({"email": SEED_ADMIN_EMAIL}, {"_id": 1}) is None
+    finally:
+        client.close()
+
+def setup_initial_data(mode="auto"):
     """Run the setup script to create initial data"""
+    if mode == "never":
+        return True
     try:
+        if mode == "auto":
+            started = time.perf_counter()
+            needed = seed_needed()
+            print(f"⏱️  Seed check: {(time.perf_counter() - started) * 1000:.0f} ms")
+            if not needed:
+                print("✅ Initial data already present, skipping setup")
+                return True
         print("🔄 Setting up initial data...")
         result = subprocess.run([
             sys.executable, "scripts/setup_initial_data.py"
@@ -57,29 +90,83 @@ def setup_initial_data():
         print(f"❌ Error setting up initial data: {e}")
         return False
 
-def start_server():
+def default_workers():
+    """One worker per CPU; WEB_CONCURRENCY overrides it like on most PaaS hosts"""
+    return int(os.environ.get("WEB_CONCURRENCY") or os.cpu_count() or 1)
+
+def has_module(name):
+    return importlib.util.find_spec(name) is not None
+
+def prod_command(host, port, workers, graceful_timeout):
+    """Command line for the production server"""
+    if has_module("gunicorn"):
+        # Gunicorn preloads the app in the master before forking workers. The Mongo client only
+        # connects on first use, and the startup hooks (DB ping, indexes, job resume) run in each worker.
+        # Gunicorn drains workers on SIGTERM for up to --graceful-timeout seconds.
+        return [
+            sys.executable, "-m", "gunicorn", "backend.server:app",
+            "--worker-class", "uvicorn.workers.UvicornWorker",
+            "--workers", str(workers),
+            "--bind", f"{host}:{port}",
+            "--preload",
+            "--graceful-timeout", str(graceful_timeout),
+            "--timeout", "120",
+        ]
+    # Without gunicorn each uvicorn worker imports the app itself; uvicorn still drains on SIGTERM
+    command = [
+        sys.executable, "-m", "uvicorn", "backend.server:app",
+        "--host", host, "--port", str(port),
+        "--workers", str(workers),
+        "--timeout-graceful-shutdown", str(graceful_timeout),
+        "--no-access-log",
+    ]
+    if has_module("uvloop"):
+        command += ["--loop", "uvloop"]
+    if has_module("httptools"):
+        command += ["--http", "httptools"]
+    return command
+
+def dev_command(host, port):
+    return [
+        sys.executable, "-m", "uvicorn", 
+        "backend.server:app", 
+        "--host", host, 
+        "--port", str(port), 
+        "--reload"
+    ]
+
+def start_server(command, port):
     """Start the FastAPI server"""
     try:
         print("🚀 Starting backend server...")
-        print("Server will be available at: http://localhost:8000")
-        print("API documentation at: http://localhost:8000/docs")
+        print(f"Server will be available at: http://localhost:{port}")
+        print(f"API documentation at: http://localhost:{port}/docs")
+        print("Startup timings (import, DB ping, index warm-up) are logged and served on /metrics")
         print("Press Ctrl+C to stop the server")
         print("-" * 50)
         
-        # Start the server
-        subprocess.run([
-            sys.executable, "-m", "uvicorn", 
-            "backend.server:app", 
-            "--host", "0.0.0.0", 
-            "--port", "8000", 
-            "--reload"
-        ])
+        # Run the server in the foreground; SIGTERM/SIGINT go straight to it so it can drain
+        subprocess.run(command)
     except KeyboardInterrupt:
         print("\n🛑 Server stopped by user")
     except Exception as e:
         print(f"❌ Error starting server: {e}")
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Start the Pariksha Sarthi backend")
+    parser.add_argument("--prod", action="store_true", default=os.environ.get("APP_ENV") == "production",
+                        help="multi-worker production server (default when APP_ENV=production)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--graceful-timeout", type=int, default=30,
+                        help="seconds to let in-flight requests finish on SIGTERM")
+    parser.add_argument("--seed", choices=["auto", "always", "never"], default="auto",
+                        help="auto: seed only when the default admin is missing")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
     print("🎓 Pariksha Sarthi Backend Setup")
     print("=" * 40)
     
@@ -92,11 +179,16 @@ def main():
         return
     
     # Setup initial data
-    if not setup_initial_data():
+    if not setup_initial_data(args.seed):
         print("⚠️  Continuing without initial data setup...")
     
     # Start server
-    start_server()
+    if args.prod:
+        print(f"🏭 Production mode: {args.workers} worker(s)")
+        command = prod_command(args.host, args.port, args.workers, args.graceful_timeout)
+    else:
+        command = dev_command(args.host, args.port)
+    start_server(command, args.port)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,113 @@
+"""
+Shared fixtures: run the FastAPI app against an in-memory Mongo stand-in
+(mongomock-motor) and count every database command issued per request.
+"""
+import asyncio
+import os
+import time
+import uuid
+from contextlib import contextmanager
+
+import pytest
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "pariksha_sarthi_test")
+os.environ.setdefault("CACHE_BUS", "local")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from mongomock_motor import AsyncMongoMockClient  # noqa: E402
+
+from backend import server  # noqa: E402
+from tests.dbcount import CommandCounter, CountingClient  # noqa: E402
+
+# Every authenticated request costs one `users.find_one` in get_current_user
+AUTH = 1
+
+
+@pytest.fixture
+def counter():
+    return CommandCounter()
+
+
+@pytest.fixture
+def mock_db(monkeypatch, counter):
+    client = CountingClient(AsyncMongoMockClient(), counter)
+    database = client[server.db_name]
+    monkeypatch.setattr(server, "client", client)
+    monkeypatch.setattr(server, "db", database)
+    monkeypatch.setattr(server, "read_db", database)
+    server._card_cache.clear()
+    server.idempotency._cache.clear()
+    monkeypatch.setattr(server.login_throttle, "store", server.MemoryThrottleStore())
+    return database
+
+
+@pytest.fixture
+def api(mock_db):
+    with TestClient(server.app) as test_client:
+        # Startup finishes in the background; don't let it leak into DB budgets
+        deadline = time.monotonic() + 5
+        while test_client.get("/ready").status_code != 200:
+            assert time.monotonic() < deadline, "app never became ready"
+            time.sleep(0.01)
+        yield test_client
+
+
+@pytest.fixture
+def budget(counter):
+    """Assert that the block issues at most ``limit`` database commands."""
+
+    @contextmanager
+    def _budget(limit: int):
+        counter.reset()
+        yield counter
+        assert counter.count <= limit, (
+            f"{counter.count} DB commands issued, budget is {limit}:\n" + counter.describe()
+        )
+
+    return _budget
+
+
+def auth_headers(user: dict) -> dict:
+    token = server.create_access_token({"user_id": user["id"], "role": user["role"]})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def seed_college(db, students: int = 20, rooms: int = 2, benches: int = 30) -> dict:
+    college_id = str(uuid.uuid4())
+    admin = {
+        "id": str(uuid.uuid4()), "collegeId": college_id, "email": "admin@test.com",
+        "password": server.hash_password("admin123"), "role": "admin",
+        "profile": {"name": "Admin", "employeeId": "ADM001"},
+    }
+    invigilator = {
+        "id": str(uuid.uuid4()), "collegeId": college_id, "email": "invig@test.com",
+        "password": "x", "role": "invigilator", "profile": {"name": "Invig", "employeeId": "INV001"},
+    }
+    block = {"id": str(uuid.uuid4()), "collegeId": college_id, "name": "A Block"}
+    room_docs = [
+        {"id": str(uuid.uuid4()), "blockId": block["id"], "roomNumber": f"A-{100 + i}", "capacity": benches * 2, "benches": benches}
+        for i in range(rooms)
+    ]
+    student_docs = [
+        {
+            "id": str(uuid.uuid4()), "collegeId": college_id, "rollNumber": f"22A91A{i:04d}",
+            "password": "x", "role": "student",
+            "profile": {"name": f"Student {i}", "branch": "CSE", "year": 3, "section": "A"},
+        }
+        for i in range(students)
+    ]
+    exam = server.ExamSession(
+        collegeId=college_id, title="Mid Term", date="2030-01-10", startTime="10:00", endTime="13:00",
+        subjects=["Algorithms"], years=[3], branches=["CSE"], allocationType="serial", status="scheduled",
+    ).model_dump()
+
+    async def _insert():
+        await db.users.insert_many([admin, invigilator] + student_docs)
+        await db.blocks.insert_one(block)
+        await db.rooms.insert_many(room_docs)
+        await db.examSessions.insert_one(exam)
+        await db.examInvigilators.insert_one({"id": str(uuid.uuid4()), "examSessionId": exam["id"], "invigilatorId": invigilator["id"], "roomId": room_docs[0]["id"]})
+
+    asyncio.run(_insert())
+    return {"admin": admin, "invigilator": invigilator, "rooms": room_docs, "students": student_docs, "exam": exam}
@@ -0,0 +1,143 @@
+"""
+Thin proxies around a Motor-compatible client that record every database
+command an endpoint issues. Cursor-returning calls (``find``, ``aggregate``)
+count once per call, matching one round-trip for result sets that fit in the
+first batch.
+
+mongomock has no session support, so by default sessions are emulated with
+a no-op object and ``session=`` arguments are dropped before delegating.
+Pass ``emulate_sessions=False`` when wrapping a real Motor client.
+"""
+from collections import Counter
+
+
+COMMANDS = frozenset({
+    "find", "find_one", "aggregate", "count_documents", "estimated_document_count", "distinct",
+    "insert_one", "insert_many", "update_one", "update_many", "replace_one",
+    "delete_one", "delete_many", "bulk_write",
+    "find_one_and_update", "find_one_and_replace", "find_one_and_delete",
+    "create_index", "create_indexes",
+})
+
+
+class CommandCounter:
+    def __init__(self):
+        self.calls = []
+
+    @property
+    def count(self) -> int:
+        return len(self.calls)
+
+    def record(self, collection: str, op: str) -> None:
+        self.calls.append((collection, op))
+
+    def reset(self) -> None:
+        self.calls = []
+
+    def describe(self) -> str:
+        totals = Counter(f"{c}.{op}" for c, op in self.calls)
+        return "\n".join(f"  {n:>5}  {name}" for name, n in totals.most_common())
+
+
+class _FakeTransaction:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    def __init__(self, client):
+        self.client = client
+
+    def start_transaction(self, *args, **kwargs):
+        return _FakeTransaction()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def end_session(self):
+        return None
+
+
+class CountingCollection:
+    def __init__(self, collection, name: str, counter: CommandCounter, emulate_sessions: bool = True):
+        self._collection = collection
+        self._name = name
+        self._counter = counter
+        self._emulate_sessions = emulate_sessions
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def __getattr__(self, attr):
+        target = getattr(self._collection, attr)
+        if attr not in COMMANDS:
+            return target
+
+        def call(*args, **kwargs):
+            if self._emulate_sessions:
+                kwargs.pop("session", None)
+            self._counter.record(self._name, attr)
+            return target(*args, **kwargs)
+
+        return call
+
+
+class CountingDatabase:
+    def __init__(self, database, client, counter: CommandCounter):
+        self._database = database
+        self._client = client
+        self._counter = counter
+        self._collections = {}
+
+    @property
+    def client(self):
+        return self._client
+
+    @property
+    def name(self) -> str:
+        return self._database.name
+
+    def __getitem__(self, name: str) -> CountingCollection:
+        if name not in self._collections:
+            self._collections[name] = CountingCollection(
+                self._database[name], name, self._counter, self._client.emulate_sessions
+            )
+        return self._collections[name]
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if hasattr(type(self._database), name):
+            return getattr(self._database, name)
+        return self[name]
+
+
+class CountingClient:
+    def __init__(self, client, counter: CommandCounter, emulate_sessions: bool = True):
+        self._client = client
+        self._counter = counter
+        self._databases = {}
+        self.emulate_sessions = emulate_sessions
+
+    def __getitem__(self, name: str) -> CountingDatabase:
+        if name not in self._databases:
+            self._databases[name] = CountingDatabase(self._client[name], self, self._counter)
+        return self._databases[name]
+
+    def get_database(self, name: str, **kwargs) -> CountingDatabase:
+        return self[name]
+
+    async def start_session(self, *args, **kwargs):
+        if not self.emulate_sessions:
+            return await self._client.start_session(*args, **kwargs)
+        return FakeSession(self)
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
@@ -0,0 +1,135 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend import server
+from tests.conftest import auth_headers, seed_college
+
+
+@pytest.fixture
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "ARCHIVE_DIR", tmp_path)
+    return tmp_path
+
+
+def _finished(db, exam_id, ago):
+    end = datetime.utcnow() - ago
+    asyncio.run(db.examSessions.update_one({"id": exam_id}, {"$set": {"start": end - timedelta(hours=3), "end": end}}))
+
+
+def _hot_counts(db, exam_id):
+    return {
+        collection: asyncio.run(db[collection].count_documents({field: exam_id}))
+        for collection, field in server.ARCHIVE_COLLECTIONS
+    }
+
+
+def _allocated_exam(api, db, students=6):
+    data = seed_college(db, students=students)
+    exam_id = data["exam"]["id"]
+    headers = auth_headers(data["admin"])
+    api.post(f"/api/exams/{exam_id}/allocate", json=[data["rooms"][0]["id"]], headers=headers)
+    asyncio.run(db.incidents.insert_one({"id": "i1", "examSessionId": exam_id, "description": "Phone found"}))
+    return data, exam_id, headers
+
+
+def test_finished_exams_are_archived_and_purged(api, mock_db, archive_dir, monkeypatch):
+    monkeypatch.setenv("ARCHIVE_COMPRESSION", "gzip")
+    data, exam_id, headers = _allocated_exam(api, mock_db)
+    _finished(mock_db, exam_id, timedelta(days=45))
+    before = _hot_counts(mock_db, exam_id)
+
+    result = api.post("/api/archive/run", headers=headers).json()
+    assert result["archived"] == [exam_id]
+
+    exam = asyncio.run(mock_db.examSessions.find_one({"id": exam_id}))
+    summary = exam["archive"]
+    assert exam["status"] == "archived" and summary["purged"] is True
+    assert summary["format"] == "gzip" and (archive_dir / summary["file"]).stat().st_size == summary["bytes"]
+    assert summary["counts"] == {c: n for c, n in before.items() if n}
+    assert summary["attendance"] == {"pending": 6}
+    assert set(_hot_counts(mock_db, exam_id).values()) == {0}
+
+    read = api.get(f"/api/archive/exams/{exam_id}?collection=incidents", headers=headers).json()
+    assert [r["document"]["description"] for r in read["records"]] == ["Phone found"]
+
+
+def test_recently_finished_exams_are_only_completed(api, mock_db, archive_dir):
+    data, exam_id, headers = _allocated_exam(api, mock_db)
+    _finished(mock_db, exam_id, timedelta(hours=1))
+
+    result = api.post("/api/archive/run", headers=headers).json()
+    assert result == {"completed": 1, "archived": [], "deleted": {}}
+    assert asyncio.run(mock_db.examSessions.find_one({"id": exam_id}))["status"] == "completed"
+    assert api.get(f"/api/archive/exams/{exam_id}", headers=headers).status_code == 409
+
+
+def test_restore_puts_the_data_back(api, mock_db, archive_dir):
+    data, exam_id, headers = _allocated_exam(api, mock_db)
+    _finished(mock_db, exam_id, timedelta(days=45))
+    before = _hot_counts(mock_db, exam_id)
+    api.post("/api/archive/run", headers=headers)
+    file = archive_dir / asyncio.run(mock_db.examSessions.find_one({"id": exam_id}))["archive"]["file"]
+
+    response = api.post(f"/api/archive/exams/{exam_id}/restore", headers=headers)
+    assert response.status_code == 200
+    assert _hot_counts(mock_db, exam_id) == before
+    exam = asyncio.run(mock_db.examSessions.find_one({"id": exam_id}))
+    assert exam["status"] == "completed" and "archive" not in exam
+    assert not file.exists()
+
+    # The next run leaves it alone until a full grace period has passed since the restore
+    assert asyncio.run(server.archive_finished_exams())["archived"] == []
+    assert _hot_counts(mock_db, exam_id) == before
+    asyncio.run(mock_db.examSessions.update_one({"id": exam_id}, {"$set": {"restoredAt": datetime.utcnow() - timedelta(days=45)}}))
+    assert asyncio.run(server.archive_finished_exams())["archived"] == [exam_id]
+
+
+def test_interrupted_purge_is_finished_by_the_next_run(api, mock_db, archive_dir, monkeypatch):
+    data, exam_id, headers = _allocated_exam(api, mock_db)
+    _finished(mock_db, exam_id, timedelta(days=45))
+
+    purge = server._purge_archived
+
+    async def crash(*args, **kwargs):
+        raise RuntimeError("worker died")
+
+    monkeypatch.setattr(server, "_purge_archived", crash)
+    with pytest.raises(RuntimeError):
+        api.post("/api/archive/run", headers=headers)
+    assert _hot_counts(mock_db, exam_id)["roomSeatings"] == 1
+    monkeypatch.setattr(server, "_purge_archived", purge)
+
+    assert api.post("/api/archive/run", headers=headers).json()["deleted"]["roomSeatings"] == 1
+    assert set(_hot_counts(mock_db, exam_id).values()) == {0}
+
+
+def test_abandoned_claims_are_taken_over(api, mock_db, archive_dir):
+    data, exam_id, headers = _allocated_exam(api, mock_db)
+    _finished(mock_db, exam_id, timedelta(days=45))
+    claim = lambda at: asyncio.run(mock_db.examSessions.update_one(
+        {"id": exam_id}, {"$set": {"status": "archiving", "archivingAt": at, "archivingBy": "dead-worker"}}
+    ))
+
+    # A live claim belongs to a worker that is still archiving
+    claim(datetime.utcnow())
+    assert asyncio.run(server.archive_finished_exams())["archived"] == []
+    # Once its lease has run out, the worker is gone and the next run finishes the job
+    claim(datetime.utcnow() - timedelta(seconds=server.ARCHIVE_LEASE_SECONDS + 1))
+    assert asyncio.run(server.archive_finished_exams())["archived"] == [exam_id]
+    exam = asyncio.run(mock_db.examSessions.find_one({"id": exam_id}))
+    assert exam["status"] == "archived" and "archivingBy" not in exam
+    assert set(_hot_counts(mock_db, exam_id).values()) == {0}
+
+
+def test_zstd_archives_round_trip(mock_db, archive_dir, monkeypatch):
+    pytest.importorskip("zstandard")
+    monkeypatch.setenv("ARCHIVE_COMPRESSION", "zstd")
+    exam = {"id": "e1", "collegeId": "c1"}
+    asyncio.run(mock_db.examSessions.insert_one({**exam, "start": datetime(2020, 1, 1)}))
+    asyncio.run(mock_db.incidents.insert_one({"examSessionId": "e1", "description": "late"}))
+    summary = asyncio.run(server.archive_exam(exam))
+    assert summary["file"].endswith(".ndjson.zst")
+    rows = asyncio.run(server.read_archive({**exam, "archive": summary}))
+    assert rows[0][1]["start"] == datetime(2020, 1, 1)
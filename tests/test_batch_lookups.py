@@ -0,0 +1,63 @@
+import asyncio
+import uuid
+
+from tests.conftest import AUTH, auth_headers, seed_college
+
+
+def _second_block(db, college_id):
+    block = {"id": str(uuid.uuid4()), "collegeId": college_id, "name": "B Block"}
+    rooms = [{"id": str(uuid.uuid4()), "blockId": block["id"], "roomNumber": f"B-{i}", "capacity": 40, "benches": 20} for i in (2, 1)]
+    asyncio.run(db.blocks.insert_one(block))
+    asyncio.run(db.rooms.insert_many(rooms))
+    return block
+
+
+def test_rooms_for_many_blocks_in_one_query(api, mock_db, budget):
+    data = seed_college(mock_db, students=1)
+    block_b = _second_block(mock_db, data["admin"]["collegeId"])
+    block_a = data["rooms"][0]["blockId"]
+
+    with budget(AUTH + 1):
+        response = api.post("/api/rooms:batchGet?fields=roomNumber", json={"ids": [block_a, block_b["id"], "missing"]},
+                            headers=auth_headers(data["admin"]))
+    rooms = response.json()
+    assert [r["roomNumber"] for r in rooms[block_a]] == ["A-100", "A-101"]
+    assert [r["roomNumber"] for r in rooms[block_b["id"]]] == ["B-1", "B-2"]
+    assert set(rooms[block_a][0]) == {"id", "roomNumber"} and rooms["missing"] == []
+
+
+def test_users_and_exams_are_scoped_to_the_college(api, mock_db, budget):
+    data = seed_college(mock_db, students=3)
+    other = seed_college(mock_db, students=1)
+    headers = auth_headers(data["admin"])
+    ids = [s["id"] for s in data["students"]] + [other["students"][0]["id"]]
+
+    with budget(AUTH + 1):
+        users = api.post("/api/users:batchGet", json={"ids": ids}, headers=headers).json()
+    assert set(users) == set(ids[:3])
+    assert all("password" not in user for user in users.values())
+    assert api.post("/api/users:batchGet", json={"ids": ids}, headers=auth_headers(data["students"][0])).status_code == 403
+
+    exams = api.post("/api/exams:batchGet", json={"ids": [data["exam"]["id"], other["exam"]["id"]]}, headers=headers).json()
+    assert list(exams) == [data["exam"]["id"]] and exams[data["exam"]["id"]]["title"] == "Mid Term"
+
+
+def test_request_size_is_capped(api, mock_db):
+    data = seed_college(mock_db, students=1)
+    response = api.post("/api/users:batchGet", json={"ids": [str(i) for i in range(501)]}, headers=auth_headers(data["admin"]))
+    assert response.status_code == 422
+
+
+def test_bootstrap_returns_blocks_rooms_and_subjects(api, mock_db, budget):
+    data = seed_college(mock_db, students=1)
+    college_id = data["admin"]["collegeId"]
+    _second_block(mock_db, college_id)
+    asyncio.run(mock_db.branchSubjects.insert_one({"id": "bs1", "collegeId": college_id, "branch": "CSE", "year": 3, "subjects": ["Networks"]}))
+
+    with budget(AUTH + 3):
+        body = api.get(f"/api/colleges/{college_id}/bootstrap", headers=auth_headers(data["admin"])).json()
+    assert [b["name"] for b in body["blocks"]] == ["A Block", "B Block"]
+    assert [r["roomNumber"] for r in body["blocks"][1]["rooms"]] == ["B-1", "B-2"]
+    assert body["branchSubjects"][0]["subjects"] == ["Networks"]
+    other = seed_college(mock_db, students=1)
+    assert api.get(f"/api/colleges/{college_id}/bootstrap", headers=auth_headers(other["admin"])).status_code == 403
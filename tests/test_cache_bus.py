@@ -0,0 +1,75 @@
+import asyncio
+import time
+from datetime import datetime
+
+from backend import server
+from tests.conftest import auth_headers, seed_college
+
+
+def _bus(mode):
+    bus = server.InvalidationBus(mode)
+    dropped = []
+    bus.subscribe("studentExamCards", "studentId", dropped.append)
+    return bus, dropped
+
+
+def test_local_buses_share_invalidations():
+    first, first_dropped = _bus("local")
+    second, second_dropped = _bus("local")
+
+    first.publish("studentExamCards", ["s1", "s2"])
+    assert first_dropped == second_dropped == [["s1", "s2"]]
+    second.publish("studentExamCards", None)
+    assert first_dropped[-1] is None
+    assert first.snapshot()["events"] == 1 and first.snapshot()["keysInvalidated"] == 0
+
+
+def test_polling_delivers_other_workers_writes(mock_db, counter):
+    async def scenario():
+        writer, writer_dropped = _bus("poll")
+        reader, reader_dropped = _bus("poll")
+        await reader.poll_once()  # baseline
+
+        writer.publish("studentExamCards", ["s1"])
+        writer.publish("studentExamCards", ["s2", "s3"])
+        await asyncio.gather(*writer._pending)
+        counter.reset()
+        await reader.poll_once()
+        assert counter.calls == [("cacheVersions", "find"), ("cacheVersions", "find_one")]  # versions, then the new tail of the one log that moved
+        counter.reset()
+        await reader.poll_once()
+        assert counter.calls == [("cacheVersions", "find")]  # nothing moved: versions only
+        await writer.poll_once()
+        assert reader_dropped == [["s1"], ["s2", "s3"]]
+        assert writer_dropped == [["s1"], ["s2", "s3"]]  # its own, heard once at publish time
+        assert reader.snapshot()["keysInvalidated"] == 3
+
+        # A reader that fell further behind than the log reaches drops everything
+        await mock_db.cacheVersions.update_one({"_id": "studentExamCards"}, {"$inc": {"version": server.CACHE_BUS_LOG + 1}})
+        await reader.poll_once()
+        assert reader_dropped[-1] is None
+
+    asyncio.run(scenario())
+
+
+def test_change_events_invalidate_by_key():
+    bus, dropped = _bus("changestream")
+    wall = datetime.utcfromtimestamp(time.time() - 0.25)
+    bus.on_change({"ns": {"db": "x", "coll": "studentExamCards"}, "operationType": "update",
+                   "wallTime": wall, "fullDocument": {"studentId": "s9"}})
+    bus.on_change({"ns": {"db": "x", "coll": "studentExamCards"}, "operationType": "delete", "wallTime": wall})
+    assert dropped == [["s9"], None]
+    assert bus.snapshot()["lagMsMax"] >= 250
+
+
+def test_card_writes_go_through_the_bus(api, mock_db):
+    data = seed_college(mock_db, students=2)
+    student = data["students"][0]
+    other, other_dropped = _bus("local")
+    api.post(f"/api/exams/{data['exam']['id']}/allocate", json=[data["rooms"][0]["id"]], headers=auth_headers(data["admin"]))
+    assert sorted(other_dropped[-1]) == sorted(s["id"] for s in data["students"])
+
+    metrics = api.get("/metrics", headers=auth_headers(data["admin"])).json()
+    assert metrics["cacheBus"]["mode"] == "local"
+    assert metrics["cacheBus"]["collections"] == ["studentExamCards"]
+    assert student["id"] in other_dropped[-1]
@@ -0,0 +1,76 @@
+import asyncio
+import uuid
+
+from backend import server
+from tests.conftest import auth_headers, seed_college
+from tests.test_jobs import wait_for_job
+
+
+def _seed_dependents(db, data):
+    exam_id, room_id = data["exam"]["id"], data["rooms"][0]["id"]
+
+    async def _insert():
+        for collection, field in server.CASCADE_RELATIONS["exam"]["dependents"]:
+            await db[collection].insert_one({"id": str(uuid.uuid4()), field: exam_id, "roomId": room_id})
+
+    asyncio.run(_insert())
+
+
+def _remaining(db, exam_id):
+    async def _count():
+        return {
+            collection: await db[collection].count_documents({field: exam_id})
+            for collection, field in server.CASCADE_RELATIONS["exam"]["dependents"]
+        }
+    return asyncio.run(_count())
+
+
+def test_exam_delete_cascades_to_every_dependent(api, mock_db):
+    data = seed_college(mock_db, students=10)
+    exam_id = data["exam"]["id"]
+    headers = auth_headers(data["admin"])
+    api.post(f"/api/exams/{exam_id}/allocate", json=[data["rooms"][0]["id"]], headers=headers)
+    _seed_dependents(mock_db, data)
+
+    response = api.delete(f"/api/exams/{exam_id}", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["deleted"]["roomSeatings"] == 2
+    assert response.json()["deleted"]["notifications"] == 11
+    assert set(_remaining(mock_db, exam_id).values()) == {0}
+    assert asyncio.run(mock_db.examSessions.count_documents({"id": exam_id})) == 0
+
+
+def test_block_delete_removes_rooms_and_their_allocations(api, mock_db):
+    data = seed_college(mock_db, students=10)
+    headers = auth_headers(data["admin"])
+    api.post(f"/api/exams/{data['exam']['id']}/allocate", json=[r["id"] for r in data["rooms"]], headers=headers)
+    block_id = data["rooms"][0]["blockId"]
+
+    response = api.delete(f"/api/blocks/{block_id}", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["deleted"]["rooms"] == 2
+    assert response.json()["deleted"]["roomSeatings"] == 2
+    assert asyncio.run(mock_db.roomSeatings.count_documents({})) == 0
+    assert asyncio.run(mock_db.examInvigilators.count_documents({})) == 0
+    # the exam itself is not a dependent of the block
+    assert asyncio.run(mock_db.examSessions.count_documents({})) == 1
+
+
+def test_soft_delete_hides_exam_and_purges_in_background(api, mock_db, monkeypatch):
+    monkeypatch.setattr(server, "CASCADE_PURGE_BATCH", 3)
+    data = seed_college(mock_db, students=10)
+    exam_id = data["exam"]["id"]
+    headers = auth_headers(data["admin"])
+    api.post(f"/api/exams/{exam_id}/allocate", json=[data["rooms"][0]["id"]], headers=headers)
+
+    response = api.delete(f"/api/exams/{exam_id}?mode=soft", headers=headers)
+    assert response.status_code == 202
+    assert api.get(f"/api/exams/{data['admin']['collegeId']}", headers=headers).json() == []
+    student = auth_headers(data["students"][0])
+    assert api.get(f"/api/allocations/student/{data['students'][0]['id']}", headers=student).json() == []
+
+    job = wait_for_job(api, response.json()["jobId"], headers)
+    assert job["status"] == "succeeded"
+    assert job["result"]["deleted"]["roomSeatings"] == 1
+    assert set(_remaining(mock_db, exam_id).values()) == {0}
+    assert asyncio.run(mock_db.examSessions.count_documents({"id": exam_id})) == 0
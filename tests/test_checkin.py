@@ -0,0 +1,111 @@
+import asyncio
+import time
+
+import pytest
+
+from backend import server
+from tests.conftest import auth_headers, seed_college
+
+
+def _scanned(api, mock_db, students=6, rooms=1):
+    data = seed_college(mock_db, students=students, rooms=rooms)
+    api.post(f"/api/exams/{data['exam']['id']}/allocate", json=[r["id"] for r in data["rooms"]], headers=auth_headers(data["admin"]))
+    tokens = [
+        api.get(f"/api/allocations/student/{s['id']}", headers=auth_headers(s)).json()[0]["checkinToken"]
+        for s in data["students"]
+    ]
+    return data, tokens
+
+
+def _attendance(api, data):
+    rows = api.get(f"/api/allocations/exam/{data['exam']['id']}", headers=auth_headers(data["invigilator"])).json()
+    return {row["studentId"]: row["attendance"] for row in rows}
+
+
+def test_tokens_round_trip_and_reject_tampering():
+    seat = {"id": "b1:0", "examSessionId": "e1", "studentId": "s1", "roomId": "r1", "benchNumber": 4,
+            "seatPosition": None, "exam": {"date": "2030-01-10", "startTime": "10:00", "endTime": "13:00"}}
+    token = server.checkin_token(seat)
+    assert server.verify_checkin_token(token)["benchNumber"] == 4
+
+    payload, _, mac = token.partition(".")
+    forged = server._b64(server._unb64(payload).replace(b"|4|", b"|5|"))
+    for bad in (f"{forged}.{mac}", token[:-2] + "AA", "not-a-token", ""):
+        with pytest.raises(ValueError, match="invalid"):
+            server.verify_checkin_token(bad)
+    with pytest.raises(ValueError, match="expired"):
+        server.verify_checkin_token(token, now=time.mktime((2030, 1, 11, 0, 0, 0, 0, 0, 0)))
+
+
+def test_batch_checkin_marks_present_in_one_write(api, mock_db, budget):
+    data, tokens = _scanned(api, mock_db)
+    headers = auth_headers(data["invigilator"])
+    tampered = tokens[0][:-2] + ("AA" if not tokens[0].endswith("AA") else "BB")
+
+    with budget(3):  # auth, the invigilator's duties, then a single bulk write
+        response = api.post("/api/checkin:batch", json={"tokens": tokens[:4] + [tokens[0], tampered]}, headers=headers)
+    assert response.json() == {"marked": 4, "stale": 0, "rejected": [{"index": 5, "reason": "invalid"}]}
+    attendance = _attendance(api, data)
+    assert [attendance[s["id"]] for s in data["students"]] == ["present"] * 4 + ["pending"] * 2
+
+
+def test_batch_checkin_scoping(api, mock_db):
+    data, tokens = _scanned(api, mock_db, students=2)
+    headers = auth_headers(data["invigilator"])
+    assert api.post("/api/checkin:batch", json={"tokens": tokens}, headers=auth_headers(data["students"][0])).status_code == 403
+
+    response = api.post("/api/checkin:batch", json={"tokens": tokens, "roomId": "another-room"}, headers=headers).json()
+    assert response["marked"] == 0 and {r["reason"] for r in response["rejected"]} == {"wrong_room"}
+    response = api.post("/api/checkin:batch", json={"tokens": tokens, "examId": "other"}, headers=headers).json()
+    assert {r["reason"] for r in response["rejected"]} == {"wrong_exam"}
+
+    # A seat that no longer belongs to the student is stale, not silently re-marked
+    asyncio.run(mock_db.roomSeatings.update_many({}, {"$set": {"seats.0.s": "someone-else"}}))
+    assert api.post("/api/checkin:batch", json={"tokens": tokens}, headers=headers).json()["stale"] == 1
+
+
+def test_only_the_exams_staff_can_check_in(api, mock_db):
+    data, tokens = _scanned(api, mock_db, students=2)
+    exam_id = data["exam"]["id"]
+    outsider = {**data["invigilator"], "_id": "outsider", "id": "outsider", "email": "outsider@example.com"}
+    other_admin = {**data["admin"], "_id": "other-admin", "id": "other-admin", "email": "other@example.com", "collegeId": "elsewhere"}
+    asyncio.run(mock_db.users.insert_many([dict(outsider), dict(other_admin)]))
+
+    for user in (outsider, other_admin):
+        assert api.get(f"/api/exams/{exam_id}/checkin_key", headers=auth_headers(user)).status_code == 403
+        response = api.post("/api/checkin:batch", json={"tokens": tokens}, headers=auth_headers(user)).json()
+        assert response["marked"] == 0 and [r["reason"] for r in response["rejected"]] == ["not_on_duty"] * 2
+    assert set(_attendance(api, data).values()) == {"pending"}
+
+    # A duty assigned by hand counts, a declined one doesn't
+    duty = {"id": "d1", "examSessionId": exam_id, "invigilatorId": "outsider", "roomId": data["rooms"][0]["id"], "status": "declined"}
+    asyncio.run(mock_db.invigilatorDuties.insert_one(duty))
+    assert api.get(f"/api/exams/{exam_id}/checkin_key", headers=auth_headers(outsider)).status_code == 403
+    asyncio.run(mock_db.invigilatorDuties.update_one({"id": "d1"}, {"$set": {"status": "accepted"}}))
+    assert api.get(f"/api/exams/{exam_id}/checkin_key", headers=auth_headers(outsider)).status_code == 200
+    assert api.post("/api/checkin:batch", json={"tokens": tokens[:1]}, headers=auth_headers(outsider)).json()["marked"] == 1
+    assert api.post("/api/checkin:batch", json={"tokens": tokens[1:]}, headers=auth_headers(data["admin"])).json()["marked"] == 1
+    assert set(_attendance(api, data).values()) == {"present"}
+
+
+def test_invigilator_device_can_verify_offline(api, mock_db):
+    import base64
+    import hashlib
+    import hmac
+
+    data, tokens = _scanned(api, mock_db, students=1)
+    key = api.get(f"/api/exams/{data['exam']['id']}/checkin_key", headers=auth_headers(data["invigilator"])).json()["key"]
+    payload, _, mac = tokens[0].partition(".")
+    raw = base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+    expected = hmac.new(base64.urlsafe_b64decode(key + "=" * (-len(key) % 4)), raw, hashlib.sha256).digest()[:16]
+    assert base64.urlsafe_b64encode(expected).rstrip(b"=").decode() == mac
+
+
+def test_verification_throughput():
+    seats = [{"id": f"b{i}:{i % 60}", "examSessionId": "e1", "studentId": f"s{i}", "roomId": "r1", "benchNumber": i % 60 + 1,
+              "seatPosition": "A", "exam": {"date": "2030-01-10", "startTime": "10:00", "endTime": "13:00"}} for i in range(5000)]
+    tokens = [server.checkin_token(seat) for seat in seats]
+    started = time.perf_counter()
+    for token in tokens:
+        server.verify_checkin_token(token)
+    assert len(tokens) / (time.perf_counter() - started) > 5000  # verifications per second
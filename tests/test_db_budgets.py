@@ -0,0 +1,83 @@
+"""
+Round-trip budgets for hot endpoints. Each budget is independent of the number
+of students/seats involved, so a per-row query loop fails these tests.
+"""
+import asyncio
+
+import pytest
+
+from tests.conftest import AUTH, auth_headers, seed_college
+
+
+@pytest.mark.parametrize("students", [10, 300])
+def test_allocate_seats_budget_is_constant(api, mock_db, budget, students):
+    data = seed_college(mock_db, students=students, rooms=6, benches=60)
+    room_ids = [r["id"] for r in data["rooms"]]
+    with budget(AUTH + 11):
+        response = api.post(f"/api/exams/{data['exam']['id']}/allocate", json=room_ids, headers=auth_headers(data["admin"]))
+    assert response.status_code == 200
+    assert response.json()["count"] == students
+
+
+def test_student_allocation_view_budget(api, mock_db, budget):
+    data = seed_college(mock_db, students=5)
+    api.post(f"/api/exams/{data['exam']['id']}/allocate", json=[data["rooms"][0]["id"]], headers=auth_headers(data["admin"]))
+    student = data["students"][0]
+    with budget(1):  # the token is verified without a user lookup; the card is one indexed read
+        response = api.get(f"/api/allocations/student/{student['id']}", headers=auth_headers(student))
+    assert response.status_code == 200
+    [seat] = response.json()
+    assert seat["exam"]["title"] == "Mid Term"
+    assert seat["room"]["roomNumber"] == "A-100"
+    assert seat["block"]["name"] == "A Block"
+    assert "_id" not in seat["exam"]
+
+
+@pytest.mark.parametrize("students", [5, 120])
+def test_exam_allocation_views_budget(api, mock_db, budget, students):
+    data = seed_college(mock_db, students=students, rooms=4)
+    headers = auth_headers(data["admin"])
+    api.post(f"/api/exams/{data['exam']['id']}/allocate", json=[r["id"] for r in data["rooms"]], headers=headers)
+
+    with budget(AUTH + 4):
+        response = api.get(f"/api/allocations/exam/{data['exam']['id']}", headers=headers)
+    assert len(response.json()) == students
+    assert all(row["student"] and row["block"] for row in response.json())
+
+    with budget(AUTH + 6):
+        response = api.get(f"/api/exams/{data['exam']['id']}/download?format=csv", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-disposition"].startswith("attachment;")
+    assert response.text.count("Invig") >= 1
+
+    with budget(AUTH + 2):
+        response = api.get(f"/api/duties/room/{data['rooms'][0]['id']}/exam/{data['exam']['id']}", headers=headers)
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("rows", [3, 200])
+def test_upload_attendance_csv_budget(api, mock_db, budget, rows):
+    data = seed_college(mock_db, students=rows)
+    lines = ["Student Name,Roll Number,Branch,Year,Attendance %"]
+    lines += [f"{s['profile']['name']},{s['rollNumber']},CSE,3,{60 + i % 20}%" for i, s in enumerate(data["students"])]
+    lines += ["Ghost,NOPE001,CSE,3,50", "Bad,22A91A0000,CSE,3,abc"]
+    payload = "\n".join(lines).encode()
+
+    with budget(AUTH + 5):
+        response = api.post(
+            f"/api/exams/{data['exam']['id']}/upload_attendance_csv",
+            files={"file": ("attendance.csv", payload, "text/csv")},
+            headers=auth_headers(data["admin"]),
+        )
+    body = response.json()
+    assert response.status_code == 200
+    assert body["total"] == rows
+    assert len(body["errors"]) == 2
+
+    # Re-uploading updates the existing restrictions instead of duplicating them
+    api.post(
+        f"/api/exams/{data['exam']['id']}/upload_attendance_csv",
+        files={"file": ("attendance.csv", payload, "text/csv")},
+        headers=auth_headers(data["admin"]),
+    )
+    assert asyncio.run(mock_db.examAttendanceRestrictions.count_documents({"examId": data["exam"]["id"]})) == rows
@@ -0,0 +1,131 @@
+import asyncio
+import io
+import re
+import time
+import zipfile
+
+import pytest
+
+from backend import documents, server
+from tests.conftest import AUTH, auth_headers, seed_college
+
+
+@pytest.fixture
+def render_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "RENDER_CACHE_DIR", tmp_path)
+    monkeypatch.setattr(server, "RENDER_WORKERS", 0)
+    return tmp_path
+
+
+def _room(seats):
+    return {
+        "exam": {"title": "Mid Term (CSE)", "date": "2030-01-10", "startTime": "10:00", "endTime": "13:00", "subjects": ["Algorithms"]},
+        "college": "Test College", "roomId": "r1", "roomNumber": "A-100", "block": "A Block", "invigilator": None,
+        "seats": [
+            {"bench": i // 2 + 1, "position": "AB"[i % 2], "roll": f"22A91A{i:04d}", "name": f"Student {i}", "branch": "CSE", "year": 3}
+            for i in range(seats)
+        ],
+    }
+
+
+def _check_pdf(content: bytes) -> int:
+    assert content.startswith(b"%PDF-1.4") and content.rstrip().endswith(b"%%EOF")
+    xref = int(re.search(rb"startxref\n(\d+)", content).group(1))
+    assert content[xref:xref + 4] == b"xref"
+    offsets = [int(o) for o in re.findall(rb"(\d{10}) 00000 n", content)]
+    for number, offset in enumerate(offsets, start=1):
+        assert content[offset:].startswith(b"%d 0 obj" % number)
+    return int(re.search(rb"/Count (\d+)", content).group(1))
+
+
+def test_pdfs_are_well_formed():
+    assert _check_pdf(documents.render_hall_tickets(_room(3))) == 2  # two tickets per page
+    assert _check_pdf(documents.render_room_sheet(_room(40))) == 2
+    assert _check_pdf(documents.render_room_sheet(_room(0))) == 1
+
+
+def test_ten_thousand_tickets_render_within_a_minute():
+    rooms = [_room(100) for _ in range(100)]
+    started = time.perf_counter()
+    for room in rooms:
+        documents.render_room_documents(room)
+    assert time.perf_counter() - started < 60
+
+
+def test_exam_zip_is_cached_by_content(api, mock_db, render_cache, monkeypatch):
+    data = seed_college(mock_db, students=30, rooms=2, benches=20)
+    headers = auth_headers(data["admin"])
+    exam_id = data["exam"]["id"]
+    api.post(f"/api/exams/{exam_id}/allocate", json=[r["id"] for r in data["rooms"]], headers=headers)
+
+    response = api.get(f"/api/exams/{exam_id}/documents", headers=headers)
+    assert response.status_code == 200
+    names = sorted(zipfile.ZipFile(io.BytesIO(response.content)).namelist())
+    assert names == [
+        "hall-tickets/A_Block-A-100.pdf", "hall-tickets/A_Block-A-101.pdf",
+        "room-sheets/A_Block-A-100.pdf", "room-sheets/A_Block-A-101.pdf",
+    ]
+
+    rendered = []
+    original = documents.render_room_documents
+    monkeypatch.setattr(documents, "render_room_documents", lambda room: rendered.append(room["roomNumber"]) or original(room))
+    assert api.get(f"/api/exams/{exam_id}/documents", headers=headers).content == response.content
+    assert rendered == []
+
+    # Attendance isn't printed, so marking it keeps the cache; a renamed student re-renders one room
+    asyncio.run(mock_db.roomSeatings.update_many({}, {"$set": {"seats.0.a": "present"}}))
+    api.get(f"/api/exams/{exam_id}/documents", headers=headers)
+    assert rendered == []
+    asyncio.run(mock_db.users.update_one({"id": data["students"][0]["id"]}, {"$set": {"profile.name": "Renamed"}}))
+    assert api.get(f"/api/exams/{exam_id}/documents", headers=headers).content != response.content
+    assert rendered == ["A-100"]
+
+
+def test_room_sheet_renders_in_the_process_pool(api, mock_db, render_cache, monkeypatch):
+    monkeypatch.setattr(server, "RENDER_WORKERS", 1)
+    monkeypatch.setattr(server, "_render_pool", None)
+    data = seed_college(mock_db, students=5)
+    exam_id, room_id = data["exam"]["id"], data["rooms"][0]["id"]
+    api.post(f"/api/exams/{exam_id}/allocate", json=[room_id], headers=auth_headers(data["admin"]))
+    try:
+        response = api.get(f"/api/rooms/{room_id}/exam/{exam_id}/sheet.pdf", headers=auth_headers(data["invigilator"]))
+    finally:
+        if server._render_pool is not None:
+            server._render_pool.shutdown()
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/pdf"
+    assert _check_pdf(response.content) == 1
+
+
+def test_room_layout_svg(api, mock_db, budget):
+    data = seed_college(mock_db, students=5, benches=12)
+    exam_id, room = data["exam"]["id"], data["rooms"][0]
+    asyncio.run(mock_db.rooms.update_one({"id": room["id"]}, {"$set": {"columns": 4}}))
+    api.post(f"/api/exams/{exam_id}/allocate", json=[room["id"]], headers=auth_headers(data["admin"]))
+    headers = auth_headers(data["invigilator"])
+    url = f"/api/rooms/{room['id']}/exam/{exam_id}/layout.svg"
+
+    first = api.get(url, headers=headers)
+    assert first.status_code == 200 and first.headers["content-type"].startswith("image/svg+xml")
+    svg = first.text
+    assert svg.startswith("<svg") and svg.endswith("</svg>")
+    assert all(s["rollNumber"] in svg for s in data["students"])
+    assert f'width="{2 * 20 + 4 * 150 + 3 * 14}"' in svg  # four benches to a row
+    assert svg.count(documents.SEAT_COLORS[None]) == 7 + 1  # free benches plus the legend
+
+    with budget(AUTH + 2):  # served from cache: the bucket and room reads only
+        assert api.get(url, headers=headers).text == svg
+    assert api.get(url, headers={**headers, "If-None-Match": first.headers["etag"]}).status_code == 304
+
+    seat_id = api.get(f"/api/allocations/exam/{exam_id}", headers=headers).json()[0]["id"]
+    api.put(f"/api/allocations/{seat_id}/attendance?attendance=present", headers=headers)
+    changed = api.get(url, headers={**headers, "If-None-Match": first.headers["etag"]})
+    assert changed.status_code == 200 and documents.SEAT_COLORS["present"] in changed.text
+
+
+def test_sixty_bench_layout_renders_in_milliseconds():
+    slots = {b: [{"position": p, "roll": f"22A91A{b:03d}{p}", "attendance": "pending"} for p in "AB"] for b in range(1, 61)}
+    started = time.perf_counter()
+    svg = "".join(documents.iter_room_svg("Room A-100", 60, 6, slots))
+    assert time.perf_counter() - started < 0.05
+    assert svg.count("<g>") == 60
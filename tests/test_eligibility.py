@@ -0,0 +1,115 @@
+import asyncio
+
+from tests.conftest import AUTH, auth_headers, seed_college
+
+POLICY = {"blockedBelow": 65, "conditionalBelow": 75}
+
+
+def _upload(api, data, percentages):
+    lines = ["Student Name,Roll Number,Branch,Year,Attendance %"]
+    lines += [f"{s['profile']['name']},{s['rollNumber']},CSE,3,{p}" for s, p in zip(data["students"], percentages)]
+    response = api.post(
+        f"/api/exams/{data['exam']['id']}/upload_attendance_csv",
+        files={"file": ("attendance.csv", "\n".join(lines).encode(), "text/csv")},
+        headers=auth_headers(data["admin"]),
+    )
+    assert response.status_code == 200
+
+
+def _bands(db, exam_id):
+    rows = asyncio.run(db.examAttendanceRestrictions.find({"examId": exam_id}, {"_id": 0}).to_list(None))
+    return {r["attendancePercentage"]: (r["band"], r["isAllowed"]) for r in rows}
+
+
+def test_without_a_policy_every_uploaded_student_is_blocked(api, mock_db):
+    data = seed_college(mock_db, students=3)
+    _upload(api, data, [50, 70, 90])
+    assert _bands(mock_db, data["exam"]["id"]) == {
+        50: ("blocked", False), 70: ("blocked", False), 90: ("blocked", False),
+    }
+
+
+def test_policy_bands_uploads(api, mock_db):
+    data = seed_college(mock_db, students=3)
+    headers = auth_headers(data["admin"])
+    assert api.put(f"/api/exams/{data['exam']['id']}/eligibility_policy", json=POLICY, headers=headers).status_code == 200
+    _upload(api, data, [50, 70, 90])
+    assert _bands(mock_db, data["exam"]["id"]) == {
+        50: ("blocked", False), 70: ("conditional", False), 90: ("eligible", True),
+    }
+
+
+def test_policy_rejects_inverted_thresholds(api, mock_db):
+    data = seed_college(mock_db, students=1)
+    response = api.put(
+        f"/api/exams/{data['exam']['id']}/eligibility_policy",
+        json={"blockedBelow": 80, "conditionalBelow": 70}, headers=auth_headers(data["admin"]),
+    )
+    assert response.status_code == 422
+
+
+def test_eligibility_page_filters_and_counts(api, mock_db, budget):
+    data = seed_college(mock_db, students=30)
+    asyncio.run(mock_db.users.update_many(
+        {"id": {"$in": [s["id"] for s in data["students"][20:]]}}, {"$set": {"profile.branch": "ECE"}}
+    ))
+    headers = auth_headers(data["admin"])
+    api.put(f"/api/exams/{data['exam']['id']}/eligibility_policy", json=POLICY, headers=headers)
+    _upload(api, data, [50 + i * 1.5 for i in range(30)])
+
+    with budget(AUTH + 2):
+        response = api.get(
+            f"/api/exams/{data['exam']['id']}/eligibility?branch=CSE&band=conditional&skip=2&limit=3", headers=headers
+        )
+    body = response.json()
+    assert body["counts"] == {"blocked": 10, "conditional": 7, "eligible": 3}
+    assert body["total"] == 7
+    assert [row["rollNumber"] for row in body["items"]] == ["22A91A0012", "22A91A0013", "22A91A0014"]
+    assert {row["branch"] for row in body["items"]} == {"CSE"}
+
+    with budget(AUTH + 1):
+        legacy = api.get(f"/api/exams/{data['exam']['id']}/restricted_students", headers=headers).json()
+    assert len(legacy) == 30 and legacy[0]["studentName"] == "Student 0"
+
+
+def test_reevaluation_keeps_grants_and_seats_newly_eligible(api, mock_db, budget):
+    data = seed_college(mock_db, students=6)
+    exam_id = data["exam"]["id"]
+    headers = auth_headers(data["admin"])
+    _upload(api, data, [50, 60, 70, 80, 90, 95])
+    granted = data["students"][0]
+    api.post(f"/api/exams/{exam_id}/grant_permission/{granted['id']}", headers=headers)
+    api.post(f"/api/exams/{exam_id}/allocate", json=[data["rooms"][0]["id"]], headers=headers)
+
+    # Re-banding is one update_many however many students; the rest is seating the newly eligible
+    with budget(AUTH + 11):
+        response = api.put(f"/api/exams/{exam_id}/eligibility_policy", json=POLICY, headers=headers)
+    body = response.json()
+    assert body["evaluated"] == 6
+    assert len(body["seating"]["placed"]) == 3  # 80, 90 and 95 become eligible
+    assert _bands(mock_db, exam_id) == {
+        50: ("blocked", True), 60: ("blocked", False), 70: ("conditional", False),
+        80: ("eligible", True), 90: ("eligible", True), 95: ("eligible", True),
+    }
+
+
+def test_stricter_policy_unseats_students_who_lose_eligibility(api, mock_db):
+    data = seed_college(mock_db, students=4)
+    exam_id = data["exam"]["id"]
+    headers = auth_headers(data["admin"])
+    api.put(f"/api/exams/{exam_id}/eligibility_policy", json=POLICY, headers=headers)
+    _upload(api, data, [50, 80, 90, 95])
+    api.post(f"/api/exams/{exam_id}/allocate", json=[data["rooms"][0]["id"]], headers=headers)
+    seated = lambda: sorted(r["studentId"] for r in api.get(f"/api/allocations/exam/{exam_id}", headers=headers).json())
+    assert seated() == sorted(s["id"] for s in data["students"][1:])
+
+    dropped = data["students"][1]
+    body = api.put(f"/api/exams/{exam_id}/eligibility_policy", json={**POLICY, "conditionalBelow": 85}, headers=headers).json()
+    assert body["unseated"] == [dropped["id"]]
+    assert dropped["id"] not in seated()
+    assert api.get(f"/api/allocations/student/{dropped['id']}", headers=auth_headers(dropped)).json() == []
+
+    # Loosening the policy again seats them in a free seat
+    body = api.put(f"/api/exams/{exam_id}/eligibility_policy", json=POLICY, headers=headers).json()
+    assert body["unseated"] == [] and [p["studentId"] for p in body["seating"]["placed"]] == [dropped["id"]]
+    assert seated() == sorted(s["id"] for s in data["students"][1:])
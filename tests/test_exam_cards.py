@@ -0,0 +1,63 @@
+import asyncio
+
+from tests.conftest import auth_headers, seed_college
+
+
+def _allocated(api, mock_db, **kwargs):
+    data = seed_college(mock_db, **kwargs)
+    api.post(
+        f"/api/exams/{data['exam']['id']}/allocate",
+        json=[r["id"] for r in data["rooms"]], headers=auth_headers(data["admin"]),
+    )
+    return data
+
+
+def _card(api, student):
+    response = api.get(f"/api/allocations/student/{student['id']}", headers=auth_headers(student))
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_students_only_see_their_own_card(api, mock_db):
+    data = _allocated(api, mock_db, students=3)
+    me, other = data["students"][:2]
+    url = f"/api/allocations/student/{me['id']}"
+    assert api.get(url, headers=auth_headers(other)).status_code == 403
+    assert api.get(url, headers=auth_headers(data["admin"])).status_code == 403
+    assert api.get(url).status_code in (401, 403)
+
+
+def test_repeat_reads_are_served_from_cache(api, mock_db, budget):
+    data = _allocated(api, mock_db, students=3)
+    student = data["students"][0]
+    first = _card(api, student)
+    with budget(0):
+        assert _card(api, student) == first
+
+
+def test_card_follows_room_and_exam_edits(api, mock_db):
+    data = _allocated(api, mock_db, students=3)
+    headers = auth_headers(data["admin"])
+    student = data["students"][0]
+    assert _card(api, student)[0]["room"]["roomNumber"] == "A-100"
+
+    room = {**data["rooms"][0], "roomNumber": "A-999"}
+    room.pop("_id", None)
+    assert api.put(f"/api/rooms/{room['id']}", json=room, headers=headers).status_code == 200
+    exam = {**data["exam"], "title": "Final"}
+    exam.pop("_id", None)
+    assert api.put(f"/api/exams/{exam['id']}", json=exam, headers=headers).status_code == 200
+
+    [seat] = _card(api, student)
+    assert seat["room"]["roomNumber"] == "A-999"
+    assert seat["exam"]["title"] == "Final"
+
+
+def test_deleting_the_exam_clears_cards(api, mock_db):
+    data = _allocated(api, mock_db, students=3)
+    student = data["students"][0]
+    assert len(_card(api, student)) == 1
+    api.delete(f"/api/exams/{data['exam']['id']}", headers=auth_headers(data["admin"]))
+    assert _card(api, student) == []
+    card = asyncio.run(mock_db.studentExamCards.find_one({"studentId": student["id"]}))
+    assert card["examIds"] == []
@@ -0,0 +1,85 @@
+import asyncio
+import uuid
+
+from backend import server
+from tests.conftest import auth_headers, seed_college
+
+
+def _exam(date="2030-01-10", start="10:00", end="13:00", years=(3,), branches=("CSE",), **extra):
+    exam = {"id": str(uuid.uuid4()), "title": "Other", "date": date, "startTime": start, "endTime": end,
+            "years": list(years), "branches": list(branches), **extra}
+    return {**exam, **server.exam_times(exam)}
+
+
+def _body(college_id, **overrides):
+    return {"collegeId": college_id, "title": "New", "date": "2030-01-10", "startTime": "11:00", "endTime": "12:00",
+            "subjects": ["Networks"], "years": [3], "branches": ["CSE"], "status": "scheduled", **overrides}
+
+
+def test_cohort_index_overlap_rules():
+    morning = _exam(start="09:00", end="12:00")
+    long_day = _exam(start="08:00", end="17:00", branches=("ECE",))
+    index = server.CohortIndex([morning, long_day, _exam(date="2030-01-11")])
+
+    assert index.clashes(_exam(start="11:00", end="14:00")) == {morning["id"]: [(3, "CSE")]}
+    assert index.clashes(_exam(start="12:00", end="14:00")) == {}  # back-to-back is fine
+    assert index.clashes(_exam(start="16:00", end="18:00", branches=("CSE", "ECE"))) == {long_day["id"]: [(3, "ECE")]}
+    assert index.clashes(morning) == {}  # an exam never clashes with itself
+
+
+def test_create_exam_reports_cohort_clashes(api, mock_db):
+    data = seed_college(mock_db, students=4)
+    college_id = data["admin"]["collegeId"]
+    asyncio.run(mock_db.examSessions.update_one({"id": data["exam"]["id"]}, {"$set": server.exam_times(data["exam"])}))
+    headers = auth_headers(data["admin"])
+
+    created = api.post("/api/exams", json=_body(college_id), headers=headers).json()
+    [clash] = created["clashes"]
+    assert clash["examId"] == data["exam"]["id"]
+    assert clash["cohorts"] == [{"year": 3, "branch": "CSE"}]
+    assert clash["studentCount"] == 4
+    assert asyncio.run(mock_db.examSessions.find_one({"id": created["id"]}, {"clashes": 1, "_id": 0})) == {}
+
+    assert api.post("/api/exams", json=_body(college_id, branches=["ECE"]), headers=headers).json()["clashes"] == []
+    assert api.post("/api/exams", json=_body(college_id, startTime="14:00", endTime="15:00"), headers=headers).json()["clashes"] == []
+    draft = api.post("/api/draft_exam", json=_body(college_id, status="draft"), headers=headers).json()
+    assert {c["examId"] for c in draft["clashes"]} == {data["exam"]["id"], created["id"]}
+
+
+def test_clash_check_lists_students(api, mock_db, budget):
+    data = seed_college(mock_db, students=3)
+    college_id = data["admin"]["collegeId"]
+    asyncio.run(mock_db.examSessions.update_one({"id": data["exam"]["id"]}, {"$set": server.exam_times(data["exam"])}))
+    proposal = {k: v for k, v in _body(college_id).items() if k not in ("title", "subjects", "status")}
+
+    with budget(3):
+        response = api.post("/api/exams/clashes?include_students=true", json=proposal, headers=auth_headers(data["admin"]))
+    [clash] = response.json()
+    assert sorted(clash["studentIds"]) == sorted(s["id"] for s in data["students"])
+    editing = api.post("/api/exams/clashes", json={**proposal, "examId": data["exam"]["id"]}, headers=auth_headers(data["admin"]))
+    assert editing.json() == []
+
+
+def test_allocation_reports_double_booked_students(api, mock_db):
+    data = seed_college(mock_db, students=5)
+    headers = auth_headers(data["admin"])
+    college_id = data["admin"]["collegeId"]
+    asyncio.run(mock_db.examSessions.update_one({"id": data["exam"]["id"]}, {"$set": server.exam_times(data["exam"])}))
+    first = api.post(f"/api/exams/{data['exam']['id']}/allocate", json=[data["rooms"][0]["id"]], headers=headers).json()
+    assert first["clashes"] == []
+
+    second = api.post("/api/exams", json=_body(college_id), headers=headers).json()
+    response = api.post(f"/api/exams/{second['id']}/allocate", json=[data["rooms"][1]["id"]], headers=headers).json()
+    [clash] = response["clashes"]
+    assert clash["examId"] == data["exam"]["id"]
+    assert clash["studentCount"] == 5
+    assert response["count"] == 5
+
+
+def test_allocation_skips_clash_check_without_usable_times(api, mock_db):
+    data = seed_college(mock_db, students=5)
+    exam_id = data["exam"]["id"]
+    asyncio.run(mock_db.examSessions.update_one({"id": exam_id}, {"$set": {"date": "sometime in May"}, "$unset": {"start": "", "end": ""}}))
+    response = api.post(f"/api/exams/{exam_id}/allocate", json=[data["rooms"][0]["id"]], headers=auth_headers(data["admin"]))
+    assert response.status_code == 200
+    assert response.json()["clashes"] == [] and response.json()["count"] == 5
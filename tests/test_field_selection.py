@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+from tests.conftest import AUTH, auth_headers, seed_college
+
+
+def _allocated(api, mock_db, students=40):
+    data = seed_college(mock_db, students=students)
+    api.post(f"/api/exams/{data['exam']['id']}/allocate", json=[r["id"] for r in data["rooms"]], headers=auth_headers(data["admin"]))
+    return data
+
+
+def test_allocation_list_returns_only_selected_fields(api, mock_db, budget):
+    data = _allocated(api, mock_db)
+    headers = auth_headers(data["admin"])
+    url = f"/api/allocations/exam/{data['exam']['id']}"
+
+    full = api.get(url, headers=headers)
+    with budget(AUTH + 2):  # seats and students; no room/block aggregate when neither is asked for
+        slim = api.get(f"{url}?fields=benchNumber,student.rollNumber,student.profile.name", headers=headers)
+    row = slim.json()[0]
+    assert set(row) == {"id", "benchNumber", "student"}
+    assert set(row["student"]) == {"id", "rollNumber", "profile"} and set(row["student"]["profile"]) == {"name"}
+    assert len(slim.content) * 3 < len(full.content)
+
+    rooms = api.get(f"{url}?fields=room.roomNumber,block.name", headers=headers).json()[0]
+    assert rooms["room"] == {"id": data["rooms"][0]["id"], "roomNumber": "A-100"}
+    assert rooms["block"]["name"] == "A Block"
+
+
+def test_duties_batch_their_lookups_and_project_the_exam(api, mock_db, budget):
+    data = seed_college(mock_db, students=1, rooms=2)
+    exam_id = data["exam"]["id"]
+    invigilator = data["invigilator"]
+    asyncio.run(mock_db.invigilatorDuties.insert_many([
+        {"id": f"d{i}", "examSessionId": exam_id, "invigilatorId": invigilator["id"], "roomId": room["id"], "status": "pending"}
+        for i, room in enumerate(data["rooms"])
+    ]))
+    url = f"/api/duties/invigilator/{invigilator['id']}"
+    headers = auth_headers(invigilator)
+
+    with budget(AUTH + 3):
+        full = api.get(url, headers=headers).json()
+    assert full[0]["exam"]["subjects"] == ["Algorithms"] and full[0]["block"]["name"] == "A Block"
+    with budget(AUTH + 2):
+        slim = api.get(f"{url}?fields=status,exam.title,exam.date", headers=headers).json()
+    assert slim[0] == {"id": "d0", "status": "pending", "exam": {"id": exam_id, "title": "Mid Term", "date": "2030-01-10"}}
+
+
+def test_unknown_and_private_fields_are_rejected(api, mock_db):
+    data = seed_college(mock_db, students=2)
+    headers = auth_headers(data["admin"])
+    college_id = data["admin"]["collegeId"]
+    for fields in ("password", "profile.secret", "student.password"):
+        response = api.get(f"/api/staff/{college_id}?role=invigilator&fields={fields}", headers=headers)
+        assert response.status_code == 400 and "Unknown field" in response.json()["detail"]
+    staff = api.get(f"/api/staff/{college_id}?role=invigilator&fields=email,profile.name", headers=headers).json()
+    assert staff == [{"id": data["invigilator"]["id"], "email": "invig@test.com", "profile": {"name": "Invig"}}]
+
+
+def test_exam_list_selection_bypasses_the_full_model(api, mock_db):
+    data = seed_college(mock_db, students=1)
+    headers = auth_headers(data["admin"])
+    college_id = data["admin"]["collegeId"]
+    assert api.get(f"/api/exams/{college_id}?fields=title,date", headers=headers).json() == [
+        {"id": data["exam"]["id"], "title": "Mid Term", "date": "2030-01-10"}
+    ]
+    assert "subjects" in api.get(f"/api/exams/{college_id}", headers=headers).json()[0]
+    students = api.get(f"/api/students/{college_id}?fields=rollNumber", headers=headers).json()
+    assert json.dumps(students[0], sort_keys=True) == json.dumps({"id": data["students"][0]["id"], "rollNumber": "22A91A0000"}, sort_keys=True)
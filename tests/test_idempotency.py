@@ -0,0 +1,119 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from starlette.responses import StreamingResponse
+
+from backend import server
+from tests.conftest import auth_headers, seed_college
+
+
+def _draft(api, data):
+    body = {"collegeId": data["admin"]["collegeId"], "title": "Final", "date": "2030-02-01", "startTime": "10:00",
+            "endTime": "13:00", "subjects": ["Networks"], "years": [3], "branches": ["CSE"], "status": "draft"}
+    return api.post("/api/draft_exam", json=body, headers=auth_headers(data["admin"])).json()["id"]
+
+
+def test_double_finalize_creates_one_exam(api, mock_db, budget):
+    data = seed_college(mock_db, students=2)
+    draft_id = _draft(api, data)
+    headers = {**auth_headers(data["admin"]), "Idempotency-Key": "finalize-1"}
+
+    first = api.post(f"/api/draft_exam/{draft_id}/finalize", headers=headers)
+    with budget(0):  # replayed from the in-process cache
+        second = api.post(f"/api/draft_exam/{draft_id}/finalize", headers=headers)
+    assert first.status_code == second.status_code == 200
+    assert second.content == first.content and second.headers["Idempotent-Replayed"] == "true"
+    assert asyncio.run(mock_db.examSessions.count_documents({"title": "Final"})) == 1
+
+    # Another worker has no cache but finds the stored response
+    server.idempotency._cache.clear()
+    assert api.post(f"/api/draft_exam/{draft_id}/finalize", headers=headers).content == first.content
+    assert asyncio.run(mock_db.examSessions.count_documents({"title": "Final"})) == 1
+
+
+def test_key_reuse_and_scoping(api, mock_db):
+    data = seed_college(mock_db, students=2)
+    headers = {**auth_headers(data["admin"]), "Idempotency-Key": "k"}
+    exam_id = data["exam"]["id"]
+    api.post(f"/api/exams/{exam_id}/allocate", json=[data["rooms"][0]["id"]], headers=headers)
+    reused = api.post(f"/api/exams/{exam_id}/allocate", json=[data["rooms"][1]["id"]], headers=headers)
+    assert reused.status_code == 422
+
+    # Keys are per user, and requests without a key are untouched
+    other = {**auth_headers(data["invigilator"]), "Idempotency-Key": "k"}
+    assert api.post(f"/api/exams/{exam_id}/allocate", json=[data["rooms"][0]["id"]], headers=other).status_code == 403
+    plain = api.post(f"/api/exams/{exam_id}/allocate", json=[data["rooms"][1]["id"]], headers=auth_headers(data["admin"]))
+    assert plain.status_code == 200 and "Idempotent-Replayed" not in plain.headers
+
+
+def _execute(calls, status=200, delay=0.05):
+    async def execute():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return StreamingResponse(iter([b'{"ok": true}']), status_code=status, media_type="application/json")
+    return execute
+
+
+def test_concurrent_duplicates_wait_for_the_first(mock_db):
+    guard = server.IdempotencyGuard()
+    calls = []
+
+    async def run():
+        await guard.setup()
+        return await asyncio.gather(*(guard.run("key", "fp", _execute(calls)) for _ in range(5)))
+
+    responses = asyncio.run(run())
+    assert len(calls) == 1
+    assert {r.body for r in responses} == {b'{"ok": true}'}
+    assert sum(r.headers.get("Idempotent-Replayed") == "true" for r in responses) == 4
+
+
+def test_duplicate_on_another_worker_polls_for_the_result(mock_db):
+    first, second = server.IdempotencyGuard(), server.IdempotencyGuard()
+    calls = []
+
+    async def run():
+        await first.setup()
+        return await asyncio.gather(
+            first.run("key", "fp", _execute(calls, delay=0.2)),
+            second.run("key", "fp", _execute(calls)),
+        )
+
+    responses = asyncio.run(run())
+    assert len(calls) == 1 and responses[0].body == responses[1].body
+
+
+def test_server_errors_and_abandoned_claims_are_retried(mock_db):
+    guard = server.IdempotencyGuard()
+    calls = []
+
+    async def run():
+        await guard.setup()
+        assert (await guard.run("failing", "fp", _execute(calls, status=503))).status_code == 503
+        assert (await guard.run("failing", "fp", _execute(calls))).status_code == 200
+        # A claim whose worker died is taken over once its lock lapses
+        await mock_db.idempotencyKeys.insert_one({
+            "key": "stale", "fingerprint": "fp", "status": "pending", "createdAt": datetime.utcnow(),
+            "lockedUntil": datetime.utcnow() - timedelta(seconds=1),
+        })
+        assert (await guard.run("stale", "fp", _execute(calls))).status_code == 200
+
+    asyncio.run(run())
+    assert len(calls) == 3
+
+
+def test_slow_request_keeps_its_claim(mock_db, monkeypatch):
+    monkeypatch.setattr(server, "IDEMPOTENCY_LEASE_SECONDS", 0.15)
+    first, second = server.IdempotencyGuard(), server.IdempotencyGuard()
+    calls = []
+
+    async def run():
+        await first.setup()
+        slow = asyncio.ensure_future(first.run("key", "fp", _execute(calls, delay=0.6)))
+        await asyncio.sleep(0.4)  # well past the first lease
+        retry = await second.run("key", "fp", _execute(calls))
+        return await slow, retry
+
+    original, retry = asyncio.run(run())
+    assert len(calls) == 1
+    assert retry.body == original.body and retry.headers["Idempotent-Replayed"] == "true"
@@ -0,0 +1,168 @@
+import asyncio
+import random
+import time
+
+from backend import server
+from tests.conftest import auth_headers, seed_college
+
+
+def _slots(exams, rooms_per_exam):
+    return [
+        {"examSessionId": exam_id, "roomId": f"{exam_id}-r{r}", "start": start, "end": end}
+        for exam_id, (start, end) in exams.items() for r in range(rooms_per_exam)
+    ]
+
+
+def _assert_no_overlaps(plan):
+    by_inv = {}
+    for a in plan["assignments"]:
+        by_inv.setdefault(a["invigilatorId"], []).append((a["start"], a["end"]))
+    for intervals in by_inv.values():
+        intervals.sort()
+        assert all(prev[1] <= nxt[0] for prev, nxt in zip(intervals, intervals[1:]))
+
+
+def test_thousand_rooms_three_hundred_staff_in_seconds():
+    rng = random.Random(7)
+    # 20 sessions over 5 days, two of them overlapping each morning, 50 rooms each
+    exams = {}
+    for day in range(5):
+        for session, (start, hours) in enumerate([(9 * 60, 3), (10 * 60, 2), (14 * 60, 3), (15 * 60, 2)]):
+            base = day * 24 * 60
+            exams[f"e{day}{session}"] = (base + start, base + start + hours * 60)
+    slots = _slots(exams, 50)
+    staff = [f"inv{i}" for i in range(300)]
+    declined = {(rng.choice(staff), rng.choice(list(exams))) for _ in range(200)}
+
+    started = time.perf_counter()
+    plan = server.assign_invigilators(slots, staff, declined=declined)
+    assert time.perf_counter() - started < 5
+
+    assert len(plan["assignments"]) == 1000 and not plan["unassigned"]
+    _assert_no_overlaps(plan)
+    assert not any((a["invigilatorId"], a["examSessionId"]) in declined for a in plan["assignments"])
+    total = sum(end - start for start, end in exams.values()) * 50
+    assert plan["maxLoadMinutes"] <= total / len(staff) + 180
+
+
+def test_improvement_pass_lowers_max_load():
+    # Durations 3,3,2,2,2 on two invigilators: longest-first greedy ends at 7, the optimum is 6
+    hours = [3, 3, 2, 2, 2]
+    slots = [
+        {"examSessionId": f"e{i}", "roomId": "r1", "start": i * 1000, "end": i * 1000 + h * 60}
+        for i, h in enumerate(hours)
+    ]
+    greedy = server.assign_invigilators(slots, ["a", "b"], improvement_passes=0)
+    improved = server.assign_invigilators(slots, ["a", "b"], improvement_passes=2)
+    assert greedy["maxLoadMinutes"] == 7 * 60
+    assert improved["maxLoadMinutes"] == 6 * 60
+
+
+def test_overlapping_and_declined_invigilators_are_skipped():
+    slots = _slots({"e1": (0, 180), "e2": (60, 120)}, 1)
+    plan = server.assign_invigilators(slots, ["a", "b"], busy={"b": [(500, 600)]}, declined={("a", "e2")})
+    by_exam = {a["examSessionId"]: a["invigilatorId"] for a in plan["assignments"]}
+    assert by_exam == {"e1": "a", "e2": "b"}
+
+    plan = server.assign_invigilators(slots, ["a"])
+    assert len(plan["assignments"]) == 1 and len(plan["unassigned"]) == 1
+
+
+def test_overlapping_existing_duties_keep_the_whole_span_busy():
+    schedule = server._Schedule()
+    schedule.book(0, 600)
+    schedule.book(100, 200)
+    assert not schedule.is_free(300, 400)
+    assert schedule.is_free(600, 700) and not schedule.is_free(599, 700)
+
+    plan = server.assign_invigilators(_slots({"e1": (300, 400)}, 1), ["a"], busy={"a": [(0, 600), (100, 200)]})
+    assert plan["assignments"] == [] and len(plan["unassigned"]) == 1
+
+
+def test_auto_assign_endpoint_dry_run_and_commit(api, mock_db):
+    data = seed_college(mock_db, students=40, rooms=3)
+    exam_id = data["exam"]["id"]
+    headers = auth_headers(data["admin"])
+    api.post(f"/api/exams/{exam_id}/allocate", json=[r["id"] for r in data["rooms"]], headers=headers)
+    body = {"examIds": [exam_id]}
+
+    preview = api.post("/api/invigilators/auto_assign?dry_run=true", json=body, headers=headers).json()
+    assert preview["dryRun"] is True
+    # room 0 already has the seeded invigilator, who is then busy for the other rooms
+    assert [a["roomId"] for a in preview["assignments"]] == []
+    assert {u["roomId"] for u in preview["unassigned"]} == {data["rooms"][1]["id"], data["rooms"][2]["id"]}
+    assert asyncio.run(mock_db.invigilatorDuties.count_documents({})) == 0
+
+    extra = [{"id": f"inv-{i}", "collegeId": data["admin"]["collegeId"], "role": "invigilator", "email": f"i{i}@t", "password": "x", "profile": {"name": f"I{i}"}} for i in range(2)]
+    asyncio.run(mock_db.users.insert_many(extra))
+    plan = api.post("/api/invigilators/auto_assign", json=body, headers=headers).json()
+    assert {a["invigilatorId"] for a in plan["assignments"]} == {"inv-0", "inv-1"}
+    assert asyncio.run(mock_db.examInvigilators.count_documents({"examSessionId": exam_id})) == 3
+    assert asyncio.run(mock_db.invigilatorDuties.count_documents({"examSessionId": exam_id})) == 2
+    assert asyncio.run(mock_db.notifications.count_documents({"userId": "inv-0"})) == 1
+
+
+def test_replacing_touches_only_replanned_rooms_of_this_college(api, mock_db):
+    data = seed_college(mock_db, students=20, rooms=3)
+    r0, r1, r2 = (room["id"] for room in data["rooms"])
+    first = data["exam"]["id"]
+    headers = auth_headers(data["admin"])
+    asyncio.run(mock_db.examSessions.insert_one({**data["exam"], "_id": "e2", "id": "e2", "date": "2030-01-11"}))
+    api.post(f"/api/exams/{first}/allocate", json=[r0, r1], headers=headers)
+    api.post("/api/exams/e2/allocate", json=[r2], headers=headers)
+    seeded = data["invigilator"]["id"]
+    asyncio.run(mock_db.invigilatorDuties.insert_many([
+        {"id": "d1", "examSessionId": first, "invigilatorId": seeded, "roomId": r0, "status": "pending"},
+        {"id": "d2", "examSessionId": "e2", "invigilatorId": seeded, "roomId": r0, "status": "pending"},  # room not planned for e2
+    ]))
+    asyncio.run(mock_db.examInvigilators.insert_one({"id": "x2", "examSessionId": "e2", "invigilatorId": seeded, "roomId": r0}))
+    staff = [{"id": f"inv-{i}", "collegeId": data["admin"]["collegeId"], "role": "invigilator", "email": f"i{i}@t", "password": "x", "profile": {"name": f"I{i}"}} for i in range(2)]
+    outsider = {**staff[0], "_id": "elsewhere", "id": "elsewhere", "collegeId": "another-college", "email": "o@t"}
+    asyncio.run(mock_db.users.insert_many(staff + [outsider]))
+
+    body = {"examIds": [first, "e2"], "replaceExisting": True,
+            "invigilatorIds": ["inv-0", "inv-1", "elsewhere", data["students"][0]["id"]]}
+    plan = api.post("/api/invigilators/auto_assign", json=body, headers=headers).json()
+    assert {a["invigilatorId"] for a in plan["assignments"]} == {"inv-0", "inv-1"}
+    assert len(plan["assignments"]) == 3 and not plan["unassigned"]
+
+    duties = {d["id"] for d in asyncio.run(mock_db.invigilatorDuties.find({"invigilatorId": seeded}).to_list(None))}
+    assert duties == {"d2"}  # the replaced duty is gone, the untouched room's duty stays
+    assert asyncio.run(mock_db.examInvigilators.count_documents({"id": "x2"})) == 1
+
+
+def test_exams_without_usable_times_are_skipped(api, mock_db):
+    data = seed_college(mock_db, students=20, rooms=2)
+    exam_id = data["exam"]["id"]
+    headers = auth_headers(data["admin"])
+    api.post(f"/api/exams/{exam_id}/allocate", json=[r["id"] for r in data["rooms"]], headers=headers)
+    # The seeded invigilator also has a duty in a legacy exam whose date can't be parsed
+    legacy = {**data["exam"], "_id": "legacy", "id": "legacy", "date": "sometime in May"}
+    asyncio.run(mock_db.examSessions.insert_one(legacy))
+    asyncio.run(mock_db.examInvigilators.insert_one(
+        {"id": "x1", "examSessionId": "legacy", "invigilatorId": data["invigilator"]["id"], "roomId": data["rooms"][1]["id"]}
+    ))
+
+    body = {"examIds": [exam_id, "legacy"], "roomIds": [data["rooms"][1]["id"]]}
+    response = api.post("/api/invigilators/auto_assign?dry_run=true", json=body, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["skippedExamIds"] == ["legacy"]
+    plan = response.json()
+    assert [slot["examSessionId"] for slot in plan["assignments"] + plan["unassigned"]] == [exam_id]
+
+
+def test_requested_rooms_are_limited_to_the_college(api, mock_db):
+    data = seed_college(mock_db, students=20, rooms=2)
+    other = seed_college(mock_db, students=1)
+    exam_id = data["exam"]["id"]
+    headers = auth_headers(data["admin"])
+    api.post(f"/api/exams/{exam_id}/allocate", json=[data["rooms"][0]["id"]], headers=headers)
+    staff = {"id": "inv-0", "collegeId": data["admin"]["collegeId"], "role": "invigilator", "email": "i0@t", "password": "x", "profile": {"name": "I0"}}
+    asyncio.run(mock_db.users.insert_one(staff))
+
+    body = {"examIds": [exam_id], "invigilatorIds": ["inv-0"],
+            "roomIds": [data["rooms"][1]["id"], other["rooms"][0]["id"], "no-such-room"]}
+    plan = api.post("/api/invigilators/auto_assign", json=body, headers=headers).json()
+    assert [a["roomId"] for a in plan["assignments"]] == [data["rooms"][1]["id"]] and not plan["unassigned"]
+    assert asyncio.run(mock_db.invigilatorDuties.count_documents({})) == 1
+    assert asyncio.run(mock_db.notifications.count_documents({"userId": "inv-0"})) == 1
@@ -0,0 +1,251 @@
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from backend import server
+from tests.conftest import auth_headers, seed_college
+
+
+def wait_for_job(api, job_id, headers, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = api.get(f"/api/jobs/{job_id}", headers=headers).json()
+        if job["status"] in server.JOB_TERMINAL_STATES:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish: {job}")
+
+
+@pytest.fixture
+def test_handlers(monkeypatch):
+    handlers = dict(server.job_runner._handlers)
+    monkeypatch.setattr(server.job_runner, "_handlers", handlers)
+    monkeypatch.setattr(server.job_runner, "retry_base_delay", 0)
+    return handlers
+
+
+def test_async_allocation_returns_202_and_completes(api, mock_db):
+    data = seed_college(mock_db, students=40)
+    headers = auth_headers(data["admin"])
+    response = api.post(
+        f"/api/exams/{data['exam']['id']}/allocate?async=true",
+        json=[r["id"] for r in data["rooms"]], headers=headers,
+    )
+    assert response.status_code == 202
+    assert response.headers["location"] == f"/api/jobs/{response.json()['jobId']}"
+
+    job = wait_for_job(api, response.json()["jobId"], headers)
+    assert job["status"] == "succeeded"
+    assert job["result"]["count"] == 40
+    assert job["attempts"] == 1
+    assert "params" not in job
+
+
+def test_idempotency_key_returns_same_job(api, mock_db):
+    data = seed_college(mock_db, students=5)
+    headers = {**auth_headers(data["admin"]), "Idempotency-Key": "alloc-1"}
+    url = f"/api/exams/{data['exam']['id']}/allocate?async=true"
+    first = api.post(url, json=[data["rooms"][0]["id"]], headers=headers).json()
+    second = api.post(url, json=[data["rooms"][0]["id"]], headers=headers).json()
+    assert first["jobId"] == second["jobId"]
+    wait_for_job(api, first["jobId"], headers)
+    assert asyncio.run(mock_db.jobs.count_documents({})) == 1
+
+
+def test_export_job_result_is_downloadable(api, mock_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "JOB_RESULTS_DIR", tmp_path)
+    data = seed_college(mock_db, students=8)
+    headers = auth_headers(data["admin"])
+    api.post(f"/api/exams/{data['exam']['id']}/allocate", json=[data["rooms"][0]["id"]], headers=headers)
+
+    job_id = api.get(f"/api/exams/{data['exam']['id']}/download?format=csv&async=true", headers=headers).json()["jobId"]
+    job = wait_for_job(api, job_id, headers)
+    assert job["result"]["filename"].endswith(".csv")
+
+    # The file lives on disk; the job document only points at it
+    stored = asyncio.run(mock_db.jobs.find_one({"id": job_id}))["resultFile"]
+    assert "content" not in stored and (tmp_path / stored["path"]).stat().st_size == job["result"]["size"]
+
+    response = api.get(f"/api/jobs/{job_id}/result", headers=headers)
+    assert response.status_code == 200
+    assert response.text.count("22A91A") == 8
+    assert job["result"]["filename"] in response.headers["content-disposition"]
+
+    (tmp_path / stored["path"]).unlink()
+    assert api.get(f"/api/jobs/{job_id}/result", headers=headers).status_code == 410
+
+
+def test_running_job_can_be_cancelled(api, mock_db, test_handlers):
+    data = seed_college(mock_db, students=1)
+    started = []
+
+    async def slow(job):
+        for _ in range(500):
+            started.append(1)
+            await asyncio.sleep(0.01)
+            job.checkpoint()
+
+    test_handlers["test.slow"] = (slow, ())
+    job = _submit(api, "test.slow", data["admin"])
+    while not started:
+        time.sleep(0.01)
+    headers = auth_headers(data["admin"])
+    assert api.post(f"/api/jobs/{job['id']}/cancel", headers=headers).status_code == 200
+    assert wait_for_job(api, job["id"], headers)["status"] == "cancelled"
+
+
+def test_failed_attempts_are_retried(api, mock_db, test_handlers):
+    data = seed_college(mock_db, students=1)
+    calls = []
+
+    async def flaky(job):
+        calls.append(1)
+        if len(calls) < 2:
+            raise RuntimeError("transient")
+        return {"ok": True}
+
+    test_handlers["test.flaky"] = (flaky, ())
+    job = _submit(api, "test.flaky", data["admin"])
+    job = wait_for_job(api, job["id"], auth_headers(data["admin"]))
+    assert job["status"] == "succeeded"
+    assert job["attempts"] == 2
+
+
+def test_failed_job_is_retried_with_the_new_params(api, mock_db, test_handlers):
+    data = seed_college(mock_db, students=1)
+    calls = []
+
+    async def upload(job):
+        calls.append(job.params["rows"])
+        if len(calls) == 1:
+            raise HTTPException(status_code=400, detail="bad rows")
+        return {"rows": job.params["rows"]}
+
+    test_handlers["test.upload"] = (upload, ("rows",))
+    headers = auth_headers(data["admin"])
+    submit = lambda rows: api.portal.call(server.job_runner.submit, "test.upload", data["admin"], {"rows": rows}, "upload-1")
+    failed = wait_for_job(api, submit("rows")["id"], headers)
+    assert failed["status"] == "failed"
+    assert "rows" not in asyncio.run(mock_db.jobs.find_one({"id": failed["id"]}))["params"]
+
+    retried = wait_for_job(api, submit("rows")["id"], headers)
+    assert retried["id"] == failed["id"]
+    assert retried["status"] == "succeeded" and retried["result"] == {"rows": "rows"}
+
+
+def test_idempotency_key_is_unique_and_tied_to_the_params(api, mock_db, test_handlers):
+    data = seed_college(mock_db, students=1)
+
+    async def noop(job):
+        return {"ok": True}
+
+    test_handlers["test.noop"] = (noop, ())
+    lookup = mock_db.jobs.find_one
+
+    async def slow_lookup(*args, **kwargs):
+        found = await lookup(*args, **kwargs)
+        await asyncio.sleep(0.01)  # every concurrent submit misses before any of them inserts
+        return found
+
+    async def race():
+        return await asyncio.gather(*(
+            server.job_runner.submit("test.noop", data["admin"], {"examId": "e1"}, "same-key") for _ in range(5)
+        ))
+
+    with pytest.MonkeyPatch.context() as patched:
+        patched.setattr(mock_db.jobs, "find_one", slow_lookup)
+        jobs = api.portal.call(race)
+    assert len({job["id"] for job in jobs}) == 1
+    assert asyncio.run(mock_db.jobs.count_documents({"idempotencyKey": "same-key"})) == 1
+
+    with pytest.raises(HTTPException) as error:
+        api.portal.call(server.job_runner.submit, "test.noop", data["admin"], {"examId": "e2"}, "same-key")
+    assert error.value.status_code == 422
+
+
+def test_uploaded_passwords_never_reach_the_jobs_collection(api, mock_db):
+    data = seed_college(mock_db, students=1)
+    headers = auth_headers(data["admin"])
+    rows = [{"collegeId": data["admin"]["collegeId"], "rollNumber": f"99X{i}", "name": f"New {i}", "year": 3,
+             "branch": "CSE", "password": "hunter2-secret"} for i in range(3)]
+    job_id = api.post("/api/students/bulk?async=true", json=rows, headers=headers).json()["jobId"]
+    stored = asyncio.run(mock_db.jobs.find_one({"id": job_id}))
+    assert stored["heldParams"] == ["students"] and "hunter2" not in str(stored)
+    assert wait_for_job(api, job_id, headers)["status"] == "succeeded"
+    assert asyncio.run(mock_db.users.count_documents({"rollNumber": {"$in": ["99X0", "99X1", "99X2"]}})) == 3
+
+
+def test_jobs_whose_worker_stopped_fail_instead_of_running_without_their_data(mock_db):
+    now = datetime.now(timezone.utc)
+    job = {"collegeId": "c1", "type": "students.bulk_import", "params": {}, "heldParams": ["students"], "attempts": 0}
+    asyncio.run(mock_db.jobs.insert_many([
+        {**job, "id": "gone", "status": "queued", "heartbeatAt": (now - timedelta(minutes=10)).isoformat()},
+        {**job, "id": "alive", "status": "queued", "heartbeatAt": now.isoformat()},
+    ]))
+
+    runner = server.JobRunner()
+    runner._handlers = server.job_runner._handlers
+    assert asyncio.run(runner.sweep_held()) == 1
+    statuses = {j["id"]: (j["status"], j.get("error")) for j in asyncio.run(mock_db.jobs.find().to_list(None))}
+    assert statuses == {"gone": ("failed", server.JOB_PARAMS_LOST), "alive": ("queued", None)}
+
+
+def test_jobs_survive_worker_restart(mock_db, test_handlers):
+    data = seed_college(mock_db, students=6)
+    stale = (datetime.now(timezone.utc) - timedelta(minutes=10)).isoformat()
+    job_id = str(uuid.uuid4())
+    asyncio.run(mock_db.jobs.insert_one({
+        "id": job_id, "collegeId": data["admin"]["collegeId"], "type": "exams.allocate_seats",
+        "status": "running", "params": {"examId": data["exam"]["id"], "roomIds": [data["rooms"][0]["id"]]},
+        "progress": {"done": 0}, "attempts": 1, "maxAttempts": 3, "cancelRequested": False,
+        "heartbeatAt": stale, "createdAt": stale,
+    }))
+
+    from fastapi.testclient import TestClient
+    with TestClient(server.app) as api:  # startup resumes the orphaned job
+        job = wait_for_job(api, job_id, auth_headers(data["admin"]))
+    assert job["status"] == "succeeded"
+    assert job["attempts"] == 2
+
+
+def test_jobs_are_scoped_to_the_college(api, mock_db):
+    data = seed_college(mock_db, students=2)
+    other = seed_college(mock_db, students=1)
+    job_id = api.post(
+        f"/api/exams/{data['exam']['id']}/allocate?async=true",
+        json=[data["rooms"][0]["id"]], headers=auth_headers(data["admin"]),
+    ).json()["jobId"]
+    assert api.get(f"/api/jobs/{job_id}", headers=auth_headers(other["admin"])).status_code == 403
+
+
+def test_college_concurrency_is_bounded(mock_db):
+    runner = server.JobRunner(per_college=2)
+    running, peak = [0], [0]
+
+    async def work(job):
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.02)
+        running[0] -= 1
+
+    runner._handlers["test.work"] = (work, ())
+    user = {"id": "u1", "collegeId": "c1"}
+
+    async def scenario():
+        jobs = [await runner.submit("test.work", user, {}) for _ in range(6)]
+        await asyncio.gather(*list(runner._tasks.values()))
+        return jobs
+
+    jobs = asyncio.run(scenario())
+    assert peak[0] == 2
+    statuses = asyncio.run(mock_db.jobs.distinct("status", {"id": {"$in": [j["id"] for j in jobs]}}))
+    assert statuses == ["succeeded"]
+
+
+def _submit(api, job_type, user):
+    # Submit from the app's event loop so the job task runs there
+    return api.portal.call(server.job_runner.submit, job_type, user, {})
@@ -0,0 +1,121 @@
+import asyncio
+import time
+
+import bcrypt
+import httpx
+import pytest
+
+from backend import server
+from tests.conftest import seed_college
+
+
+@pytest.fixture
+def bcrypt_calls(monkeypatch):
+    calls = []
+    original = server.verify_password
+    monkeypatch.setattr(server, "verify_password", lambda plain, hashed: calls.append(plain) or original(plain, hashed))
+    return calls
+
+
+def _students(mock_db, count=3):
+    data = seed_college(mock_db, students=count)
+    # Cheap hashes keep the test fast; each check still goes through bcrypt
+    for student in data["students"]:
+        hashed = bcrypt.hashpw(student["rollNumber"].encode(), bcrypt.gensalt(4)).decode()
+        asyncio.run(mock_db.users.update_one({"id": student["id"]}, {"$set": {"password": hashed}}))
+    return data
+
+
+def _login(api, data, roll, password, ip="10.0.0.1"):
+    body = {"collegeId": data["admin"]["collegeId"], "role": "student", "rollNumber": roll, "password": password}
+    return api.post("/api/auth/login", json=body, headers={"X-Forwarded-For": ip})
+
+
+@pytest.fixture(autouse=True)
+def forwarded_for(monkeypatch):
+    monkeypatch.setattr(server, "LOGIN_CLIENT_IP_HEADER", "X-Forwarded-For")
+
+
+def test_account_is_locked_after_repeated_failures(api, mock_db, bcrypt_calls, budget):
+    data = _students(mock_db)
+    roll = data["students"][0]["rollNumber"]
+    assert [_login(api, data, roll, "guess").status_code for _ in range(server.LOGIN_MAX_FAILURES)] == [401] * 5
+
+    with budget(0):  # rejected before the user lookup
+        blocked = _login(api, data, roll, roll)
+    assert blocked.status_code == 429 and 0 < int(blocked.headers["Retry-After"]) <= server.LOGIN_WINDOW_SECONDS
+    assert len(bcrypt_calls) == server.LOGIN_MAX_FAILURES
+
+    # Other accounts and other clients are unaffected, and success clears an account's failures
+    other = data["students"][1]["rollNumber"]
+    assert _login(api, data, other, "guess").status_code == 401
+    assert _login(api, data, other, other).status_code == 200
+    assert _login(api, data, roll, roll, ip="10.0.0.2").status_code == 429  # the account key is shared
+
+
+def test_spraying_roll_numbers_is_bounded_per_ip(api, mock_db, bcrypt_calls, monkeypatch):
+    monkeypatch.setattr(server.login_throttle, "limits", {"account": 5, "ip": 20})
+    data = _students(mock_db, count=50)
+
+    started = time.process_time()
+    statuses = [_login(api, data, s["rollNumber"], s["rollNumber"][::-1]).status_code for s in data["students"] * 4]
+    assert statuses.count(401) == 20 and statuses.count(429) == 180
+    assert len(bcrypt_calls) == 20
+    # Unthrottled, 200 checks at the default bcrypt cost would take about a minute of CPU
+    assert time.process_time() - started < 5
+
+
+def test_concurrent_guesses_are_counted_before_bcrypt(mock_db, bcrypt_calls):
+    data = _students(mock_db)
+    body = {"collegeId": data["admin"]["collegeId"], "role": "student", "rollNumber": data["students"][0]["rollNumber"], "password": "guess"}
+
+    async def spray():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = await asyncio.gather(*(client.post("/api/auth/login", json=body) for _ in range(50)))
+        return [response.status_code for response in responses]
+
+    statuses = asyncio.run(spray())
+    assert statuses.count(401) == server.LOGIN_MAX_FAILURES and statuses.count(429) == 50 - server.LOGIN_MAX_FAILURES
+    assert len(bcrypt_calls) == server.LOGIN_MAX_FAILURES
+
+
+def test_client_ip_is_the_hop_the_proxy_added(api, mock_db, monkeypatch):
+    monkeypatch.setattr(server.login_throttle, "limits", {"account": 5, "ip": 3})
+    data = _students(mock_db, count=1)
+    roll = data["students"][0]["rollNumber"]
+    # Rotating the client-supplied entry doesn't help: the proxy appends the address it saw
+    for i in range(3):
+        assert _login(api, data, f"nobody{i}", "guess", ip=f"203.0.113.{i}, 10.0.0.9").status_code == 401
+    assert _login(api, data, roll, roll, ip="198.51.100.1, 10.0.0.9").status_code == 429
+    assert _login(api, data, roll, roll, ip="10.0.0.8").status_code == 200
+
+
+def test_failures_slide_out_of_the_window():
+    throttle = server.LoginThrottle(server.MemoryThrottleStore(), window=60, max_failures=2, max_failures_per_ip=10)
+    keys = throttle.keys("1.2.3.4", "c1", "22A91A0001")
+
+    async def run():
+        for at in (1000.0, 1030.0):
+            await throttle.store.add(keys["account"], at)
+        assert await throttle.retry_after(keys, now=1031.0) == 29
+        assert await throttle.retry_after(keys, now=1061.0) is None
+
+    asyncio.run(run())
+
+
+def test_mongo_store_is_shared(mock_db):
+    throttle = server.LoginThrottle(server.MongoThrottleStore(), window=60, max_failures=2, max_failures_per_ip=10)
+    keys = throttle.keys("1.2.3.4", "c1", "22A91A0001")
+
+    async def run():
+        await throttle.store.setup()
+        assert (await throttle.attempt(keys))[0] is None
+        retry_after, tokens = await throttle.attempt(keys)
+        assert retry_after is None
+        assert (await throttle.attempt(keys))[0]  # over the limit, so not logged
+        await throttle.succeeded(keys, tokens)
+        assert await throttle.retry_after(keys) is None
+
+    asyncio.run(run())
+    assert asyncio.run(mock_db.loginFailures.count_documents({"key": keys["ip"]})) == 1
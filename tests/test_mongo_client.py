@@ -0,0 +1,41 @@
+from backend import server
+from tests.conftest import auth_headers, seed_college
+
+
+def test_client_options_come_from_env(monkeypatch):
+    monkeypatch.setenv("MONGO_MAX_POOL_SIZE", "20")
+    monkeypatch.setenv("MONGO_SOCKET_TIMEOUT_MS", "15000")
+    monkeypatch.setenv("MONGO_COMPRESSORS", "zlib,lz4")
+    options = server._client_options()
+    assert options["maxPoolSize"] == 20
+    assert options["socketTimeoutMS"] == 15000
+    assert options["compressors"] == "zlib"  # unknown or uninstalled compressors are skipped
+    assert "waitQueueTimeoutMS" not in options
+
+
+def test_pool_metrics_track_checkouts():
+    metrics = server.PoolMetrics()
+    metrics.connection_created(None)
+    metrics.connection_check_out_started(None)
+    assert metrics.snapshot()["waiting"] == 1
+    metrics.connection_checked_out(None)
+    metrics.connection_check_out_started(None)
+    metrics.connection_check_out_failed(None)
+    snapshot = metrics.snapshot()
+    assert snapshot["inUse"] == 1 and snapshot["checkouts"] == 1 and snapshot["checkoutFailures"] == 1
+    assert snapshot["waiting"] == 0
+    metrics.connection_checked_in(None)
+    assert metrics.snapshot()["inUse"] == 0
+    assert metrics.snapshot()["peakInUse"] == 1
+
+
+def test_metrics_endpoint(api, mock_db, monkeypatch):
+    data = seed_college(mock_db, students=1)
+    assert api.get("/metrics").status_code in (401, 403)
+    assert api.get("/metrics", headers=auth_headers(data["invigilator"])).status_code == 403
+    monkeypatch.setattr(server, "METRICS_TOKEN", "scraper-token")
+    assert api.get("/metrics", headers={"Authorization": "Bearer scraper-token"}).status_code == 200
+    assert api.get("/metrics", headers={"Authorization": "Bearer wrong-token"}).status_code == 401
+
+    body = api.get("/metrics", headers=auth_headers(data["admin"])).json()
+    assert set(body["mongoPool"]) >= {"open", "inUse", "waiting", "waitMsAvg", "waitMsMax"}
@@ -0,0 +1,39 @@
+import uuid
+
+import pytest
+
+from backend import server
+
+
+def test_factory_matches_model_dump():
+    row = {"userId": "u1", "examId": "e1", "message": "Seated"}
+    [record] = server.notification_records.build([row])
+    expected = server.Notification(**row).model_dump()
+    assert list(record) == list(expected)
+    assert {k: v for k, v in record.items() if k not in ("id", "createdAt")} == {
+        k: v for k, v in expected.items() if k not in ("id", "createdAt")
+    }
+    assert uuid.UUID(record["id"]).version == 4
+
+
+def test_batch_shares_timestamp_but_not_ids_or_mutable_defaults():
+    factory = server.RecordFactory(server.DraftExam)
+    row = {"collegeId": "c1", "title": "T", "date": "2030-01-10", "startTime": "10:00", "endTime": "11:00",
+           "subjects": [], "years": [3], "branches": ["CSE"]}
+    records = factory.build([dict(row) for _ in range(1000)])
+    assert len({r["id"] for r in records}) == 1000
+    assert len({r["createdAt"] for r in records}) == 1
+    records[0]["selectedRooms"].append("r1")
+    assert records[1]["selectedRooms"] == []
+
+
+def test_ids_are_valid_uuid4_strings():
+    ids = server.new_ids(500)
+    assert all(str(uuid.UUID(i)) == i and uuid.UUID(i).version == 4 and uuid.UUID(i).variant == uuid.RFC_4122 for i in ids)
+
+
+def test_missing_and_unknown_fields_are_rejected():
+    with pytest.raises(ValueError, match="missing"):
+        server.notification_records.build([{"userId": "u1"}])
+    with pytest.raises(ValueError, match="no field"):
+        server.notification_records.build([{"userId": "u1", "message": "m", "colour": "red"}])
@@ -0,0 +1,166 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+from backend import server
+from tests.conftest import AUTH, auth_headers, seed_college
+
+
+def test_allocation_stores_one_document_per_room(api, mock_db):
+    data = seed_college(mock_db, students=45, rooms=2, benches=30)
+    exam_id = data["exam"]["id"]
+    headers = auth_headers(data["admin"])
+    api.post(f"/api/exams/{exam_id}/allocate", json=[r["id"] for r in data["rooms"]], headers=headers)
+
+    assert asyncio.run(mock_db.roomSeatings.count_documents({"examSessionId": exam_id})) == 2
+    assert asyncio.run(mock_db.allocations.count_documents({})) == 0
+    assert asyncio.run(mock_db.examStudents.count_documents({})) == 0
+
+    rows = api.get(f"/api/allocations/exam/{exam_id}", headers=headers).json()
+    assert len(rows) == 45
+    assert {"id", "studentId", "roomId", "benchNumber", "seatPosition", "attendance"} <= set(rows[0])
+    assert rows[0]["benchNumber"] == 1 and rows[0]["student"]["rollNumber"] == "22A91A0000"
+
+
+def test_attendance_is_marked_through_the_seat_id(api, mock_db):
+    data = seed_college(mock_db, students=5)
+    exam_id, room_id = data["exam"]["id"], data["rooms"][0]["id"]
+    api.post(f"/api/exams/{exam_id}/allocate", json=[room_id], headers=auth_headers(data["admin"]))
+
+    invigilator = auth_headers(data["invigilator"])
+    roster = api.get(f"/api/duties/room/{room_id}/exam/{exam_id}", headers=invigilator).json()
+    seat = roster[3]
+    api.put(f"/api/allocations/{seat['id']}/attendance?attendance=present", headers=invigilator)
+
+    roster = api.get(f"/api/duties/room/{room_id}/exam/{exam_id}", headers=invigilator).json()
+    assert [s["attendance"] for s in roster] == ["pending"] * 3 + ["present", "pending"]
+
+    student = data["students"][3]
+    mine = api.get(f"/api/allocations/student/{student['id']}", headers=auth_headers(student)).json()
+    assert len(mine) == 1 and mine[0]["id"] == seat["id"] and mine[0]["exam"]["id"] == exam_id
+
+
+def test_legacy_allocations_are_migrated(mock_db):
+    data = seed_college(mock_db, students=4)
+    exam_id, room_id = data["exam"]["id"], data["rooms"][0]["id"]
+    legacy = [
+        {"id": str(uuid.uuid4()), "examSessionId": exam_id, "studentId": s["id"], "roomId": room_id,
+         "benchNumber": 2 - i // 2, "seatPosition": "AB"[i % 2], "attendance": "absent" if i == 0 else "pending"}
+        for i, s in enumerate(data["students"])
+    ]
+
+    async def scenario():
+        await mock_db.allocations.insert_many([dict(a) for a in legacy])
+        await mock_db.examStudents.insert_many([dict(a) for a in legacy])
+        assert await server.migrate_allocations_to_room_seatings() == 1
+        assert await server.migrate_allocations_to_room_seatings() == 0  # nothing left to fold
+        return await server.find_allocations(exam_id)
+
+    rows = asyncio.run(scenario())
+    assert [(r["benchNumber"], r["seatPosition"]) for r in rows] == [(1, "A"), (1, "B"), (2, "A"), (2, "B")]
+    assert rows[2]["attendance"] == "absent" and rows[2]["studentId"] == data["students"][0]["id"]
+    assert asyncio.run(mock_db.roomSeatings.count_documents({})) == 1
+    assert asyncio.run(mock_db.allocations.count_documents({})) == 0
+    assert asyncio.run(mock_db.examStudents.count_documents({})) == 0
+
+
+def test_only_one_worker_migrates(mock_db):
+    data = seed_college(mock_db, students=4)
+    exam_id, room_id = data["exam"]["id"], data["rooms"][0]["id"]
+    legacy = [
+        {"id": str(uuid.uuid4()), "examSessionId": exam_id, "studentId": s["id"], "roomId": room_id,
+         "benchNumber": i + 1, "seatPosition": "A", "attendance": "pending"}
+        for i, s in enumerate(data["students"])
+    ]
+    unrelated = {"id": "e3", "examSessionId": "e3"}
+
+    async def scenario():
+        await mock_db.allocations.insert_many([dict(a) for a in legacy])
+        await mock_db.examStudents.insert_many([dict(a) for a in legacy] + [unrelated])
+        results = await asyncio.gather(*(server.migrate_allocations_to_room_seatings() for _ in range(3)))
+        assert sorted(results) == [0, 0, 1]
+
+        # A live lease held elsewhere keeps this worker out; an expired one is taken over
+        await mock_db.allocations.insert_one(dict(legacy[0], id="late", examSessionId="e2"))
+        await mock_db.migrations.update_one({"_id": "roomSeatings"}, {"$set": {"owner": "other", "lockedUntil": datetime.utcnow() + timedelta(minutes=1)}})
+        assert await server.migrate_allocations_to_room_seatings() == 0
+        await mock_db.migrations.update_one({"_id": "roomSeatings"}, {"$set": {"lockedUntil": datetime.utcnow() - timedelta(seconds=1)}})
+        assert await server.migrate_allocations_to_room_seatings() == 1
+
+    asyncio.run(scenario())
+    assert asyncio.run(mock_db.roomSeatings.count_documents({})) == 2
+    assert asyncio.run(mock_db.examStudents.count_documents({})) == 1  # only migrated exams' mirrors are dropped
+
+
+def test_migration_rebuilds_cards_once(mock_db, monkeypatch):
+    data = seed_college(mock_db, students=3)
+    room_id = data["rooms"][0]["id"]
+    legacy = [
+        {"id": str(uuid.uuid4()), "examSessionId": exam_id, "studentId": s["id"], "roomId": room_id,
+         "benchNumber": i + 1, "seatPosition": "A", "attendance": "pending"}
+        for exam_id in (data["exam"]["id"], "e2") for i, s in enumerate(data["students"])
+    ]
+    refreshed = []
+    original = server.refresh_exam_cards
+    monkeypatch.setattr(server, "refresh_exam_cards", lambda ids: refreshed.append(list(ids)) or original(ids))
+
+    asyncio.run(mock_db.allocations.insert_many(legacy))
+    assert asyncio.run(server.migrate_allocations_to_room_seatings()) == 2
+    assert refreshed == [[s["id"] for s in data["students"]]]
+
+
+def _restrict(db, exam_id, students):
+    asyncio.run(db.examAttendanceRestrictions.insert_many([
+        {"id": str(uuid.uuid4()), "examId": exam_id, "studentId": s["id"], "isAllowed": False} for s in students
+    ]))
+
+
+def _seats(db, exam_id):
+    buckets = asyncio.run(db.roomSeatings.find({"examSessionId": exam_id}, {"_id": 0}).to_list(None))
+    return {seat["s"]: (b["roomId"], seat["b"], seat["p"]) for b in buckets for seat in b["seats"]}
+
+
+def test_granting_permission_seats_only_that_student(api, mock_db, budget):
+    data = seed_college(mock_db, students=10)
+    exam_id = data["exam"]["id"]
+    headers = auth_headers(data["admin"])
+    late = data["students"][4]
+    _restrict(mock_db, exam_id, [late])
+    api.post(f"/api/exams/{exam_id}/allocate", json=[data["rooms"][0]["id"]], headers=headers)
+    before = _seats(mock_db, exam_id)
+    assert late["id"] not in before
+    notified = asyncio.run(mock_db.notifications.count_documents({}))
+
+    with budget(AUTH + 9):
+        response = api.post(f"/api/exams/{exam_id}/grant_permission/{late['id']}", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["seating"]["placed"][0]["studentId"] == late["id"]
+
+    after = _seats(mock_db, exam_id)
+    assert {k: v for k, v in after.items() if k != late["id"]} == before
+    assert after[late["id"]] == (data["rooms"][0]["id"], 10, None)  # first free seat
+    assert asyncio.run(mock_db.notifications.count_documents({})) == notified + 1
+
+
+def test_removing_a_room_moves_only_its_students(api, mock_db):
+    data = seed_college(mock_db, students=50, rooms=3, benches=20)
+    exam_id = data["exam"]["id"]
+    headers = auth_headers(data["admin"])
+    room_ids = [r["id"] for r in data["rooms"]]
+    api.post(f"/api/exams/{exam_id}/allocate", json=room_ids, headers=headers)
+    before = _seats(mock_db, exam_id)
+    displaced = {sid for sid, (room_id, _, _) in before.items() if room_id == room_ids[0]}
+    attendance_seat = api.get(f"/api/duties/room/{room_ids[1]}/exam/{exam_id}", headers=headers).json()[0]
+    notified = asyncio.run(mock_db.notifications.count_documents({}))
+
+    response = api.delete(f"/api/allocate_room/{exam_id}/{room_ids[0]}", headers=headers)
+    diff = response.json()["seating"]
+    assert len(diff["placed"]) == 10 and len(diff["unplaced"]) == 10  # 20 displaced, 10 free seats left
+
+    after = _seats(mock_db, exam_id)
+    assert all(after[sid] == seat for sid, seat in before.items() if sid not in displaced)
+    assert {p["studentId"] for p in diff["placed"]} <= displaced
+    assert all(after[p["studentId"]][0] == room_ids[2] for p in diff["placed"])
+    assert asyncio.run(mock_db.notifications.count_documents({})) == notified + 10
+    # seat ids of students who stayed put are unchanged
+    assert api.get(f"/api/duties/room/{room_ids[1]}/exam/{exam_id}", headers=headers).json()[0]["id"] == attendance_seat["id"]
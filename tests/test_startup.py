@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from backend import server
+
+ROOT = Path(__file__).resolve().parents[1]
+IMPORT_BUDGET_SECONDS = float(os.environ.get("IMPORT_BUDGET_SECONDS", "3.0"))
+
+
+def test_import_stays_within_budget_and_skips_heavy_modules():
+    code = (
+        "import sys, time\n"
+        "started = time.perf_counter()\n"
+        "import backend.server\n"
+        "print(time.perf_counter() - started, 'pandas' in sys.modules)\n"
+    )
+    env = {**os.environ, "MONGO_URL": os.environ.get("MONGO_URL", "mongodb://localhost:27017")}
+    # best of three, so a busy CI box doesn't fail the build
+    runs = [
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True).stdout.split()
+        for _ in range(3)
+    ]
+    assert min(float(seconds) for seconds, _ in runs) < IMPORT_BUDGET_SECONDS
+    assert {pandas_loaded for _, pandas_loaded in runs} == {"False"}
+
+
+def test_ready_reports_db_and_warm_up(api):
+    body = api.get("/ready").json()
+    assert body["status"] == "ready" and body["db"] == "ready"
+    assert "readyMs" in server.startup_report and "importMs" in server.startup_report
+    assert api.get("/health").json() == {"status": "ok"}
+
+
+def test_ready_is_503_until_db_answers(mock_db, monkeypatch):
+    import asyncio
+
+    from fastapi.testclient import TestClient
+
+    async def db_still_asleep():
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(server, "_become_ready", db_still_asleep)
+    with TestClient(server.app) as api:  # startup returns without waiting for the DB
+        assert api.get("/health").status_code == 200
+        response = api.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["db"] == "pending"
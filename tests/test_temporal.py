@@ -0,0 +1,89 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from backend import server
+from tests.conftest import AUTH, auth_headers, seed_college
+
+
+def _exam_body(college_id, date, start="10:00", end="13:00", title="Mid Term"):
+    return {
+        "collegeId": college_id, "title": title, "date": date, "startTime": start, "endTime": end,
+        "subjects": ["Algorithms"], "years": [3], "branches": ["CSE"], "status": "scheduled",
+    }
+
+
+def test_exams_and_events_store_utc_datetimes(api, mock_db):
+    data = seed_college(mock_db, students=1)
+    college_id = data["admin"]["collegeId"]
+    response = api.post("/api/exams", json=_exam_body(college_id, "10-01-2030"), headers=auth_headers(data["admin"]))
+    assert response.status_code == 200
+    assert response.json()["date"] == "2030-01-10"
+    assert "start" not in response.json()
+
+    exam = asyncio.run(mock_db.examSessions.find_one({"id": response.json()["id"]}))
+    # 10:00 and 13:00 in Asia/Kolkata (UTC+05:30)
+    assert exam["start"] == datetime(2030, 1, 10, 4, 30)
+    assert exam["end"] == datetime(2030, 1, 10, 7, 30)
+    event = asyncio.run(mock_db.calendarEvents.find_one({"examId": exam["id"]}))
+    assert event["start"] == exam["start"]
+
+
+def test_unpadded_and_alternate_dates_are_accepted(api, mock_db):
+    for raw, expected in [("2030-1-5", "2030-01-05"), ("2030-01-05", "2030-01-05"), ("5/1/2030", "2030-01-05"), ("2030.1.5", "2030-01-05")]:
+        assert server._normalize_date_str(raw) == expected
+    data = seed_college(mock_db, students=1)
+    response = api.post("/api/exams", json=_exam_body(data["admin"]["collegeId"], "2030-1-5"), headers=auth_headers(data["admin"]))
+    assert response.status_code == 200 and response.json()["date"] == "2030-01-05"
+
+
+def test_calendar_range_query(api, mock_db, budget):
+    data = seed_college(mock_db, students=1)
+    college_id = data["admin"]["collegeId"]
+    headers = auth_headers(data["admin"])
+    for day in (5, 1, 20, 12):
+        api.post("/api/calendar_events", headers=headers, json={
+            "collegeId": college_id, "title": f"Event {day}", "date": f"2030-03-{day:02d}", "time": "09:00", "type": "event",
+        })
+
+    with budget(AUTH + 1):
+        response = api.get(f"/api/calendar_events/{college_id}?from=2030-03-02&to=2030-03-13", headers=headers)
+    assert [event["title"] for event in response.json()] == ["Event 5", "Event 12"]
+    assert len(api.get(f"/api/calendar_events/{college_id}", headers=headers).json()) == 4
+    assert api.get(f"/api/calendar_events/{college_id}?from=yesterday", headers=headers).status_code == 400
+
+
+def test_upcoming_exams_skip_finished_and_deleted(api, mock_db):
+    data = seed_college(mock_db, students=1)
+    college_id = data["admin"]["collegeId"]
+    now = datetime.utcnow()
+
+    def exam(title, start, **extra):
+        return {"id": title, "collegeId": college_id, "title": title, "date": "2030-01-01", "startTime": "10:00",
+                "endTime": "13:00", "subjects": [], "years": [3], "branches": ["CSE"],
+                "start": start, "end": start + timedelta(hours=3), **extra}
+
+    asyncio.run(mock_db.examSessions.insert_many([
+        exam("finished", now - timedelta(hours=5)),
+        exam("running", now - timedelta(hours=1)),
+        exam("later", now + timedelta(days=3)),
+        exam("sooner", now + timedelta(days=1)),
+        exam("deleted", now + timedelta(days=2), deletedAt="2030-01-01T00:00:00"),
+    ]))
+    response = api.get(f"/api/exams/{college_id}/upcoming", headers=auth_headers(data["admin"]))
+    assert [e["title"] for e in response.json()] == ["running", "sooner", "later"]
+
+
+def test_migration_backfills_start_and_end(mock_db):
+    asyncio.run(mock_db.examSessions.insert_one(
+        {"id": "e1", "collegeId": "c1", "date": "2030-01-10", "startTime": "10:00", "endTime": "11:30"}
+    ))
+    asyncio.run(mock_db.calendarEvents.insert_many([
+        {"id": "ev1", "collegeId": "c1", "date": "2030-01-10", "time": "10:00"},
+        {"id": "ev2", "collegeId": "c1", "date": "someday", "time": "soon"},
+    ]))
+    assert asyncio.run(server.migrate_temporal_fields()) == 3
+    exam = asyncio.run(mock_db.examSessions.find_one({"id": "e1"}))
+    assert (exam["start"], exam["end"]) == (datetime(2030, 1, 10, 4, 30), datetime(2030, 1, 10, 6, 0))
+    events = {e["id"]: e["start"] for e in asyncio.run(mock_db.calendarEvents.find({}).to_list(None))}
+    assert events == {"ev1": datetime(2030, 1, 10, 4, 30), "ev2": None}
+    assert asyncio.run(server.migrate_temporal_fields()) == 0
@@ -0,0 +1,156 @@
+import asyncio
+import io
+from datetime import date, datetime, time
+
+import pytest
+from pymongo.errors import OperationFailure
+
+from backend import server
+from tests.conftest import AUTH, auth_headers, seed_college
+
+HEADER = "Exam,Date,Start Time,End Time,Subjects,Year,Branch,Rooms\n"
+
+
+def _seeded(db):
+    data = seed_college(db, students=4)
+    asyncio.run(db.examSessions.update_one({"id": data["exam"]["id"]}, {"$set": server.exam_times(data["exam"])}))
+    return data
+
+
+def _upload(api, user, content, name="timetable.csv", **params):
+    return api.post("/api/exams/import", params=params, headers=auth_headers(user), files={"file": (name, content, "text/csv")})
+
+
+def test_cell_parsers():
+    assert server._cell_time("2:30 PM") == "14:30"
+    assert server._cell_time("12 am") == "00:00"
+    assert server._cell_time("09.15") == "09:15"
+    assert server._cell_time(time(9, 5)) == "09:05"
+    assert server._cell_date("11-01-2030") == "2030-01-11"
+    assert server._cell_date(datetime(2030, 1, 11, 0, 0)) == "2030-01-11"
+    assert server._cell_list("Algorithms; Networks ,") == ["Algorithms", "Networks"]
+    assert server._cell_years(3.0) == [3]
+    for bad in ("25:00", "13 pm", "noon", "9"):
+        with pytest.raises(ValueError):
+            server._cell_time(bad)
+
+
+def test_timetable_creates_exams_and_events(api, mock_db, budget):
+    data = _seeded(mock_db)
+    content = HEADER + (
+        "Networks,11-01-2030,10:00 AM,1:00 PM,Networks,3,CSE,\n"
+        "Compilers,2030-01-12,10:00,13:00,Compilers;Theory,3,CSE;ECE,\n"
+        "Algorithms Lab,2030-01-10,11:00,12:00,Algorithms,3,CSE,\n"
+    )
+    with budget(AUTH + 3):  # existing exams, then one insert each for exams and events
+        response = _upload(api, data["admin"], content)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["imported"] == 3
+    first, second, third = body["exams"]
+    assert (first["date"], first["startTime"], first["endTime"]) == ("2030-01-11", "10:00", "13:00")
+    assert first["clashes"] == [] and second["clashes"] == []
+    assert [c["examId"] for c in third["clashes"]] == [data["exam"]["id"]]
+
+    exams = asyncio.run(mock_db.examSessions.find({"id": {"$in": [e["id"] for e in body["exams"]]}}).to_list(None))
+    assert {e["title"] for e in exams} == {"Networks", "Compilers", "Algorithms Lab"}
+    assert all(e["status"] == "scheduled" and e["collegeId"] == data["admin"]["collegeId"] for e in exams)
+    network = next(e for e in exams if e["title"] == "Networks")
+    assert network["start"] == datetime(2030, 1, 11, 4, 30)
+    event = asyncio.run(mock_db.calendarEvents.find_one({"examId": network["id"]}))
+    assert (event["date"], event["time"], event["start"]) == ("2030-01-11", "10:00", network["start"])
+
+
+def test_every_row_error_is_reported_and_nothing_is_written(api, mock_db):
+    data = _seeded(mock_db)
+    content = HEADER + (
+        "Networks,31-02-2030,10:00,13:00,Networks,3,CSE,\n"    # no such date
+        "Compilers,2030-01-12,14:00,13:00,Compilers,3,CSE,\n"  # ends before it starts
+        "Old,2020-01-12,10:00,13:00,History,three,CSE,\n"      # past date, bad year
+        "Mid Term,2030-01-10,10:00,13:00,Algorithms,3,CSE,\n"  # already scheduled
+        "Graphics,2030-01-14,10:00,13:00,Graphics,3,CSE,B-999\n"
+        "Databases,2030-01-15,10:00,13:00,Databases,3,CSE,\n"
+    )
+    response = _upload(api, data["admin"], content)
+    assert response.status_code == 422
+    errors = response.json()["detail"]["errors"]
+    assert [(e["row"], e["column"]) for e in errors] == [
+        (2, "date"), (3, "endTime"), (4, "years"), (4, "date"), (5, "title"), (6, "rooms"),
+    ]
+    assert "B-999" in errors[-1]["message"]
+    assert asyncio.run(mock_db.examSessions.count_documents({})) == 1
+    assert asyncio.run(mock_db.calendarEvents.count_documents({})) == 0
+
+
+def test_rooms_are_booked_and_double_bookings_rejected(api, mock_db):
+    data = _seeded(mock_db)
+    room, other = data["rooms"]
+    asyncio.run(mock_db.examRooms.insert_one({"examSessionId": data["exam"]["id"], "roomId": room["id"]}))
+    clashing = HEADER + (
+        "Networks,2030-01-10,12:00,14:00,Networks,2,ECE,A-100\n"            # the seeded exam holds A-100 until 13:00
+        "Compilers,2030-01-11,10:00,13:00,Compilers,2,ECE,A Block/A-101\n"
+        "Graphics,2030-01-11,12:00,13:00,Graphics,4,CSE,a-101\n"            # same room as row 3
+    )
+    errors = _upload(api, data["admin"], clashing).json()["detail"]["errors"]
+    assert [(e["row"], e["message"]) for e in errors] == [
+        (2, "Room A-100 is already booked by 'Mid Term' on 2030-01-10 10:00-13:00"),
+        (4, "Room a-101 is already booked by row 3"),
+    ]
+
+    fine = HEADER + "Networks,2030-01-10,13:00,15:00,Networks,2,ECE,A-100;A-101\n"
+    assert _upload(api, data["admin"], fine, dry_run=True).json()["imported"] == 0
+    assert asyncio.run(mock_db.examRooms.count_documents({})) == 1
+    exam_id = _upload(api, data["admin"], fine).json()["exams"][0]["id"]
+    booked = asyncio.run(mock_db.examRooms.find({"examSessionId": exam_id}).to_list(None))
+    assert sorted(r["roomId"] for r in booked) == sorted([room["id"], other["id"]])
+    assert booked[0]["capacity"] == 30
+
+
+def test_xlsx_timetable(api, mock_db):
+    openpyxl = pytest.importorskip("openpyxl")
+    data = _seeded(mock_db)
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["Title", "Date", "Start", "End", "Subject", "Years", "Branches", "Status"])
+    sheet.append(["Networks", date(2030, 2, 1), time(10, 0), time(13, 0), "Networks", 3, "CSE", "Draft"])
+    sheet.append([None] * 8)
+    output = io.BytesIO()
+    workbook.save(output)
+
+    response = _upload(api, data["admin"], output.getvalue(), name="semester.xlsx")
+    assert response.status_code == 200 and response.json()["imported"] == 1
+    exam = asyncio.run(mock_db.examSessions.find_one({"title": "Networks"}))
+    assert (exam["date"], exam["startTime"], exam["status"], exam["years"]) == ("2030-02-01", "10:00", "draft", [3])
+
+
+def test_import_needs_admin_and_known_columns(api, mock_db):
+    data = _seeded(mock_db)
+    assert _upload(api, data["invigilator"], HEADER).status_code == 403
+    response = _upload(api, data["admin"], "Exam,Date\nNetworks,2030-01-11\n")
+    assert response.status_code == 400 and "startTime" in response.json()["detail"]
+    assert _upload(api, data["admin"], HEADER, name="timetable.pdf").status_code == 400
+
+
+def test_standalone_fallback_rolls_back_a_partial_import(mock_db, monkeypatch):
+    async def no_transactions(*args, **kwargs):
+        raise OperationFailure("Transaction numbers are only allowed on a replica set member or mongos", code=20)
+
+    async def failing_insert(*args, **kwargs):
+        raise OperationFailure("disk full", code=14031)
+
+    monkeypatch.setattr(mock_db.client, "start_session", no_transactions)
+    exams = [{"id": "e1", "title": "Networks"}, {"id": "e2", "title": "Compilers"}]
+    events = [{"id": "c1", "examId": "e1"}, {"id": "c2", "examId": "e2"}]
+    rooms = [{"examSessionId": "e1", "roomId": "r1"}]
+
+    # Without a transaction the exams are written first; a failed second insert removes them again
+    with monkeypatch.context() as patched, pytest.raises(OperationFailure, match="disk full"):
+        patched.setattr(mock_db.calendarEvents, "insert_many", failing_insert)
+        asyncio.run(server._insert_timetable([dict(e) for e in exams], [dict(e) for e in events], [dict(r) for r in rooms]))
+    assert asyncio.run(mock_db.examSessions.count_documents({})) == 0
+    assert asyncio.run(mock_db.calendarEvents.count_documents({})) == 0
+    assert asyncio.run(mock_db.examRooms.count_documents({})) == 0
+
+    asyncio.run(server._insert_timetable(exams, events, rooms))  # so the same file imports cleanly again
+    assert asyncio.run(mock_db.examSessions.count_documents({})) == 2
+    assert asyncio.run(mock_db.calendarEvents.count_documents({})) == 2